@@ -0,0 +1,264 @@
+from bisect import bisect_right
+from characterset import CharacterSet
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Alphabet:
+    """
+    Alphabet
+    Class to partition the characters of a regex into equivalence classes: two characters are in
+    the same class if every literal and character class of the regex has both or neither of them.
+    Automata built from the regex transition on class IDs (1 to number_of_classes, since the NFA
+    keeps class 0 for epsilon) instead of characters, so their tables stay small even for classes
+    like [a-z] or . (and characters in no class are rejected right away).
+    """
+
+    # Segments up to this size have each of their characters put in char_classes up front
+    # (other characters are added the first time they are looked up).
+    MAX_PRELOADED_SEGMENT = 256
+
+    # Characters looked up by class_of are only added to char_classes while it has fewer than
+    # this many entries (other characters are looked up in the segments each time), so long-lived
+    # automata matching Unicode text don't grow it without bound.
+    MAX_CACHED_CHARS = 4096
+
+    def __init__(self, character_sets: Iterable[CharacterSet]):
+        """
+        __init__
+        Creates an Alphabet object from the character sets of a regex.
+
+        :param character_sets: The character sets (literals and character classes) of the regex.
+        """
+
+        # The code points are split into segments: segment i is the code points from
+        # segment_starts[i] up to the start of the next segment, and is in class segment_classes[i]
+        # (0 if no character set has it).
+        self.segment_starts: List[int] = []
+        self.segment_classes: List[int] = []
+
+        # Sweep the interval boundaries in order, tracking the sets that have the current segment.
+        events: Dict[int, List[int]] = {}
+        for set_id, character_set in enumerate(dict.fromkeys(character_sets)):
+            for start, end in character_set.intervals:
+                events.setdefault(start, []).append(set_id + 1)
+                events.setdefault(end + 1, []).append(-set_id - 1)
+
+        class_ids: Dict[frozenset, int] = {frozenset(): 0}
+        active_sets = set()
+        for code_point in sorted(events):
+            for event in events[code_point]:
+                if event > 0:
+                    active_sets.add(event)
+                else:
+                    active_sets.discard(-event)
+            signature = frozenset(active_sets)
+            class_id = class_ids.setdefault(signature, len(class_ids))
+            if self.segment_classes and self.segment_classes[-1] == class_id:
+                continue
+            self.segment_starts.append(code_point)
+            self.segment_classes.append(class_id)
+
+        self.number_of_classes = len(class_ids) - 1
+        self._build_char_classes()
+
+    @staticmethod
+    def from_tree(tree: RegexNode) -> 'Alphabet':
+        """
+        from_tree
+        Creates the Alphabet of a parse tree (from its literals and character classes).
+
+        :param tree: The root of the parse tree.
+        :return: The Alphabet object.
+        """
+
+        chars = set()
+        character_classes = set()
+        nodes_to_visit = [tree]
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            if node.node_type == RegexNodeType.LITERAL:
+                chars.add(node.value)
+            elif node.node_type == RegexNodeType.CHARACTER_CLASS:
+                character_classes.add(node.value)
+            nodes_to_visit.extend(node.children)
+
+        if not character_classes:
+            return Alphabet._from_chars(chars)
+        return Alphabet(
+            [CharacterSet.from_chars(char) for char in chars] + list(character_classes)
+        )
+
+    @staticmethod
+    def _from_chars(chars: Iterable[str]) -> 'Alphabet':
+        """
+        _from_chars
+        Creates the Alphabet of a regex without character classes, where each character is a
+        class of its own (the same classes as __init__, without sweeping any intervals).
+
+        :param chars: The characters of the regex.
+        :return: The Alphabet object.
+        """
+
+        alphabet = Alphabet.__new__(Alphabet)
+        alphabet.segment_starts = []
+        alphabet.segment_classes = []
+        code_points = sorted({ord(char) for char in chars})
+        for class_id, code_point in enumerate(code_points, 1):
+            # The segment after the previous character starts here if they are adjacent.
+            if alphabet.segment_starts and alphabet.segment_starts[-1] == code_point:
+                alphabet.segment_classes[-1] = class_id
+            else:
+                alphabet.segment_starts.append(code_point)
+                alphabet.segment_classes.append(class_id)
+            alphabet.segment_starts.append(code_point + 1)
+            alphabet.segment_classes.append(0)
+
+        alphabet.number_of_classes = len(code_points)
+        alphabet.char_classes = {
+            chr(code_point): class_id for class_id, code_point in enumerate(code_points, 1)
+        }
+        return alphabet
+
+    @staticmethod
+    def from_json(json_object: dict) -> 'Alphabet':
+        """
+        from_json
+        Creates an Alphabet object from a dictionary written by convert_alphabet_to_json
+        (e.g. loaded from disk).
+
+        :param json_object: The dictionary of segments.
+        :return: The Alphabet object.
+        """
+
+        alphabet = Alphabet.__new__(Alphabet)
+        alphabet.segment_starts = json_object['segment_starts']
+        alphabet.segment_classes = json_object['segment_classes']
+        alphabet.number_of_classes = max(alphabet.segment_classes, default=0)
+        alphabet._build_char_classes()
+        return alphabet
+
+    def convert_alphabet_to_json(self) -> dict:
+        """
+        convert_alphabet_to_json
+        Returns a dictionary representing a JSON object.
+
+        :return: A dictionary of the segments.
+        """
+
+        return {'segment_starts': self.segment_starts, 'segment_classes': self.segment_classes}
+
+    def _build_char_classes(self) -> None:
+        """
+        _build_char_classes
+        Builds the dictionary of the class of each character (with the characters of the small
+        segments), which makes looking up the class of most characters a dictionary lookup.
+        """
+
+        self.char_classes: Dict[str, int] = {}
+        for segment, class_id in enumerate(self.segment_classes):
+            segment_end = self._segment_end(segment)
+            if class_id and segment_end - self.segment_starts[segment] < self.MAX_PRELOADED_SEGMENT:
+                for code_point in range(self.segment_starts[segment], segment_end + 1):
+                    self.char_classes[chr(code_point)] = class_id
+
+    def _segment_end(self, segment: int) -> int:
+        """
+        _segment_end
+        Returns the last code point of a segment.
+
+        :param segment: The index of the segment.
+        :return: The last code point of the segment.
+        """
+
+        if segment + 1 < len(self.segment_starts):
+            return self.segment_starts[segment + 1] - 1
+        return CharacterSet.MAX_CODE_POINT
+
+    def class_of(self, char: str) -> Optional[int]:
+        """
+        class_of
+        Returns the class of a character (and adds it to char_classes if it isn't full, so the next
+        lookup of the character is a dictionary lookup). Use char_classes.get first in loops.
+
+        :param char: The character.
+        :return: The ID of the class (or None if no character set of the regex has the character).
+        """
+
+        class_id = self.char_classes.get(char)
+        if class_id is None:
+            segment = bisect_right(self.segment_starts, ord(char)) - 1
+            if segment < 0 or not self.segment_classes[segment]:
+                return None
+            class_id = self.segment_classes[segment]
+            if len(self.char_classes) < self.MAX_CACHED_CHARS:
+                self.char_classes[char] = class_id
+        return class_id
+
+    def classes_of(self, character_set: CharacterSet) -> List[int]:
+        """
+        classes_of
+        Returns the classes of the characters of a character set of the regex
+        (the set is the union of these classes).
+
+        :param character_set: The character set.
+        :return: The sorted list of class IDs.
+        """
+
+        class_ids = set()
+        for start, end in character_set.intervals:
+            segment = bisect_right(self.segment_starts, start) - 1
+            while segment < len(self.segment_starts) and self.segment_starts[segment] <= end:
+                class_ids.add(self.segment_classes[segment])
+                segment += 1
+        class_ids.discard(0)
+        return sorted(class_ids)
+
+    def class_set(self, class_id: int) -> CharacterSet:
+        """
+        class_set
+        Returns the characters of a class (e.g. for logging).
+
+        :param class_id: The ID of the class.
+        :return: The CharacterSet of the class.
+        """
+
+        return CharacterSet(
+            (self.segment_starts[segment], self._segment_end(segment))
+            for segment, segment_class in enumerate(self.segment_classes)
+            if segment_class == class_id
+        )
+
+    def class_sets(self) -> List[CharacterSet]:
+        """
+        class_sets
+        Returns the characters of every class (in one pass over the segments).
+
+        :return: The list of CharacterSets, where item i is the set of class i
+                 (item 0, for epsilon, is empty).
+        """
+
+        class_intervals: List[List[Tuple[int, int]]] = [
+            [] for _ in range(self.number_of_classes + 1)
+        ]
+        for segment, segment_class in enumerate(self.segment_classes):
+            if segment_class:
+                class_intervals[segment_class].append(
+                    (self.segment_starts[segment], self._segment_end(segment))
+                )
+        return [CharacterSet(intervals) for intervals in class_intervals]
+
+    def max_code_point(self) -> int:
+        """
+        max_code_point
+        Returns the largest code point in any class (e.g. to check that every character of the
+        regex is ASCII).
+
+        :return: The largest code point (-1 if there are no classes).
+        """
+
+        for segment in range(len(self.segment_classes) - 1, -1, -1):
+            if self.segment_classes[segment]:
+                return self._segment_end(segment)
+        return -1
@@ -0,0 +1,230 @@
+import asyncio
+import functools
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from matchengine import MatchEngine
+from parallelrunner import _initialize_worker
+from patterncache import PATTERN_CACHE
+from regexresult import RegexResult
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _run_test_string_batch(regular_expression: str, test_strings: List[str],
+                           engine_value: str) -> Dict[str, Optional[bool]]:
+    """
+    _run_test_string_batch
+    Runs a batch of test strings through a regex (on an executor thread or process),
+    the same way as batch mode (through RegexResult and the pattern cache).
+
+    :param regular_expression: The regular expression.
+    :param test_strings: The distinct test strings to run.
+    :param engine_value: The value of the MatchEngine to use (enums are passed by value).
+    :return: A dictionary that maps each test string to its result
+             (None if the regular expression is invalid).
+    """
+
+    regex_result = RegexResult(regular_expression, {
+        test_string: None for test_string in test_strings
+    })
+    regex_result.run_test_strings(MatchEngine(engine_value))
+    return regex_result.test_strings_in_language
+
+
+class AsyncMatcher:
+    """
+    AsyncMatcher
+    Asyncio API that runs test strings on an executor, so matching never blocks the event loop.
+    Concurrent requests for the same regex are coalesced into one batch (each distinct test string
+    is run once), and at most one batch per regex runs at a time: requests that arrive while it
+    runs are queued for the next batch.
+    Results are the same as batch mode, since each batch runs through RegexResult.
+    """
+
+    def __init__(self, engine: MatchEngine = MatchEngine.AUTO, executor: Optional[Executor] = None,
+                 max_batch_size: int = 10000):
+        """
+        __init__
+        Creates an AsyncMatcher object.
+
+        :param engine: The engine used to run the test strings.
+        :param executor: The executor batches run on (e.g. from process_executor),
+                         or None for a thread pool created on first use.
+        :param max_batch_size: The number of test strings above which requests are not
+                               coalesced into the same batch (a request is never split).
+        """
+
+        self.engine = engine
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.number_of_batches = 0
+
+        # Requests waiting for a batch (test strings and the future of the caller), by regex.
+        self._pending_requests: Dict[str, List[Tuple[List[str], asyncio.Future]]] = {}
+        self._running_regexes = set()
+
+    @staticmethod
+    def process_executor(number_of_workers: int) -> ProcessPoolExecutor:
+        """
+        process_executor
+        Creates a pool of worker processes for an AsyncMatcher,
+        with pattern caches set up like the one of this process.
+
+        :param number_of_workers: The number of worker processes.
+        :return: The ProcessPoolExecutor object (to shut down when it is no longer used).
+        """
+
+        automaton_cache = PATTERN_CACHE.automaton_cache
+        cache_directory = automaton_cache.cache_directory if automaton_cache is not None else None
+        return ProcessPoolExecutor(number_of_workers, initializer=_initialize_worker,
+                                   initargs=(cache_directory, PATTERN_CACHE.max_size,
+                                             PATTERN_CACHE.lazy_dfa_cache_size))
+
+    async def match_many(self, regular_expression: str,
+                         test_strings: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """
+        match_many
+        Runs test strings through a regex on the executor.
+        Cancelling the caller drops its request (and the batch, if it hasn't started and
+        no other caller is waiting for it).
+
+        :param regular_expression: The regular expression.
+        :param test_strings: The test strings to run.
+        :return: A dictionary that maps each test string to its result
+                 (None if the regular expression is invalid).
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        requests = self._pending_requests.get(regular_expression)
+        if requests is None:
+            requests = self._pending_requests[regular_expression] = []
+            # Requests made before the event loop gets back to this callback join the batch.
+            if regular_expression not in self._running_regexes:
+                loop.call_soon(self._submit_batch, loop, regular_expression)
+        requests.append((list(test_strings), future))
+
+        return await future
+
+    async def run_regex_result(self, regex_result: RegexResult) -> RegexResult:
+        """
+        run_regex_result
+        Asynchronous version of RegexResult.run_test_strings (with the engine of this matcher).
+
+        :param regex_result: The RegexResult to run.
+        :return: The RegexResult (with its test strings run).
+        """
+
+        regex_result.test_strings_in_language.update(await self.match_many(
+            regex_result.regular_expression, regex_result.test_strings_in_language
+        ))
+        return regex_result
+
+    def _submit_batch(self, loop: asyncio.AbstractEventLoop, regular_expression: str) -> None:
+        """
+        _submit_batch
+        Submits the pending requests of a regex to the executor as one batch
+        (up to max_batch_size test strings; the other requests wait for the next batch).
+
+        :param loop: The event loop of the requests.
+        :param regular_expression: The regular expression.
+        """
+
+        requests = [
+            request for request in self._pending_requests.pop(regular_expression, ())
+            if not request[1].done()
+        ]
+        if not requests:
+            return
+
+        batch = []
+        batch_size = 0
+        while requests and (not batch or batch_size + len(requests[0][0]) <= self.max_batch_size):
+            batch_size += len(requests[0][0])
+            batch.append(requests.pop(0))
+        if requests:
+            self._pending_requests[regular_expression] = requests
+
+        test_strings = list(dict.fromkeys(
+            test_string for request_strings, _ in batch for test_string in request_strings
+        ))
+        self._running_regexes.add(regular_expression)
+        self.number_of_batches += 1
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor()
+        executor_future = self.executor.submit(_run_test_string_batch, regular_expression,
+                                               test_strings, self.engine.value)
+
+        for _, future in batch:
+            future.add_done_callback(functools.partial(self._cancel_if_abandoned,
+                                                       executor_future, batch))
+        asyncio.wrap_future(executor_future, loop=loop).add_done_callback(
+            functools.partial(self._finish_batch, loop, regular_expression, batch)
+        )
+
+    @staticmethod
+    def _cancel_if_abandoned(executor_future: Future,
+                             batch: List[Tuple[List[str], asyncio.Future]],
+                             request_future: asyncio.Future) -> None:
+        """
+        _cancel_if_abandoned
+        Cancels a batch once every caller waiting for it is cancelled
+        (a batch that has already started runs to completion, so batches of a regex never overlap).
+
+        :param executor_future: The future of the batch on the executor.
+        :param batch: The requests of the batch.
+        :param request_future: The future of the request that is done.
+        """
+
+        if all(future.cancelled() for _, future in batch):
+            executor_future.cancel()
+
+    def _finish_batch(self, loop: asyncio.AbstractEventLoop, regular_expression: str,
+                      batch: List[Tuple[List[str], asyncio.Future]],
+                      executor_future: asyncio.Future) -> None:
+        """
+        _finish_batch
+        Hands the results of a batch to its callers, and submits the next batch of the regex.
+
+        :param loop: The event loop of the requests.
+        :param regular_expression: The regular expression.
+        :param batch: The requests of the batch.
+        :param executor_future: The future of the batch on the executor.
+        """
+
+        self._running_regexes.discard(regular_expression)
+
+        if not executor_future.cancelled():
+            error = executor_future.exception()
+            results = executor_future.result() if error is None else None
+            for request_strings, future in batch:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result({
+                        test_string: results[test_string] for test_string in request_strings
+                    })
+
+        if regular_expression in self._pending_requests:
+            self._submit_batch(loop, regular_expression)
+
+
+# Shared by callers that don't need their own executor or engine.
+ASYNC_MATCHER = AsyncMatcher()
+
+
+async def match_many(regular_expression: str,
+                     test_strings: Iterable[str]) -> Dict[str, Optional[bool]]:
+    """
+    match_many
+    Runs test strings through a regex with the shared AsyncMatcher (on its thread pool).
+
+    :param regular_expression: The regular expression.
+    :param test_strings: The test strings to run.
+    :return: A dictionary that maps each test string to its result
+             (None if the regular expression is invalid).
+    """
+
+    return await ASYNC_MATCHER.match_many(regular_expression, test_strings)
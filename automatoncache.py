@@ -0,0 +1,347 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from alphabet import Alphabet
+from bitparallelmatcher import BitParallelMatcher
+from dfa import DFA
+from literalprefilter import LiteralPrefilter
+from nfa import NFA
+from patternanalysis import PatternAnalysis
+from typing import List, Optional, Sequence, Tuple
+
+
+class AutomatonCache:
+    """
+    AutomatonCache
+    Directory of compiled automata (NFAs, DFAs and bit-parallel matchers, and the prefilters
+    that run before them) saved in a binary
+    format, so a regex compiled by one process is loaded (instead of rebuilt) by the next ones.
+    Files are memory-mapped when they are loaded, and their integer tables are used in place.
+
+    File format (integers are little-endian, tables are in the byte order of the writer):
+    magic (4 bytes), format version (uint16), kind (uint8), byte order (uint8: 0 little, 1 big),
+    metadata length (uint32), number of tables (uint32), length of each table (uint32 each),
+    JSON metadata (UTF-8), padding to a multiple of 8 bytes, then each table of int32 values.
+    """
+
+    MAGIC = b'RXAC'
+
+    # Changes whenever the file format changes.
+    FORMAT_VERSION = 1
+
+    # Changes whenever the automata built for a regex change (e.g. a new construction).
+    # Both versions are part of the file names, so files from other versions are never loaded.
+    ENGINE_VERSION = 6
+
+    FILE_EXTENSION = '.automaton'
+
+    # Kinds of automata.
+    NFA_KIND = 1
+    DFA_KIND = 2
+    BIT_PARALLEL_KIND = 3
+    PREFILTERS_KIND = 4
+
+    _HEADER = struct.Struct('<4sHBBII')
+
+    def __init__(self, cache_directory: str):
+        """
+        __init__
+        Creates an AutomatonCache object (and the cache directory if it doesn't exist).
+
+        :param cache_directory: The path of the cache directory.
+        """
+
+        self.cache_directory = cache_directory
+        os.makedirs(cache_directory, exist_ok=True)
+
+    def _file_path(self, regular_expression: str, kind: int) -> str:
+        """
+        _file_path
+        Returns the path of the cache file of an automaton.
+        The file name is a hash of the versions, the kind and the regular expression.
+
+        :param regular_expression: The regular expression the automaton was built from.
+        :param kind: The kind of automaton.
+        :return: The path of the cache file.
+        """
+
+        key = f'{self.FORMAT_VERSION}\0{self.ENGINE_VERSION}\0{kind}\0{regular_expression}'
+        file_name = hashlib.sha256(key.encode('utf-8')).hexdigest() + self.FILE_EXTENSION
+        return os.path.join(self.cache_directory, file_name)
+
+    def _write(self, regular_expression: str, kind: int, metadata: dict,
+               tables: List[Sequence[int]]) -> None:
+        """
+        _write
+        Writes an automaton to its cache file (atomically, so readers never see a partial file).
+
+        :param regular_expression: The regular expression the automaton was built from.
+        :param kind: The kind of automaton.
+        :param metadata: The JSON serializable fields of the automaton.
+        :param tables: The integer tables of the automaton (int32 values).
+        """
+
+        metadata = dict(metadata, regex=regular_expression)
+        metadata_bytes = json.dumps(metadata).encode('utf-8')
+        header = self._HEADER.pack(self.MAGIC, self.FORMAT_VERSION, kind,
+                                   0 if sys.byteorder == 'little' else 1,
+                                   len(metadata_bytes), len(tables))
+        header += struct.pack(f'<{len(tables)}I', *map(len, tables))
+        padding = -(len(header) + len(metadata_bytes)) % 8
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_directory,
+                                                           suffix='.partial')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as cache_file:
+                cache_file.write(header + metadata_bytes + bytes(padding))
+                for table in tables:
+                    cache_file.write(memoryview(table).cast('B'))
+            os.replace(temporary_path, self._file_path(regular_expression, kind))
+        except OSError as error_message:
+            logging.debug(f'Could not write automaton cache file: {error_message}')
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def _read(self, regular_expression: str,
+              kind: int) -> Optional[Tuple[dict, List[memoryview]]]:
+        """
+        _read
+        Memory-maps the cache file of an automaton.
+        Files that are invalid (e.g. truncated, or from another byte order) are removed.
+
+        :param regular_expression: The regular expression the automaton was built from.
+        :param kind: The kind of automaton.
+        :return: The metadata and the tables (int32 views into the mapped file),
+                 or None if the automaton isn't cached.
+        """
+
+        file_path = self._file_path(regular_expression, kind)
+        try:
+            with open(file_path, 'rb') as cache_file:
+                mapped_file = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            view = memoryview(mapped_file)
+            magic, format_version, file_kind, byte_order, metadata_length, number_of_tables = (
+                self._HEADER.unpack_from(view)
+            )
+            if (magic != self.MAGIC or format_version != self.FORMAT_VERSION or
+                    file_kind != kind or byte_order != (0 if sys.byteorder == 'little' else 1)):
+                raise ValueError('incompatible automaton cache file')
+
+            position = self._HEADER.size
+            table_lengths = struct.unpack_from(f'<{number_of_tables}I', view, position)
+            position += 4 * number_of_tables
+            metadata = json.loads(str(view[position:position + metadata_length], 'utf-8'))
+            if metadata.get('regex') != regular_expression:
+                raise ValueError('automaton cache file is for another regex')
+            position += metadata_length
+            position += -position % 8
+
+            tables = []
+            for table_length in table_lengths:
+                if position + 4 * table_length > len(view):
+                    raise ValueError('truncated automaton cache file')
+                tables.append(view[position:position + 4 * table_length].cast('i'))
+                position += 4 * table_length
+            return metadata, tables
+        except (ValueError, struct.error) as error_message:
+            logging.debug(f'Removing automaton cache file {file_path}: {error_message}')
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+            return None
+
+    def save_nfa(self, regular_expression: str, nfa: NFA) -> None:
+        """
+        save_nfa
+        Saves the (usually epsilon-free) NFA of a regular expression.
+
+        :param regular_expression: The regular expression.
+        :param nfa: The NFA built from it.
+        """
+
+        self._write(regular_expression, self.NFA_KIND, {
+            'initial_state': nfa.initial_state,
+            'number_of_states': nfa.number_of_states,
+            'alphabet': nfa.alphabet.convert_alphabet_to_json(),
+            'accepting_states': hex(nfa.accepting_states),
+            'epsilon_free': nfa.epsilon_free
+        }, [nfa.transition_offsets, nfa.transition_destinations])
+
+    def load_nfa(self, regular_expression: str) -> Optional[NFA]:
+        """
+        load_nfa
+        Loads the NFA of a regular expression (its transition tables stay in the mapped file).
+
+        :param regular_expression: The regular expression.
+        :return: The NFA object (or None if it isn't cached).
+        """
+
+        cached_automaton = self._read(regular_expression, self.NFA_KIND)
+        if cached_automaton is None:
+            return None
+
+        metadata, (transition_offsets, transition_destinations) = cached_automaton
+        nfa = NFA()
+        nfa.set_alphabet(Alphabet.from_json(metadata['alphabet']))
+        nfa.initial_state = metadata['initial_state']
+        nfa.number_of_states = metadata['number_of_states']
+        nfa.accepting_states = int(metadata['accepting_states'], 16)
+        nfa.epsilon_free = metadata['epsilon_free']
+        nfa.transition_offsets = transition_offsets
+        nfa.transition_destinations = transition_destinations
+        return nfa
+
+    def save_dfa(self, regular_expression: str, dfa: Optional[DFA]) -> None:
+        """
+        save_dfa
+        Saves the minimized DFA of a regular expression
+        (or that there is none, if the DFA is too large).
+
+        :param regular_expression: The regular expression.
+        :param dfa: The DFA built from it (or None).
+        """
+
+        if dfa is None:
+            self._write(regular_expression, self.DFA_KIND, {'available': False}, [])
+            return
+
+        self._write(regular_expression, self.DFA_KIND, {
+            'available': True,
+            'alphabet': dfa.alphabet.convert_alphabet_to_json(),
+            'accepting_states': hex(dfa.accepting_states),
+            'initial_state': dfa.initial_state,
+            'dead_state': dfa.dead_state,
+            'state_counts': [dfa.nfa_state_count, dfa.dfa_state_count, dfa.minimized_state_count]
+        }, [dfa.transition_table])
+
+    def load_dfa(self, regular_expression: str) -> Tuple[bool, Optional[DFA]]:
+        """
+        load_dfa
+        Loads the minimized DFA of a regular expression (its table stays in the mapped file).
+
+        :param regular_expression: The regular expression.
+        :return: True if it is cached (otherwise False),
+                 and the DFA object (or None if the DFA is too large).
+        """
+
+        cached_automaton = self._read(regular_expression, self.DFA_KIND)
+        if cached_automaton is None:
+            return False, None
+
+        metadata, tables = cached_automaton
+        if not metadata['available']:
+            return True, None
+        transition_table, = tables
+        return True, DFA.from_tables(Alphabet.from_json(metadata['alphabet']), transition_table,
+                               int(metadata['accepting_states'], 16), metadata['initial_state'],
+                               metadata['dead_state'], tuple(metadata['state_counts']))
+
+    def save_bit_parallel_matcher(self, regular_expression: str,
+                                  matcher: Optional[BitParallelMatcher]) -> None:
+        """
+        save_bit_parallel_matcher
+        Saves the bit-parallel matcher of a regular expression
+        (or that there is none, if the regex has too many positions).
+
+        :param regular_expression: The regular expression.
+        :param matcher: The BitParallelMatcher built from it (or None).
+        """
+
+        if matcher is None:
+            self._write(regular_expression, self.BIT_PARALLEL_KIND, {'available': False}, [])
+            return
+
+        # Masks can have 64 bits, so they are stored in the metadata (as hex strings).
+        self._write(regular_expression, self.BIT_PARALLEL_KIND, {
+            'available': True,
+            'alphabet': matcher.alphabet.convert_alphabet_to_json(),
+            'class_masks': [hex(mask) for mask in matcher.class_masks],
+            'follow': [hex(follow) for follow in matcher.follow],
+            'accepting_mask': hex(matcher.accepting_mask)
+        }, [])
+
+    def load_bit_parallel_matcher(
+            self, regular_expression: str) -> Tuple[bool, Optional[BitParallelMatcher]]:
+        """
+        load_bit_parallel_matcher
+        Loads the bit-parallel matcher of a regular expression.
+
+        :param regular_expression: The regular expression.
+        :return: True if it is cached (otherwise False),
+                 and the BitParallelMatcher object (or None if the regex has none).
+        """
+
+        cached_automaton = self._read(regular_expression, self.BIT_PARALLEL_KIND)
+        if cached_automaton is None:
+            return False, None
+
+        metadata, _ = cached_automaton
+        if not metadata['available']:
+            return True, None
+        return True, BitParallelMatcher.from_follow_sets(
+            Alphabet.from_json(metadata['alphabet']),
+            [int(mask, 16) for mask in metadata['class_masks']],
+            [int(follow, 16) for follow in metadata['follow']],
+            int(metadata['accepting_mask'], 16)
+        )
+
+    def save_prefilters(self, regular_expression: str, analysis: PatternAnalysis,
+                        prefilter: Optional[LiteralPrefilter]) -> None:
+        """
+        save_prefilters
+        Saves the prefilters of a regular expression (so loading it doesn't need to parse it).
+
+        :param regular_expression: The regular expression.
+        :param analysis: The PatternAnalysis found from it.
+        :param prefilter: The LiteralPrefilter built from it (or None if it requires no literal).
+        """
+
+        self._write(regular_expression, self.PREFILTERS_KIND, {
+            'pattern_analysis': analysis.convert_pattern_analysis_to_json(),
+            'literal_prefilter': (
+                None if prefilter is None else prefilter.convert_literal_prefilter_to_json()
+            )
+        }, [])
+
+    def load_prefilters(self, regular_expression: str) -> Tuple[
+            bool, Optional[PatternAnalysis], Optional[LiteralPrefilter]]:
+        """
+        load_prefilters
+        Loads the prefilters of a regular expression.
+
+        :param regular_expression: The regular expression.
+        :return: True if they are cached (otherwise False), the PatternAnalysis object
+                 (or None if they aren't cached), and the LiteralPrefilter object
+                 (or None if the regex requires no literal).
+        """
+
+        cached_automaton = self._read(regular_expression, self.PREFILTERS_KIND)
+        if cached_automaton is None:
+            return False, None, None
+
+        metadata, _ = cached_automaton
+        analysis = PatternAnalysis.from_json(metadata['pattern_analysis'])
+        if metadata['literal_prefilter'] is None:
+            return True, analysis, None
+        return True, analysis, LiteralPrefilter.from_json(metadata['literal_prefilter'])
+
+    def clear(self) -> None:
+        """
+        clear
+        Removes every cache file from the cache directory.
+        """
+
+        for file_name in os.listdir(self.cache_directory):
+            if file_name.endswith(self.FILE_EXTENSION):
+                os.remove(os.path.join(self.cache_directory, file_name))
@@ -0,0 +1,317 @@
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from compiledregex import CompiledRegex
+from jsonreader import JsonReader
+from matchengine import MatchEngine
+from patterncache import PatternCache
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Benchmark:
+    """
+    Benchmark
+    Class that times compiling regular expressions and running test strings with every engine,
+    on pathological patterns, scaling curves (including compile time over pattern length)
+    and the batch mode example file.
+    Each result is the best time (in seconds) of a few runs, keyed by a benchmark name,
+    so results can be saved as JSON and compared against a saved baseline.
+    """
+
+    # The backtracking engine takes exponential time (and recursion depth grows with the string),
+    # so it is only run on small inputs.
+    BACKTRACK_MAX_PATHOLOGICAL_SIZE = 12
+    BACKTRACK_MAX_STRING_LENGTH = 100
+
+    # A result is reported as a regression if it is this much slower than the baseline
+    # (and long enough to be measured reliably).
+    REGRESSION_THRESHOLD = 1.25
+    MIN_COMPARABLE_SECONDS = 0.001
+
+    def __init__(self, repeat: int = 5, seed: int = 0):
+        """
+        __init__
+        Creates a Benchmark object.
+
+        :param repeat: The number of times each measurement is run (the best time is kept).
+        :param seed: The seed for the randomly generated test strings.
+        """
+
+        self.repeat = repeat
+        self.random = random.Random(seed)
+        self.results: Dict[str, float] = {}
+
+    def _time(self, function: Callable[[], object]) -> float:
+        """
+        _time
+        Times a function (with garbage collection disabled, like timeit).
+
+        :param function: The function to time (called with no arguments).
+        :return: The best time of self.repeat calls (in seconds).
+        """
+
+        best_time = float('inf')
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(self.repeat):
+                start_time = time.perf_counter()
+                function()
+                best_time = min(best_time, time.perf_counter() - start_time)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return best_time
+
+    def _random_strings(self, alphabet: str, length: int, number_of_strings: int) -> List[str]:
+        """
+        _random_strings
+        Generates random test strings.
+
+        :param alphabet: The characters of the strings.
+        :param length: The length of each string.
+        :param number_of_strings: The number of strings.
+        :return: The list of strings.
+        """
+
+        return [
+            ''.join(self.random.choice(alphabet) for _ in range(length))
+            for _ in range(number_of_strings)
+        ]
+
+    def _compile(self, name: str, regex: str) -> Optional[CompiledRegex]:
+        """
+        _compile
+        Times compiling a regex (parsing, NFA construction and epsilon removal, like PatternCache),
+        and compiles it for the match benchmarks.
+
+        :param name: The name of the benchmark.
+        :param regex: The regular expression to compile.
+        :return: The CompiledRegex object (or None if the regex is invalid).
+        """
+
+        # A new PatternCache (without an automaton cache) compiles the regex every time.
+        self.results[f'compile/{name}'] = self._time(lambda: PatternCache().get(regex))
+
+        compiled_regex = PatternCache().get(regex)
+        if compiled_regex is None:
+            logging.critical(f'Benchmark {name}: invalid regex {regex!r}')
+        return compiled_regex
+
+    def _match(self, name: str, compiled_regex: CompiledRegex, test_strings: List[str],
+               engines: Tuple[MatchEngine, ...] = tuple(MatchEngine)) -> None:
+        """
+        _match
+        Times running test strings through a compiled regex with each engine.
+        The automata an engine builds on first use are built before it is timed.
+
+        :param name: The name of the benchmark.
+        :param compiled_regex: The compiled regular expression.
+        :param test_strings: The test strings to run.
+        :param engines: The engines to time.
+        """
+
+        for engine in engines:
+            if (engine == MatchEngine.BACKTRACK and
+                    max(map(len, test_strings)) > self.BACKTRACK_MAX_STRING_LENGTH):
+                continue
+
+            if engine == MatchEngine.PREFIX_SHARING:
+                def run_test_strings():
+                    compiled_regex.matches_with_prefix_sharing(test_strings)
+            else:
+                def run_test_strings():
+                    for test_string in test_strings:
+                        compiled_regex.matches(test_string, engine)
+
+            compiled_regex.matches(test_strings[0], engine)
+            self.results[f'match/{engine.value}/{name}'] = self._time(run_test_strings)
+
+    def run_pathological(self) -> None:
+        """
+        run_pathological
+        Patterns that are exponential for a backtracking engine:
+        a?^n a^n against a^n, and nested stars against a^n (with no match).
+        """
+
+        for size in (4, 8, 12, 16, 24, 32):
+            compiled_regex = self._compile(f'optional^{size}', 'a?' * size + 'a' * size)
+            self._match(f'optional^{size}', compiled_regex, ['a' * size],
+                        self._pathological_engines(size))
+
+        for regex in ('(a*)*b', '((a*)*)*b', '(a|aa)*b', '(a|a)*b'):
+            compiled_regex = self._compile(f'nested {regex}', regex)
+            for size in (10, 100, 1000):
+                self._match(f'nested {regex} a^{size}', compiled_regex, ['a' * size],
+                            self._pathological_engines(size))
+
+    def _pathological_engines(self, size: int) -> Tuple[MatchEngine, ...]:
+        """
+        _pathological_engines
+        Returns the engines to run on a pathological pattern of a given size
+        (the backtracking engine only runs on small ones).
+
+        :param size: The size of the pattern (and of its test string).
+        :return: The engines to time.
+        """
+
+        return tuple(
+            engine for engine in MatchEngine
+            if engine != MatchEngine.BACKTRACK or size <= self.BACKTRACK_MAX_PATHOLOGICAL_SIZE
+        )
+
+    def run_scaling(self) -> None:
+        """
+        run_scaling
+        Scaling curves over the length of the test strings, the length of the regex
+        and the number of test strings in a batch.
+        """
+
+        compiled_regex = self._compile('string-length', '(a|b)*abb')
+        for length in (10, 100, 1000, 10000):
+            self._match(f'string-length {length}', compiled_regex,
+                        self._random_strings('ab', length, 20))
+
+        for length in (4, 16, 64, 256):
+            compiled_regex = self._compile(f'regex-length {length}', '(a|b)' * length)
+            self._match(f'regex-length {length}', compiled_regex,
+                        self._random_strings('ab', length, 20))
+
+        compiled_regex = self._compile('batch-size', 'a(b|c)*d')
+        for number_of_strings in (10, 100, 1000, 10000):
+            self._match(f'batch-size {number_of_strings}', compiled_regex,
+                        ['a' + test_string + 'd'
+                         for test_string in self._random_strings('bcd', 10, number_of_strings)])
+
+    def run_pattern_length(self) -> None:
+        """
+        run_pattern_length
+        Compile time (parsing, NFA construction and epsilon removal) over the length of generated
+        patterns: runs of literals, long unions, repeated groups with nested operators, and
+        repeated nullable stars (whose epsilon-free NFA would be quadratic in their length).
+        """
+
+        for length in (100, 1000, 10000):
+            patterns = {
+                'literals': 'ab' * (length // 2),
+                'unions': '(' + '|'.join('abcdefgh'[i % 8] + 'x' for i in range(length // 3)) + ')',
+                'groups': '(a(b|c)*d)?' * (length // 11),
+                'nullable-stars': '(a*b)*' * (length // 6)
+            }
+            for kind, regex in patterns.items():
+                self.results[f'compile/pattern-length {kind} {length}'] = self._time(
+                    lambda: PatternCache().get(regex)
+                )
+
+    def run_prefix_heavy(self) -> None:
+        """
+        run_prefix_heavy
+        Many test strings that share long prefixes (like IDs, paths and log keys).
+        """
+
+        compiled_regex = self._compile('prefix-heavy', '(a|b|c|d|e|f|g|h)*x')
+        prefixes = self._random_strings('abcdefgh', 200, 10)
+        self._match('prefix-heavy', compiled_regex, [
+            prefix + suffix for prefix in prefixes
+            for suffix in self._random_strings('abcdefghx', 8, 500)
+        ])
+
+    def run_batch_example(self, input_file_path: str) -> None:
+        """
+        run_batch_example
+        The regexes and test strings of a batch mode input file.
+
+        :param input_file_path: The path of the batch mode input file.
+        """
+
+        for index, regex_result in enumerate(JsonReader(input_file_path).read_regex_results()):
+            name = f'batch-example {index} {regex_result.regular_expression}'
+            compiled_regex = self._compile(name, regex_result.regular_expression)
+            if compiled_regex is not None:
+                self._match(name, compiled_regex, list(regex_result.test_strings_in_language))
+
+    def run_startup(self) -> None:
+        """
+        run_startup
+        Wall time of a whole command line run in regular mode (starting a new Python process),
+        which is mostly the time taken to start up and import modules.
+        """
+
+        package_directory = os.path.dirname(os.path.abspath(__file__))
+        self.results['startup/regular-mode'] = self._time(lambda: subprocess.run(
+            [sys.executable, package_directory, '-r', '(a|b)*abb', '-s', 'aabb'],
+            stdout=subprocess.DEVNULL, check=True
+        ))
+
+    def run(self) -> Dict[str, float]:
+        """
+        run
+        Runs every benchmark.
+
+        :return: A dictionary mapping each benchmark name to its time (in seconds).
+        """
+
+        self.run_startup()
+        self.run_pathological()
+        self.run_scaling()
+        self.run_pattern_length()
+        self.run_prefix_heavy()
+        self.run_batch_example(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'batch_input_example.json')
+        )
+        return self.results
+
+    def write_results(self, output_file_path: str) -> None:
+        """
+        write_results
+        Writes the results to a JSON file (that can be used as a baseline later).
+
+        :param output_file_path: The output JSON file path.
+        """
+
+        with open(output_file_path, 'w') as output_file:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': self.results
+            }, output_file, indent=4)
+
+    def compare_to_baseline(self, baseline_file_path: str) -> Dict[str, float]:
+        """
+        compare_to_baseline
+        Compares the results to a saved baseline, and logs every benchmark that got slower
+        by more than REGRESSION_THRESHOLD (ignoring times under MIN_COMPARABLE_SECONDS).
+
+        :param baseline_file_path: The path of a results file written by write_results.
+        :return: A dictionary mapping each benchmark in both files to its time relative to
+                 the baseline (e.g. 2.0 is twice as slow).
+        """
+
+        with open(baseline_file_path, 'r') as baseline_file:
+            baseline_results = json.load(baseline_file)['results']
+
+        ratios = {
+            name: seconds / baseline_results[name] if baseline_results[name] else float('inf')
+            for name, seconds in self.results.items()
+            if name in baseline_results
+        }
+
+        regressions = 0
+        for name, ratio in ratios.items():
+            if (ratio > self.REGRESSION_THRESHOLD and
+                    self.results[name] >= self.MIN_COMPARABLE_SECONDS):
+                regressions += 1
+                logging.info(f'Regression: {name} is {ratio:.2f}x the baseline time')
+            else:
+                logging.debug(f'{name}: {ratio:.2f}x the baseline time')
+
+        logging.info(f'{len(ratios)} benchmarks compared to {baseline_file_path}: '
+                     f'{regressions} regressions')
+        return ratios
@@ -0,0 +1,361 @@
+from alphabet import Alphabet
+from matchstats import MatchStats
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from typing import Dict, List, Optional, Tuple
+
+
+class BitParallelMatcher:
+    """
+    BitParallelMatcher
+    Class that builds the Glushkov (position) automaton of a parse tree and runs it bit-parallel.
+    Bit i of the active state set is position i of the regex (bit 0 is the initial state).
+    Every transition into a position is on that position's character (or character class),
+    so a step is: active = follow(active) & character_mask[char].
+    The masks are kept per class of the alphabet, and copied to a character the first time it is
+    run (so a class like . doesn't need a mask for every character).
+    """
+
+    # Positions (plus the initial state) must fit in a 64 bit machine word.
+    MAX_POSITIONS = 63
+
+    # follow(active) is looked up in tables, CHUNK_BITS positions at a time.
+    CHUNK_BITS = 8
+
+    def __init__(self, tree: RegexNode):
+        """
+        __init__
+        Creates a BitParallelMatcher object from a parse tree.
+        Use BitParallelMatcher.from_tree to check that the tree has few enough positions.
+
+        :param tree: The root of the parse tree of the regular expression.
+        """
+
+        self.number_of_positions = 0
+        self.alphabet = Alphabet.from_tree(tree)
+        self.class_masks: List[int] = [0] * (self.alphabet.number_of_classes + 1)
+        self._follow: List[int] = [0] * (self.count_positions(tree) + 1)
+
+        nullable, first, last = self._build(tree)
+        self._follow[0] = first
+        self.accepting_mask = last | (1 if nullable else 0)
+        self._build_character_masks()
+        self._build_follow_tables()
+
+    @staticmethod
+    def from_follow_sets(alphabet: Alphabet, class_masks: List[int], follow: List[int],
+                         accepting_mask: int) -> 'BitParallelMatcher':
+        """
+        from_follow_sets
+        Creates a BitParallelMatcher from the masks of an existing one (e.g. loaded from disk),
+        without a parse tree.
+
+        :param alphabet: The alphabet of the regex.
+        :param class_masks: The positions of each class of the alphabet (as a bitmask).
+        :param follow: The follow set (as a bitmask) of each position (and the initial state).
+        :param accepting_mask: The accepting positions (as a bitmask).
+        :return: The BitParallelMatcher object.
+        """
+
+        matcher = BitParallelMatcher.__new__(BitParallelMatcher)
+        matcher.number_of_positions = len(follow) - 1
+        matcher.alphabet = alphabet
+        matcher.class_masks = class_masks
+        matcher._follow = follow
+        matcher.accepting_mask = accepting_mask
+        matcher._build_character_masks()
+        matcher._build_follow_tables()
+        return matcher
+
+    def _build_character_masks(self) -> None:
+        """
+        _build_character_masks
+        Builds the positions (as a bitmask) of the characters whose class is already known
+        (the other characters are added by character_mask).
+        """
+
+        self.character_masks: Dict[str, int] = {
+            char: self.class_masks[class_id]
+            for char, class_id in self.alphabet.char_classes.items()
+        }
+
+    def character_mask(self, char: str) -> int:
+        """
+        character_mask
+        Returns the positions of a character (and caches them in character_masks, if the
+        alphabet cached the class of the character, so both stay bounded).
+
+        :param char: The character.
+        :return: The positions (as a bitmask, 0 if no position has the character).
+        """
+
+        class_id = self.alphabet.class_of(char)
+        if not class_id:
+            return 0
+        mask = self.class_masks[class_id]
+        if char in self.alphabet.char_classes:
+            self.character_masks[char] = mask
+        return mask
+
+    @property
+    def follow(self) -> List[int]:
+        """
+        follow
+        Returns the follow set (as a bitmask) of each position (index 0 is the initial state).
+
+        :return: The list of follow sets.
+        """
+
+        return self._follow
+
+    def _build_follow_tables(self) -> None:
+        """
+        _build_follow_tables
+        Builds the tables that look up follow(active) CHUNK_BITS positions at a time.
+        """
+
+        # follow_tables[j][byte] is the union of the follow sets of the positions
+        # CHUNK_BITS * j + k for every bit k set in byte.
+        self.follow_tables: List[List[int]] = []
+        for chunk_start in range(0, len(self._follow), self.CHUNK_BITS):
+            table = [0] * (1 << self.CHUNK_BITS)
+            for byte in range(1, 1 << self.CHUNK_BITS):
+                lowest_bit = (byte & -byte).bit_length() - 1
+                position = chunk_start + lowest_bit
+                follow = self._follow[position] if position < len(self._follow) else 0
+                table[byte] = table[byte & (byte - 1)] | follow
+            self.follow_tables.append(table)
+
+    @staticmethod
+    def count_positions(tree: RegexNode) -> int:
+        """
+        count_positions
+        Counts the positions (literal characters and character classes) in a parse tree.
+
+        :param tree: The root of the parse tree.
+        :return: The number of positions.
+        """
+
+        number_of_positions = 0
+        nodes_to_visit = [tree]
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            if node.node_type in (RegexNodeType.LITERAL, RegexNodeType.CHARACTER_CLASS):
+                number_of_positions += 1
+            nodes_to_visit.extend(node.children)
+
+        return number_of_positions
+
+    @staticmethod
+    def from_tree(tree: RegexNode) -> Optional['BitParallelMatcher']:
+        """
+        from_tree
+        Creates a BitParallelMatcher if the parse tree has few enough positions.
+
+        :param tree: The root of the parse tree.
+        :return: The BitParallelMatcher object (or None if the positions don't fit in a word).
+        """
+
+        if BitParallelMatcher.count_positions(tree) > BitParallelMatcher.MAX_POSITIONS:
+            return None
+        return BitParallelMatcher(tree)
+
+    def _add_follow(self, from_positions: int, to_positions: int) -> None:
+        """
+        _add_follow
+        Adds to_positions to the follow set of every position in from_positions.
+
+        :param from_positions: Bitmask of the positions to add the follow sets to.
+        :param to_positions: Bitmask of the positions that can follow them.
+        """
+
+        while from_positions:
+            lowest_bit = from_positions & -from_positions
+            self._follow[lowest_bit.bit_length() - 1] |= to_positions
+            from_positions ^= lowest_bit
+
+    def _build(self, node: RegexNode) -> Tuple[bool, int, int]:
+        """
+        _build
+        Numbers the positions of a subtree and computes its follow sets.
+
+        :param node: The root of the subtree.
+        :return: (nullable, first positions bitmask, last positions bitmask) of the subtree.
+        """
+
+        if node.node_type == RegexNodeType.LITERAL:
+            self.number_of_positions += 1
+            position = 1 << self.number_of_positions
+            self.class_masks[self.alphabet.class_of(node.value)] |= position
+            return False, position, position
+
+        elif node.node_type == RegexNodeType.CHARACTER_CLASS:
+            self.number_of_positions += 1
+            position = 1 << self.number_of_positions
+            for class_id in self.alphabet.classes_of(node.value):
+                self.class_masks[class_id] |= position
+            return False, position, position
+
+        elif node.node_type == RegexNodeType.EMPTY:
+            return True, 0, 0
+
+        elif node.node_type == RegexNodeType.CONCATENATION:
+            nullable, first, last = True, 0, 0
+            for child in node.children:
+                child_nullable, child_first, child_last = self._build(child)
+                self._add_follow(last, child_first)
+                if nullable:
+                    first |= child_first
+                last = last | child_last if child_nullable else child_last
+                nullable = nullable and child_nullable
+            return nullable, first, last
+
+        elif node.node_type == RegexNodeType.UNION:
+            nullable, first, last = False, 0, 0
+            for child in node.children:
+                child_nullable, child_first, child_last = self._build(child)
+                nullable = nullable or child_nullable
+                first |= child_first
+                last |= child_last
+            return nullable, first, last
+
+        nullable, first, last = self._build(node.children[0])
+        if node.node_type in (RegexNodeType.STAR, RegexNodeType.PLUS):
+            self._add_follow(last, first)
+        return nullable or node.node_type != RegexNodeType.PLUS, first, last
+
+    def step(self, active: int, char: str) -> int:
+        """
+        step
+        Runs a single character from a set of active positions.
+
+        :param active: The active positions (1 is the initial state).
+        :param char: The input character.
+        :return: The active positions after the character (0 if none are left).
+        """
+
+        character_mask = self.character_masks.get(char)
+        if character_mask is None:
+            character_mask = self.character_mask(char)
+        if not character_mask:
+            return 0
+
+        follow = 0
+        chunk = 0
+        while active:
+            follow |= self.follow_tables[chunk][active & ((1 << self.CHUNK_BITS) - 1)]
+            active >>= self.CHUNK_BITS
+            chunk += 1
+
+        return follow & character_mask
+
+    def is_accepting(self, active: int) -> bool:
+        """
+        is_accepting
+        Checks if a set of active positions contains an accepting position.
+
+        :param active: The active positions.
+        :return: True if any of the positions is accepting (otherwise False).
+        """
+
+        return bool(active & self.accepting_mask)
+
+    def run(self, input_string: str) -> bool:
+        """
+        run
+        Run a string through the automaton (a few integer operations per character).
+
+        :param input_string: The string to run.
+        :return: True if string was accepted. False otherwise.
+        """
+
+        character_masks = self.character_masks
+        follow_tables = self.follow_tables
+        chunk_bits = self.CHUNK_BITS
+        chunk_mask = (1 << chunk_bits) - 1
+        active = 1
+
+        for char in input_string:
+            character_mask = character_masks.get(char)
+            if character_mask is None:
+                character_mask = self.character_mask(char)
+            if not character_mask:
+                return False
+
+            # Union of the follow sets of the active positions, one chunk at a time.
+            follow = 0
+            chunk = 0
+            while active:
+                follow |= follow_tables[chunk][active & chunk_mask]
+                active >>= chunk_bits
+                chunk += 1
+
+            active = follow & character_mask
+            if not active:
+                return False
+
+        return bool(active & self.accepting_mask)
+
+    def run_bytes(self, input_bytes: memoryview) -> bool:
+        """
+        run_bytes
+        Run a byte string through the automaton, with each byte read as the character of the
+        same code (Latin-1), so a slice of a larger buffer is run without decoding or copying it.
+
+        :param input_bytes: The bytes to run.
+        :return: True if the bytes were accepted. False otherwise.
+        """
+
+        character_masks = self.character_masks
+        follow_tables = self.follow_tables
+        chunk_bits = self.CHUNK_BITS
+        chunk_mask = (1 << chunk_bits) - 1
+        active = 1
+
+        for byte in input_bytes:
+            character_mask = character_masks.get(chr(byte))
+            if character_mask is None:
+                character_mask = self.character_mask(chr(byte))
+            if not character_mask:
+                return False
+
+            follow = 0
+            chunk = 0
+            while active:
+                follow |= follow_tables[chunk][active & chunk_mask]
+                active >>= chunk_bits
+                chunk += 1
+
+            active = follow & character_mask
+            if not active:
+                return False
+
+        return bool(active & self.accepting_mask)
+
+    def run_with_stats(self, input_string: str, stats: MatchStats) -> bool:
+        """
+        run_with_stats
+        Same as run, but counts the work done in stats.
+        A visited state is an active position, and a transition is a step of one position.
+
+        :param input_string: The string to run.
+        :param stats: The counters to add to.
+        :return: True if string was accepted. False otherwise.
+        """
+
+        active = 1
+        stats.states_visited += 1
+        stats.peak_active_states = max(stats.peak_active_states, 1)
+
+        for char in input_string:
+            number_of_active_positions = bin(active).count('1')
+            active = self.step(active, char)
+            stats.transitions_taken += number_of_active_positions
+            if not active:
+                return False
+
+            number_of_active_positions = bin(active).count('1')
+            stats.states_visited += number_of_active_positions
+            stats.peak_active_states = max(stats.peak_active_states, number_of_active_positions)
+
+        return bool(active & self.accepting_mask)
@@ -0,0 +1,202 @@
+import sys
+
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+
+class CharacterSet:
+    """
+    CharacterSet
+    Class to define a set of characters (e.g. a character class like [a-z0-9]) as a compact,
+    immutable list of sorted, disjoint intervals of code points, so large sets (even every
+    Unicode character) stay small.
+    """
+
+    __slots__ = ('intervals', '_starts')
+
+    # The largest code point of a character.
+    MAX_CODE_POINT = sys.maxunicode
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        """
+        __init__
+        Creates a CharacterSet object from intervals of code points
+        (in any order, and overlapping or adjacent intervals are merged).
+
+        :param intervals: The (first, last) code points of each interval (both included).
+        """
+
+        merged_intervals: List[Tuple[int, int]] = []
+        for start, end in sorted(intervals):
+            if merged_intervals and start <= merged_intervals[-1][1] + 1:
+                if end > merged_intervals[-1][1]:
+                    merged_intervals[-1] = (merged_intervals[-1][0], end)
+            else:
+                merged_intervals.append((start, end))
+
+        self.intervals: Tuple[Tuple[int, int], ...] = tuple(merged_intervals)
+        self._starts = [start for start, _ in merged_intervals]
+
+    @staticmethod
+    def from_chars(chars: Iterable[str]) -> 'CharacterSet':
+        """
+        from_chars
+        Creates a CharacterSet object with the given characters.
+
+        :param chars: The characters of the set.
+        :return: The CharacterSet object.
+        """
+
+        return CharacterSet((ord(char), ord(char)) for char in chars)
+
+    @staticmethod
+    def any_char() -> 'CharacterSet':
+        """
+        any_char
+        Creates a CharacterSet object with every character (the . of a regex).
+
+        :return: The CharacterSet object.
+        """
+
+        return CharacterSet([(0, CharacterSet.MAX_CODE_POINT)])
+
+    @staticmethod
+    def union(character_sets: Iterable['CharacterSet']) -> 'CharacterSet':
+        """
+        union
+        Creates the CharacterSet with the characters of every given set.
+
+        :param character_sets: The sets to combine.
+        :return: The CharacterSet object.
+        """
+
+        character_sets = list(character_sets)
+        if len(character_sets) == 1:
+            return character_sets[0]
+        return CharacterSet(
+            interval for character_set in character_sets for interval in character_set.intervals
+        )
+
+    def complement(self) -> 'CharacterSet':
+        """
+        complement
+        Creates the CharacterSet with every character not in this set (e.g. for [^a-z]).
+
+        :return: The CharacterSet object.
+        """
+
+        intervals = []
+        next_start = 0
+        for start, end in self.intervals:
+            if start > next_start:
+                intervals.append((next_start, start - 1))
+            next_start = end + 1
+        if next_start <= self.MAX_CODE_POINT:
+            intervals.append((next_start, self.MAX_CODE_POINT))
+        return CharacterSet(intervals)
+
+    def single_char(self) -> Optional[str]:
+        """
+        single_char
+        Returns the character of a set with exactly one character.
+
+        :return: The character (or None if the set doesn't have exactly one character).
+        """
+
+        if len(self.intervals) == 1 and self.intervals[0][0] == self.intervals[0][1]:
+            return chr(self.intervals[0][0])
+        return None
+
+    def __contains__(self, char: str) -> bool:
+        """
+        __contains__
+        Checks if a character is in the set (a binary search on the intervals).
+
+        :param char: The character to check.
+        :return: True if the character is in the set (otherwise False).
+        """
+
+        code_point = ord(char)
+        index = bisect_right(self._starts, code_point) - 1
+        return index >= 0 and code_point <= self.intervals[index][1]
+
+    def __bool__(self) -> bool:
+        """
+        __bool__
+        Checks if the set has any character.
+
+        :return: True if the set isn't empty (otherwise False).
+        """
+
+        return bool(self.intervals)
+
+    def __eq__(self, other: object) -> bool:
+        """
+        __eq__
+        Checks if two sets have the same characters.
+
+        :param other: The object to compare to.
+        :return: True if other is a CharacterSet with the same characters (otherwise False).
+        """
+
+        return isinstance(other, CharacterSet) and self.intervals == other.intervals
+
+    def __hash__(self) -> int:
+        """
+        __hash__
+        Returns the hash of the set (equal sets have equal hashes).
+
+        :return: The hash of the intervals.
+        """
+
+        return hash(self.intervals)
+
+    def __str__(self) -> str:
+        """
+        __str__
+        Returns the set in regex syntax: a character, ., or a character class like [a-z0-9]
+        (negated if that is shorter). Characters that can't be written in a regex
+        are written as \\uXXXX escapes.
+
+        :return: The string representation of the set.
+        """
+
+        if self.intervals == ((0, self.MAX_CODE_POINT),):
+            return '.'
+        char = self.single_char()
+        if char is not None:
+            return char
+
+        complement = self.complement()
+        if 0 < len(complement.intervals) < len(self.intervals):
+            return '[^' + complement._intervals_to_string() + ']'
+        return '[' + self._intervals_to_string() + ']'
+
+    def _intervals_to_string(self) -> str:
+        """
+        _intervals_to_string
+        Returns the intervals in the syntax of a character class (without the brackets).
+
+        :return: The string representation of the intervals.
+        """
+
+        def char_to_string(code_point: int) -> str:
+            char = chr(code_point)
+            return char if char.isalnum() else f'\\u{code_point:04x}'
+
+        return ''.join(
+            char_to_string(start) if start == end else
+            char_to_string(start) + char_to_string(end) if start + 1 == end else
+            char_to_string(start) + '-' + char_to_string(end)
+            for start, end in self.intervals
+        )
+
+    def __repr__(self) -> str:
+        """
+        __repr__
+        Returns what __str__ is set to.
+
+        :return: A string representation of the CharacterSet from __str__.
+        """
+
+        return str(self)
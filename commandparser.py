@@ -1,110 +1,350 @@
 import click
+import functools
 import logging
+import os
 import sys
 
-from jsonreader import JsonReader
-from jsonwriter import JsonWriter
+from matchengine import MatchEngine
 from mutuallyexclusiveoption import MutuallyExclusiveOption
-from regexresult import RegexResult
-from testgenerator import TestGenerator
-from testreader import TestReader
-from testwriter import TestWriter
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+# Modules that are only needed by some modes (e.g. jsonschema for batch mode, rstr for test mode,
+# and the compiler and engines for every mode that matches) are imported by those modes,
+# so the other modes (and usage errors) start faster.
+if TYPE_CHECKING:
+    from matchstats import MatchStats
+    from patternset import PatternSet
+    from regexresult import RegexResult
+
+# Batch mode input and output files are JSON arrays or JSON Lines (one object per line).
+BATCH_FILE_EXTENSIONS = ('.json', '.jsonl')
+
+# Search mode reads the file this many characters at a time.
+SEARCH_BLOCK_SIZE = 1 << 16
 
 
 # Click function decorators to simplify command line processing
 @click.command()
 @click.option('--input-file', '-i',
               cls=MutuallyExclusiveOption,
-              help='JSON input file for batch mode.',
+              help='JSON (or JSON Lines) input file for batch mode.',
               type=click.Path(exists=True),
               mutually_exclusive=['regex', 'test-string', 'generate-tests'])
 @click.option('--output-file', '-o',
               cls=MutuallyExclusiveOption,
-              help='JSON output file for batch mode.',
+              help='JSON (or JSON Lines) output file for batch mode (or grep mode).',
               type=click.Path(exists=False),
-              mutually_exclusive=['regex', 'test-string', 'generate-tests'])
+              mutually_exclusive=['test-string', 'generate-tests', 'search-file'])
 @click.option('--regex', '-r',
               cls=MutuallyExclusiveOption,
-              help='Input regular expression for regular mode.',
-              mutually_exclusive=['input-file', 'output-file', 'generate-tests'])
+              help='Input regular expression for regular mode (or search and grep modes).',
+              mutually_exclusive=['input-file', 'generate-tests'])
 @click.option('--test-string', '-s',
               cls=MutuallyExclusiveOption,
               help='Input test string for regular mode.',
               mutually_exclusive=['input-file', 'output-file', 'generate-tests'],
               multiple=True)
+@click.option('--search-file', '-f',
+              cls=MutuallyExclusiveOption,
+              help='Text file to search with the input regular expression. '
+                   'Reports the start and end offsets of every match.',
+              type=click.Path(exists=True, dir_okay=False),
+              mutually_exclusive=['input-file', 'output-file', 'test-string', 'generate-tests',
+                                  'workers', 'pattern-set'])
+@click.option('--grep-file', '-g',
+              cls=MutuallyExclusiveOption,
+              help='File to grep with the input regular expression. '
+                   'Reports the lines accepted by the regular expression.',
+              type=click.Path(exists=True, dir_okay=False),
+              mutually_exclusive=['input-file', 'test-string', 'search-file', 'generate-tests',
+                                  'workers', 'pattern-set'])
+@click.option('--line-numbers', '-n',
+              cls=MutuallyExclusiveOption,
+              help='Grep mode: report the line numbers of the accepted lines '
+                   '(instead of the lines).',
+              is_flag=True,
+              default=False,
+              mutually_exclusive=['output-file'])
 @click.option('--generate-tests', '-t',
               cls=MutuallyExclusiveOption,
               help='Create randomly generated tests for the program. '
                    'Number specified sets the amount of random regular expressions to generate.',
               type=int,
-              mutually_exclusive=['input-file', 'output-file', 'regex', 'test-string'])
+              mutually_exclusive=['input-file', 'output-file', 'regex', 'test-string',
+                                  'search-file'])
+@click.option('--benchmark', '-b',
+              cls=MutuallyExclusiveOption,
+              help='Run the benchmarks and write the results to this JSON file.',
+              type=click.Path(exists=False, dir_okay=False),
+              mutually_exclusive=['input-file', 'output-file', 'regex', 'test-string',
+                                  'search-file', 'grep-file', 'generate-tests'])
+@click.option('--baseline',
+              help='Benchmark mode: JSON results file (written by --benchmark) to compare to.',
+              type=click.Path(exists=True, dir_okay=False))
+@click.option('--serve',
+              cls=MutuallyExclusiveOption,
+              metavar='ADDRESS',
+              help='Run a match server on this address (a Unix socket path, or a loopback TCP '
+                   '[host:]port) that runs newline-delimited JSON requests until interrupted.',
+              mutually_exclusive=['input-file', 'output-file', 'regex', 'test-string',
+                                  'generate-tests', 'benchmark', 'connect'])
+@click.option('--connect',
+              cls=MutuallyExclusiveOption,
+              metavar='ADDRESS',
+              help='Run the test strings of regular or batch mode on the match server '
+                   'at this address (instead of in this process).',
+              mutually_exclusive=['serve', 'generate-tests', 'benchmark'])
+@click.option('--workers', '-w',
+              cls=MutuallyExclusiveOption,
+              help='Number of worker processes for batch mode (or server mode). Defaults to 1.',
+              type=click.IntRange(min=1),
+              default=1,
+              mutually_exclusive=['regex', 'test-string', 'generate-tests'])
+@click.option('--pattern-set', '-p',
+              cls=MutuallyExclusiveOption,
+              help='Batch mode: combine every regex into one automaton, so each test string '
+                   'is scanned once for all the regexes.',
+              is_flag=True,
+              default=False,
+              mutually_exclusive=['regex', 'test-string', 'generate-tests', 'workers'])
+@click.option('--engine', '-e',
+              help='Engine used to run the test strings. Defaults to auto.',
+              type=click.Choice([match_engine.value for match_engine in MatchEngine]),
+              default=MatchEngine.AUTO.value)
+@click.option('--cache-dir',
+              help='Directory of compiled automata, saved by each run and loaded by later runs '
+                   '(so regexes are not recompiled).',
+              type=click.Path(file_okay=False))
+@click.option('--pattern-cache-size',
+              help='Maximum number of compiled regexes kept in memory (least recently used are '
+                   'evicted first). Defaults to 512.',
+              type=click.IntRange(min=1),
+              default=512)
+@click.option('--lazy-dfa-cache-size',
+              help='Memory limit (in KiB) of the DFA states cached by each lazy DFA (and by the '
+                   'pattern set), flushed when it is full. Defaults to 4096.',
+              type=click.IntRange(min=1),
+              default=4096)
+@click.option('--stats',
+              help='Count the work done by the engine (states visited, transitions taken, '
+                   'cache hits and misses, wall time...) for each regex. Reported in regular '
+                   'mode, and added to each object of the output file in batch mode.',
+              is_flag=True,
+              default=False)
 @click.option('--verbose', '-v',
               help='Enable or disable verbose messages to terminal. Defaults to False.',
               is_flag=True,
               default=False)
 def parse_input(input_file: str, output_file: str, regex: str, test_string: Tuple[str],
-                generate_tests: int, verbose: bool) -> None:
+                search_file: str, grep_file: str, line_numbers: bool, generate_tests: int,
+                benchmark: str, baseline: str, serve: str, connect: str, workers: int,
+                pattern_set: bool, engine: str, cache_dir: str, pattern_cache_size: int,
+                lazy_dfa_cache_size: int, stats: bool, verbose: bool) -> None:
     """
     parse_input
     Analyze program parameters, report any errors, and route to regular or batch mode as needed.
 
-    :param input_file: optional name of input file. Must be .json if included.
-    :param output_file: optional name of output file. Must be .json if included.
+    :param input_file: optional name of input file. Must be .json or .jsonl if included.
+    :param output_file: optional name of output file. Must be .json or .jsonl if included.
     :param regex: optional regex pattern.
     :param test_string: optional test string.
+    :param search_file: optional name of a text file to search with the regex.
+    :param grep_file: optional name of a file to grep with the regex.
+    :param line_numbers: True to report the line numbers of the accepted lines in grep mode.
     :param generate_tests: Number of tests to generate for the program (otherwise None).
+    :param benchmark: optional name of the output file for benchmark mode.
+    :param baseline: optional name of a benchmark results file to compare to.
+    :param serve: optional address for the match server (a Unix socket path or [host:]port).
+    :param connect: optional address of a match server to run the test strings on.
+    :param workers: The number of worker processes for batch mode.
+    :param pattern_set: True to run batch mode with one automaton for all the regexes.
+    :param engine: The name of the engine used to run the test strings (a MatchEngine value).
+    :param cache_dir: optional name of the directory of compiled automata.
+    :param pattern_cache_size: The maximum number of compiled regexes kept in memory.
+    :param lazy_dfa_cache_size: The memory limit (in KiB) of the cache of each lazy DFA.
+    :param stats: True to collect and report counters for each regex.
     :param verbose: True to display verbose messages to the terminal (otherwise False).
     """
 
     # Sets the logging mode based on the verbose flag.
     logging.basicConfig(stream=sys.stdout, level=logging.DEBUG if verbose else logging.INFO)
+    match_engine = MatchEngine(engine)
+    from patterncache import PATTERN_CACHE
+    PATTERN_CACHE.max_size = pattern_cache_size
+    PATTERN_CACHE.lazy_dfa_cache_size = lazy_dfa_cache_size * 1024
+    if cache_dir:
+        from automatoncache import AutomatonCache
+        PATTERN_CACHE.automaton_cache = AutomatonCache(cache_dir)
+
+    # The server only listens on (and the client only connects to) loopback addresses.
+    if serve or connect:
+        from matchserver import MatchServer
+        try:
+            MatchServer.parse_address(serve or connect)
+        except ValueError as error_message:
+            raise click.UsageError(f'Invalid server address: {error_message}')
 
     # If tests flag is enabled, generate positive and negative tests.
     if generate_tests:
-        test_mode(generate_tests)
-
-    # If an input and output files are specified, check for .json file type.
+        test_mode(generate_tests, match_engine)
+
+    # If a benchmark output file is specified, direct to benchmark mode.
+    elif benchmark:
+        if not benchmark.endswith('.json'):
+            raise click.UsageError('Benchmark output file must have JSON (.json) extension.')
+        benchmark_mode(benchmark, baseline)
+
+    # If a server address is specified, direct to server mode.
+    elif serve:
+        server_mode(serve, match_engine, workers)
+
+    # If regex and a file to grep are provided, direct to grep mode
+    # (with an optional .json or .jsonl output file).
+    elif regex and grep_file:
+        if output_file and not output_file.endswith(BATCH_FILE_EXTENSIONS):
+            raise click.UsageError('Output file must have JSON (.json) '
+                                   'or JSON Lines (.jsonl) extension.')
+        if output_file and line_numbers:
+            raise click.UsageError('Illegal usage: line-numbers is only for terminal output.')
+        grep_mode(regex, grep_file, match_engine, output_file, line_numbers)
+
+    # If an input and output files are specified, check for .json (or .jsonl) file type.
     # Direct to batch mode.
     elif input_file and output_file:
-        if not input_file.endswith('.json') or not output_file.endswith('.json'):
-            raise click.UsageError('Input file and output file must have JSON extension.')
-        batch_mode(input_file, output_file)
+        if (not input_file.endswith(BATCH_FILE_EXTENSIONS) or
+                not output_file.endswith(BATCH_FILE_EXTENSIONS)):
+            raise click.UsageError('Input file and output file must have JSON '
+                                   '(.json) or JSON Lines (.jsonl) extension.')
+        if pattern_set and stats:
+            raise click.UsageError('Illegal usage: stats are not collected for pattern-set.')
+        if connect and (pattern_set or workers > 1 or stats):
+            raise click.UsageError('Illegal usage: connect runs the test strings on the server '
+                                   '(without pattern-set, workers or stats).')
+        batch_mode(input_file, output_file, match_engine, workers, pattern_set, stats, connect)
 
     # If regex and test string are provided, direct to regular mode.
     elif regex and test_string:
-        regular_mode(regex, test_string)
+        if connect and stats:
+            raise click.UsageError('Illegal usage: stats are not collected with connect.')
+        regular_mode(regex, test_string, match_engine, stats, connect)
+
+    # If regex and a file to search are provided, direct to search mode.
+    elif regex and search_file:
+        search_mode(regex, search_file)
 
     # Error handling statements.
     # Checks for cases when user fails to provide both args for a given option (or no args).
     elif input_file or output_file:
         raise click.UsageError('Illegal usage: input AND output paths required.')
+    elif baseline:
+        raise click.UsageError('Illegal usage: baseline requires benchmark.')
+    elif search_file or grep_file:
+        raise click.UsageError('Illegal usage: regex AND search-file (or grep-file) required.')
     elif regex or test_string:
-        raise click.UsageError('Illegal usage: regex AND test-string required.')
+        raise click.UsageError('Illegal usage: regex AND test-string (or search-file) required.')
     else:
         raise click.UsageError('Illegal usage: must provide command line arguments.')
 
 
-def _run_all_test_strings_in_list(regex_result_list: List[RegexResult]) -> None:
+def _run_all_test_strings_in_list(regex_result_list: List['RegexResult'],
+                                  engine: MatchEngine) -> None:
     """
     _run_all_test_strings_in_list
     Helper method that runs all of the regular expression & test string pairs
     in a given list of RegexResult objects.
 
     :param regex_result_list: The list of RegexResult objects to go through.
+    :param engine: The engine used to run the test strings.
     """
 
+    from patterncache import PATTERN_CACHE
+
     # Run the test strings for each regex.
     for regular_expression in regex_result_list:
-        regular_expression.run_test_strings()
+        regular_expression.run_test_strings(engine)
+
+    logging.debug(str(PATTERN_CACHE))
+
+
+def _run_all_test_strings_in_stream(regex_results: Iterable['RegexResult'], engine: MatchEngine,
+                                    collect_stats: bool = False) -> Iterator['RegexResult']:
+    """
+    _run_all_test_strings_in_stream
+    Helper method that runs the test strings of each RegexResult as it is read,
+    and yields it so it can be written before the next one is read.
+
+    :param regex_results: The RegexResult objects to go through.
+    :param engine: The engine used to run the test strings.
+    :param collect_stats: True to collect counters for each RegexResult.
+    :return: An iterator of the RegexResult objects (with their test strings run).
+    """
+
+    for regular_expression in regex_results:
+        regular_expression.run_test_strings(engine, collect_stats)
+        yield regular_expression
+
+
+def _add_stats_in_stream(regex_results: Iterable['RegexResult'],
+                         total_stats: 'MatchStats') -> Iterator['RegexResult']:
+    """
+    _add_stats_in_stream
+    Helper method that adds the counters of each RegexResult to a total as it goes by.
 
+    :param regex_results: The RegexResult objects to go through (with their counters collected).
+    :param total_stats: The counters to add to.
+    :return: An iterator of the same RegexResult objects.
+    """
+
+    for regex_result in regex_results:
+        if regex_result.stats is not None:
+            total_stats.add(regex_result.stats)
+        yield regex_result
+
+
+def _run_all_test_strings_in_pattern_set(regex_results: Iterable['RegexResult'],
+                                         pattern_set: 'PatternSet') -> Iterator['RegexResult']:
+    """
+    _run_all_test_strings_in_pattern_set
+    Helper method that runs the test strings of each RegexResult through a PatternSet
+    containing its regex. Each distinct test string is only scanned once (for every regex),
+    as long as it is in the cache of recent results.
+
+    :param regex_results: The RegexResult objects to go through.
+    :param pattern_set: The PatternSet containing every regex of regex_results.
+    :return: An iterator of the RegexResult objects (with their test strings run).
+    """
 
-def test_mode(number_of_regex: int) -> None:
+    pattern_ids = {
+        regular_expression: pattern_id
+        for pattern_id, regular_expression in enumerate(pattern_set.regular_expressions)
+    }
+    matching_patterns = functools.lru_cache(maxsize=1 << 16)(pattern_set.matching_patterns)
+
+    for regex_result in regex_results:
+        pattern_id = pattern_ids[regex_result.regular_expression]
+        if not pattern_set.is_valid(pattern_id):
+            logging.critical('Error transforming the NFA!')
+        else:
+            for test_string in regex_result.test_strings_in_language:
+                regex_result.test_strings_in_language[test_string] = (
+                    pattern_id in matching_patterns(test_string)
+                )
+        yield regex_result
+
+
+def test_mode(number_of_regex: int, engine: MatchEngine) -> None:
     """
     generate_tests
     In this mode, the program creates an input tests file and executes batch mode on this file.
+
+    :param number_of_regex: The number of random regular expressions to create for the tests.
+    :param engine: The engine used to run the test strings.
     """
 
+    from testgenerator import TestGenerator
+    from testreader import TestReader
+    from testwriter import TestWriter
+
     # Create the test cases as a dictionary of strings (regex)
     # each mapping to a list of strings (test strings).
     test_generator = TestGenerator()
@@ -116,8 +356,8 @@ def test_mode(number_of_regex: int) -> None:
     negative_tests = test_reader.read_test_cases(negative_tests)
 
     # Run the test strings for the positive and negative tests.
-    _run_all_test_strings_in_list(positive_tests)
-    _run_all_test_strings_in_list(negative_tests)
+    _run_all_test_strings_in_list(positive_tests, engine)
+    _run_all_test_strings_in_list(negative_tests, engine)
 
     # Write the positive and negative tests.
     test_writer = TestWriter()
@@ -125,50 +365,251 @@ def test_mode(number_of_regex: int) -> None:
     test_writer.write_negative_tests(negative_tests)
 
 
-def regular_mode(regex: str, test_strings: Tuple[str]) -> None:
+def regular_mode(regex: str, test_strings: Tuple[str], engine: MatchEngine,
+                 collect_stats: bool = False, server_address: Optional[str] = None) -> None:
     """
     regular_mode
     Process regex and test strings in regular mode. Output results to terminal.
 
     :param regex: The input regex.
     :param test_strings: The input test strings.
+    :param engine: The engine used to run the test strings.
+    :param collect_stats: True to output the counters collected while running the test strings.
+    :param server_address: The address of a match server to run the test strings on
+                           (or None to run them in this process).
     """
 
+    from regexresult import RegexResult
+
     # Build the result of the regular expression
     regex_result = RegexResult(regex, {
         test_string: None for test_string in list(test_strings)
     })
 
     # Process the regex on the test string(s).
-    regex_result.run_test_strings()
+    if server_address:
+        from matchclient import MatchClient
+        list(MatchClient(server_address).run([regex_result]))
+    else:
+        regex_result.run_test_strings(engine, collect_stats)
 
     # output the result for each test string
     for test_string in test_strings:
         click.echo("'{}' accepted by regular expression '{}': {}"
                    .format(test_string, regex, regex_result.test_strings_in_language[test_string]))
 
+    if collect_stats:
+        click.echo('Stats: {}'.format(regex_result.stats))
+
 
-def batch_mode(input_file_path: str, output_file_path: str) -> None:
+def search_mode(regex: str, search_file_path: str) -> None:
+    """
+    search_mode
+    Find every match of the regex in a text file. Output the offsets of each match to terminal.
+
+    :param regex: The input regex.
+    :param search_file_path: The path of the text file to search.
+    """
+
+    from patterncache import PATTERN_CACHE
+
+    compiled_regex = PATTERN_CACHE.get(regex)
+    if compiled_regex is None:
+        logging.critical('Error transforming the NFA!')
+        return
+
+    # The file is searched in blocks, so it is never read into memory as a whole.
+    number_of_matches = 0
+    with open(search_file_path, 'r') as search_file:
+        blocks = iter(functools.partial(search_file.read, SEARCH_BLOCK_SIZE), '')
+        for start, end, match in compiled_regex.finditer_blocks(blocks):
+            number_of_matches += 1
+            click.echo('{}-{}: {!r}'.format(start, end, match))
+
+    logging.info(f'Found {number_of_matches} matches of regular expression {regex!r} '
+                 f'in {search_file_path}')
+
+
+def grep_mode(regex: str, grep_file_path: str, engine: MatchEngine,
+              output_file_path: Optional[str] = None, line_numbers: bool = False) -> None:
+    """
+    grep_mode
+    Find the lines of a file accepted by the regex.
+    Output the lines (or their line numbers) to terminal as they are found,
+    or write them (with their line numbers) to output_file_path as JSON.
+
+    :param regex: The input regex.
+    :param grep_file_path: The path of the file to grep (memory-mapped, not read into memory).
+    :param engine: The engine used to run the lines.
+    :param output_file_path: The output JSON file path (or None to output to terminal).
+    :param line_numbers: True to output the line numbers instead of the lines.
+    """
+
+    from filegrep import FileGrep
+    from jsonwriter import JsonWriter
+    from patterncache import PATTERN_CACHE
+
+    compiled_regex = PATTERN_CACHE.get(regex)
+    if compiled_regex is None:
+        logging.critical('Error transforming the NFA!')
+        return
+
+    matching_lines = FileGrep(compiled_regex, engine).matching_lines(grep_file_path)
+    if output_file_path:
+        JsonWriter().write_json_output_stream(
+            output_file_path, _group_lines_in_grep_results(regex, matching_lines)
+        )
+        logging.info('Grep mode completed on file ' + str(grep_file_path) +
+                     ' and output file ' + str(output_file_path))
+        return
+
+    # Lines are written as raw bytes, so they are never decoded.
+    output = sys.stdout.buffer
+    for line_number, line in matching_lines:
+        if line_numbers:
+            output.write(b'%d\n' % line_number)
+        else:
+            output.write(line)
+            output.write(b'\n')
+    output.flush()
+
+
+def _group_lines_in_grep_results(regex: str, matching_lines: Iterable[Tuple[int, memoryview]],
+                                 group_size: int = 1000) -> Iterator['GrepResult']:
+    """
+    _group_lines_in_grep_results
+    Helper method that groups accepted lines into GrepResult objects (of at most group_size
+    lines each), so they can be written by JsonWriter without holding every line in memory.
+
+    :param regex: The regular expression the lines were accepted by.
+    :param matching_lines: The accepted (line number, line) tuples.
+    :param group_size: The maximum number of lines in each GrepResult.
+    :return: An iterator of GrepResult objects with the line number and text of each line.
+    """
+
+    from filegrep import GrepResult
+
+    lines = []
+    for line_number, line in matching_lines:
+        lines.append((line_number, str(line, 'utf-8', 'replace')))
+        if len(lines) >= group_size:
+            yield GrepResult(regex, lines)
+            lines = []
+    if lines:
+        yield GrepResult(regex, lines)
+
+
+def benchmark_mode(output_file_path: str, baseline_file_path: Optional[str] = None) -> None:
+    """
+    benchmark_mode
+    Run the benchmarks, write the results to output_file_path,
+    and compare them to a baseline results file (if one is given).
+
+    :param output_file_path: The output JSON file path.
+    :param baseline_file_path: The path of a results file to compare to (or None).
+    """
+
+    from benchmark import Benchmark
+
+    benchmark = Benchmark()
+    benchmark.run()
+    benchmark.write_results(output_file_path)
+    logging.info(f'{len(benchmark.results)} benchmarks written to {output_file_path}')
+
+    if baseline_file_path:
+        benchmark.compare_to_baseline(baseline_file_path)
+
+
+def server_mode(address: str, engine: MatchEngine, number_of_workers: int = 1) -> None:
+    """
+    server_mode
+    Run a match server until it is interrupted. Compiled regexes stay in the pattern cache
+    across requests (and connections).
+
+    :param address: The address to listen on (a Unix socket path or [host:]port).
+    :param engine: The engine used to run the test strings.
+    :param number_of_workers: The number of worker processes (1 runs on a thread pool).
+    """
+
+    from asyncmatcher import AsyncMatcher
+    from matchserver import MatchServer
+
+    if number_of_workers == 1:
+        MatchServer(engine).run(address)
+        return
+
+    with AsyncMatcher.process_executor(number_of_workers) as executor:
+        MatchServer(engine, executor).run(address)
+
+
+def batch_mode(input_file_path: str, output_file_path: str, engine: MatchEngine,
+               number_of_workers: int = 1, use_pattern_set: bool = False,
+               collect_stats: bool = False, server_address: Optional[str] = None) -> None:
     """
     batch_mode
     Process regex and test strings in batch mode. Output results to output_file_path.
 
     :param input_file_path: The input JSON file path.
     :param output_file_path: The output JSON file path.
+    :param engine: The engine used to run the test strings.
+    :param number_of_workers: The number of worker processes (1 runs in this process).
+    :param use_pattern_set: True to combine every regex into one automaton (a PatternSet).
+    :param collect_stats: True to add the counters of each regex to its output object
+                          (not supported with use_pattern_set).
+    :param server_address: The address of a match server to run the test strings on
+                           (or None to run them in this process).
     """
 
-    # read the input file and get an object representation of it.
-    regex_result_list = JsonReader(input_file_path).regex_input_list
+    from jsonreader import JsonReader
+    from jsonwriter import JsonWriter
+    from matchstats import MatchStats
+    from patterncache import PATTERN_CACHE
+
+    # The input file is read, run and written one entry at a time.
+    # Results go to a temporary file that only replaces the output file if the input is valid.
+    json_reader = JsonReader(input_file_path)
+    if use_pattern_set:
+        from patternset import PatternSet
+        # A first pass over the input file collects the distinct regexes for the PatternSet.
+        regular_expressions = list(dict.fromkeys(
+            regex_result.regular_expression
+            for regex_result in JsonReader(input_file_path).read_regex_results()
+        ))
+        regex_results = _run_all_test_strings_in_pattern_set(
+            json_reader.read_regex_results(),
+            PatternSet(regular_expressions, PATTERN_CACHE.lazy_dfa_cache_size)
+        )
+    elif server_address:
+        from matchclient import MatchClient
+        regex_results = MatchClient(server_address).run(json_reader.read_regex_results())
+    elif number_of_workers > 1:
+        from parallelrunner import ParallelRunner
+        regex_results = ParallelRunner(number_of_workers, engine, collect_stats=collect_stats).run(
+            json_reader.read_regex_results()
+        )
+    else:
+        regex_results = _run_all_test_strings_in_stream(
+            json_reader.read_regex_results(), engine, collect_stats
+        )
+
+    total_stats = MatchStats()
+    if collect_stats:
+        regex_results = _add_stats_in_stream(regex_results, total_stats)
 
-    if not regex_result_list:
+    # The temporary file keeps the extension, since it selects the output format.
+    output_file_root, output_file_extension = os.path.splitext(output_file_path)
+    partial_output_file_path = output_file_root + '.partial' + output_file_extension
+    JsonWriter().write_json_output_stream(partial_output_file_path, regex_results)
+
+    if not json_reader.valid:
+        os.remove(partial_output_file_path)
         logging.critical(f'Batch mode failed: {input_file_path} in improper format.')
         return
 
-    # Run all test strings.
-    _run_all_test_strings_in_list(regex_result_list)
-
-    # Write results to the output_file_path
-    JsonWriter().write_json_output_file(output_file_path, regex_result_list)
+    os.replace(partial_output_file_path, output_file_path)
+    logging.debug(str(PATTERN_CACHE))
+    if collect_stats:
+        logging.info(f'Stats: {total_stats}')
 
     logging.info('Batch mode completed on input file ' + str(input_file_path) +
                  ' and output file ' + str(output_file_path))
@@ -0,0 +1,368 @@
+import logging
+
+from bitparallelmatcher import BitParallelMatcher
+from lazydfa import LazyDFA
+from literalprefilter import LiteralPrefilter
+from matchengine import MatchEngine
+from matchstats import MatchStats
+from nfa import NFA
+from patternanalysis import PatternAnalysis
+from regexnode import RegexNode
+from regexparser import RegexParser
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+
+# The DFA and the Searcher are only built by some engines and modes, so they are imported then.
+if TYPE_CHECKING:
+    from dfa import DFA
+    from searcher import Searcher
+
+
+class CompiledRegex:
+    """
+    CompiledRegex
+    Class that holds a regular expression compiled to an (usually epsilon-free) NFA,
+    along with the automata built from it for the other engines (built on first use).
+    """
+
+    def __init__(self, regular_expression: str, nfa: NFA, automaton_cache=None,
+                 parse_tree: Optional[RegexNode] = None,
+                 lazy_dfa_cache_size: int = LazyDFA.DEFAULT_MAX_CACHE_BYTES):
+        """
+        __init__
+        Creates a CompiledRegex object.
+
+        :param regular_expression: The regular expression that was compiled.
+        :param nfa: The NFA equivalent to the regular expression.
+        :param automaton_cache: The AutomatonCache to load automata from (and save them to),
+                                or None to always build them.
+        :param parse_tree: The parse tree the NFA was built from
+                           (or None to parse the regular expression when it is needed).
+        :param lazy_dfa_cache_size: The memory limit (in bytes) of the cache of each lazy DFA.
+        """
+
+        self.regular_expression = regular_expression
+        self.nfa = nfa
+        self.automaton_cache = automaton_cache
+        self.lazy_dfa_cache_size = lazy_dfa_cache_size
+        self._lazy_dfa: LazyDFA = None
+        self._dfa: Optional['DFA'] = None
+        self._dfa_built = False
+        self._parse_tree: RegexNode = parse_tree
+        self._parse_tree_built = parse_tree is not None
+        self._bit_parallel_matcher: BitParallelMatcher = None
+        self._bit_parallel_matcher_built = False
+        self._searcher: Optional['Searcher'] = None
+        self._prefilter: LiteralPrefilter = None
+        self._analysis: PatternAnalysis = None
+        self._prefilters_built = False
+
+    @property
+    def lazy_dfa(self) -> LazyDFA:
+        """
+        lazy_dfa
+        Returns the lazy DFA of the NFA (shared by every string run on this regex).
+
+        :return: The LazyDFA object.
+        """
+
+        if self._lazy_dfa is None:
+            self._lazy_dfa = LazyDFA(self.nfa, self.lazy_dfa_cache_size)
+        return self._lazy_dfa
+
+    @property
+    def dfa(self) -> Optional['DFA']:
+        """
+        dfa
+        Returns the minimized DFA of the NFA (built the first time it is needed).
+
+        :return: The DFA object (or None if the DFA is too large to build).
+        """
+
+        if not self._dfa_built and self.automaton_cache is not None:
+            self._dfa_built, self._dfa = self.automaton_cache.load_dfa(self.regular_expression)
+        if not self._dfa_built:
+            from dfa import DFA
+            self._dfa_built = True
+            try:
+                self._dfa = DFA(self.nfa)
+                logging.debug(f'DFA states: {self._dfa.nfa_state_count} (NFA), '
+                              f'{self._dfa.dfa_state_count} (DFA), '
+                              f'{self._dfa.minimized_state_count} (minimized DFA)')
+            except ValueError as error_message:
+                logging.info(f'Using the lazy DFA for {self.regular_expression!r}: '
+                             f'{error_message}')
+            if self.automaton_cache is not None:
+                self.automaton_cache.save_dfa(self.regular_expression, self._dfa)
+        return self._dfa
+
+    @property
+    def parse_tree(self) -> Optional[RegexNode]:
+        """
+        parse_tree
+        Returns the parse tree of the regular expression (parsed the first time it is needed).
+
+        :return: The root RegexNode of the parse tree (or None if it couldn't be parsed).
+        """
+
+        if not self._parse_tree_built:
+            self._parse_tree_built = True
+            self._parse_tree = RegexParser().parse(self.regular_expression)
+        return self._parse_tree
+
+    @property
+    def bit_parallel_matcher(self) -> Optional[BitParallelMatcher]:
+        """
+        bit_parallel_matcher
+        Returns the bit-parallel Glushkov matcher of the regular expression
+        (built the first time it is needed).
+
+        :return: The BitParallelMatcher object (or None if the positions don't fit in a word).
+        """
+
+        if not self._bit_parallel_matcher_built and self.automaton_cache is not None:
+            self._bit_parallel_matcher_built, self._bit_parallel_matcher = (
+                self.automaton_cache.load_bit_parallel_matcher(self.regular_expression)
+            )
+        if not self._bit_parallel_matcher_built:
+            self._bit_parallel_matcher_built = True
+            if self.parse_tree is not None:
+                self._bit_parallel_matcher = BitParallelMatcher.from_tree(self.parse_tree)
+                if self.automaton_cache is not None:
+                    self.automaton_cache.save_bit_parallel_matcher(
+                        self.regular_expression, self._bit_parallel_matcher
+                    )
+            if self._bit_parallel_matcher is None:
+                logging.debug('Bit-parallel matcher unavailable for: ' + self.regular_expression)
+        return self._bit_parallel_matcher
+
+    @property
+    def prefilter(self) -> Optional[LiteralPrefilter]:
+        """
+        prefilter
+        Returns the literal prefilter of the regular expression (built the first time it is needed).
+
+        :return: The LiteralPrefilter object (or None if the regex requires no literal).
+        """
+
+        if not self._prefilters_built:
+            self._build_prefilters()
+        return self._prefilter
+
+    @property
+    def analysis(self) -> Optional[PatternAnalysis]:
+        """
+        analysis
+        Returns the facts about the language of the regular expression
+        (found the first time they are needed).
+
+        :return: The PatternAnalysis object (or None if the regex couldn't be parsed).
+        """
+
+        if not self._prefilters_built:
+            self._build_prefilters()
+        return self._analysis
+
+    def _build_prefilters(self) -> None:
+        """
+        _build_prefilters
+        Loads the pattern analysis and the literal prefilter of the regular expression from the
+        automaton cache, or finds them from the parse tree (and saves them to the cache).
+        """
+
+        self._prefilters_built = True
+        if self.automaton_cache is not None:
+            cached, self._analysis, self._prefilter = (
+                self.automaton_cache.load_prefilters(self.regular_expression)
+            )
+            if cached:
+                return
+
+        if self.parse_tree is not None:
+            self._analysis = PatternAnalysis.from_tree(self.parse_tree)
+            self._prefilter = LiteralPrefilter.from_tree(self.parse_tree)
+            if self.automaton_cache is not None:
+                self.automaton_cache.save_prefilters(self.regular_expression, self._analysis,
+                                                     self._prefilter)
+
+    @property
+    def prefilters(self) -> Tuple[Union[PatternAnalysis, LiteralPrefilter], ...]:
+        """
+        prefilters
+        Returns the checks that decide test strings before the engine runs them,
+        cheapest first (the constant time facts, then the literals).
+
+        :return: A tuple of objects with a decide method (empty if there are none).
+        """
+
+        return tuple(
+            prefilter for prefilter in (self.analysis, self.prefilter) if prefilter is not None
+        )
+
+    @property
+    def searcher(self) -> 'Searcher':
+        """
+        searcher
+        Returns the searcher of the NFA, for unanchored search (built the first time it is needed).
+
+        :return: The Searcher object.
+        """
+
+        if self._searcher is None:
+            from searcher import Searcher
+            self._searcher = Searcher(self.nfa, self.lazy_dfa_cache_size)
+        return self._searcher
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """
+        search
+        Finds the first (leftmost-longest) substring of a text in the language of the regex.
+
+        :param text: The text to search.
+        :return: The (start, end) positions of the match (or None if there is no match).
+        """
+
+        return self.searcher.search(text)
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        finditer
+        Finds every (leftmost-longest, non overlapping) substring of a text
+        in the language of the regex, in linear time for the scan of the text.
+
+        :param text: The text to search.
+        :return: An iterator of the (start, end) positions of the matches, from left to right.
+        """
+
+        return self.searcher.finditer(text)
+
+    def finditer_blocks(self, blocks: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+        """
+        finditer_blocks
+        Finds every (leftmost-longest, non overlapping) substring in the language of the regex
+        of a text read in blocks (e.g. from a file), without keeping the whole text in memory.
+
+        :param blocks: The blocks of the text, in order.
+        :return: An iterator of the (start, end) positions of the matches in the whole text,
+                 with the text of each match, from left to right.
+        """
+
+        return self.searcher.finditer_blocks(blocks)
+
+    def matches(self, test_string: str, engine: MatchEngine = MatchEngine.AUTO) -> bool:
+        """
+        matches
+        Runs a test string through the regular expression with the given engine.
+
+        :param test_string: The string to run.
+        :param engine: The engine used to run the string.
+        :return: True if the string is in the language of the regular expression (otherwise False).
+        """
+
+        if engine in (MatchEngine.AUTO, MatchEngine.BIT_PARALLEL):
+            # Falls back to NFA simulation if the regex has too many positions.
+            if self.bit_parallel_matcher is not None:
+                return self.bit_parallel_matcher.run(test_string)
+        elif engine == MatchEngine.BACKTRACK:
+            return self.nfa.run_nfa(test_string, self.nfa.initial_state)
+        elif engine == MatchEngine.LAZY_DFA:
+            return self.lazy_dfa.run_dfa(test_string)
+        elif engine == MatchEngine.DFA:
+            # Falls back to the lazy DFA if the DFA is too large.
+            if self.dfa is not None:
+                return self.dfa.run_dfa(test_string)
+            return self.lazy_dfa.run_dfa(test_string)
+        return self.nfa.simulate_nfa(test_string)
+
+    def matches_with_stats(self, test_string: str, engine: MatchEngine,
+                           stats: MatchStats) -> bool:
+        """
+        matches_with_stats
+        Same as matches, but runs the instrumented version of the engine, which counts
+        the work done in stats. The backtracking and prefix-sharing engines aren't
+        instrumented, so their counters are those of NFA simulation.
+
+        :param test_string: The string to run.
+        :param engine: The engine used to run the string.
+        :param stats: The counters to add to.
+        :return: True if the string is in the language of the regular expression (otherwise False).
+        """
+
+        stats.strings += 1
+        stats.characters += len(test_string)
+
+        if engine in (MatchEngine.AUTO, MatchEngine.BIT_PARALLEL):
+            if self.bit_parallel_matcher is not None:
+                return self.bit_parallel_matcher.run_with_stats(test_string, stats)
+        elif engine == MatchEngine.LAZY_DFA:
+            return self.lazy_dfa.run_dfa_with_stats(test_string, stats)
+        elif engine == MatchEngine.DFA:
+            if self.dfa is not None:
+                return self.dfa.run_dfa_with_stats(test_string, stats)
+            return self.lazy_dfa.run_dfa_with_stats(test_string, stats)
+        return self.nfa.simulate_nfa_with_stats(test_string, stats)
+
+    def matches_with_prefix_sharing(self, test_strings: Iterable[str]) -> Dict[str, bool]:
+        """
+        matches_with_prefix_sharing
+        Runs many test strings through the regular expression, processing shared prefixes once.
+        The test strings are visited in sorted order (the depth-first order of their trie),
+        and the automaton state after each prefix of the previous string is kept,
+        so a string only runs the characters after its longest common prefix with the previous one.
+        Uses the bit-parallel matcher if available (otherwise NFA simulation).
+
+        :param test_strings: The strings to run.
+        :return: A dictionary mapping each test string to True if it is accepted (otherwise False).
+        """
+
+        bit_parallel_matcher = self.bit_parallel_matcher
+        if bit_parallel_matcher is not None:
+            step, is_accepting = bit_parallel_matcher.step, bit_parallel_matcher.is_accepting
+            initial_state, dead_state = 1, 0
+        else:
+            step, is_accepting = self.nfa.step_states, self.nfa.any_accepting
+            initial_state, dead_state = self.nfa.initial_states(), frozenset()
+
+        results = {}
+
+        # prefix_states[i] is the state after the first i characters of previous_string
+        # (the list stops early if the dead state is reached).
+        prefix_states = [initial_state]
+        previous_string = ''
+        for test_string in sorted(test_strings):
+            shared_length = min(
+                self._common_prefix_length(previous_string, test_string), len(prefix_states) - 1
+            )
+            del prefix_states[shared_length + 1:]
+
+            state = prefix_states[-1]
+            for char in test_string[shared_length:]:
+                if state == dead_state:
+                    break
+                state = step(state, char)
+                prefix_states.append(state)
+
+            results[test_string] = state != dead_state and is_accepting(state)
+            previous_string = test_string
+
+        return results
+
+    @staticmethod
+    def _common_prefix_length(string_1: str, string_2: str) -> int:
+        """
+        _common_prefix_length
+        Finds the length of the longest common prefix of two strings
+        (binary search on slice comparisons, so it runs at C speed).
+
+        :param string_1: The first string.
+        :param string_2: The second string.
+        :return: The length of the longest common prefix.
+        """
+
+        low, high = 0, min(len(string_1), len(string_2))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if string_1[:middle] == string_2[:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
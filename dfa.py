@@ -0,0 +1,267 @@
+from alphabet import Alphabet
+from array import array
+from matchstats import MatchStats
+from nfa import NFA
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+
+class DFA:
+    """
+    DFA
+    Class to define a minimized DFA built ahead of time from an NFA.
+    Transitions are stored in a dense integer table (states x alphabet classes)
+    and the accepting states are stored in a bitmap.
+    """
+
+    # Subset construction can build exponentially many states (e.g. for (a|b)*a(a|b)(a|b)...),
+    # so it stops once the DFA has more states, or more table entries (states x classes).
+    MAX_STATES = 10000
+    MAX_TABLE_ENTRIES = 1 << 20
+
+    def __init__(self, nfa: NFA):
+        """
+        __init__
+        Creates a DFA object by determinizing the NFA and minimizing the result.
+        Raises a ValueError if the DFA would have more than MAX_STATES states
+        or MAX_TABLE_ENTRIES table entries.
+
+        :param nfa: The NFA to build the DFA from.
+        """
+
+        # Every class of the alphabet of the NFA is a column of the table (class c is column c - 1).
+        self.alphabet = nfa.alphabet
+        self.number_of_classes = nfa.alphabet.number_of_classes
+
+        state_sets, transitions = self._determinize(nfa)
+        accepting = [
+            any(nfa.is_accepting(state) for state in state_set) for state_set in state_sets
+        ]
+
+        # State counts before and after minimization.
+        self.nfa_state_count = len(frozenset().union(*state_sets))
+        self.dfa_state_count = len(state_sets)
+
+        blocks = self._minimize(transitions, accepting)
+        self.minimized_state_count = len(blocks)
+
+        self.initial_state = 0
+        self.dead_state = 0
+        self.transition_table = array('i')
+        self.accepting_states = 0
+        self._build_table(blocks, transitions, accepting)
+
+    @staticmethod
+    def from_tables(alphabet: Alphabet, transition_table: Sequence[int],
+                    accepting_states: int, initial_state: int, dead_state: int,
+                    state_counts: Tuple[int, int, int]) -> 'DFA':
+        """
+        from_tables
+        Creates a DFA from the tables of an existing one (e.g. loaded from disk),
+        without determinizing or minimizing anything.
+
+        :param alphabet: The alphabet (class c is column c - 1 of the transition table).
+        :param transition_table: The dense transition table (states x alphabet classes).
+        :param accepting_states: The bitmap of accepting states.
+        :param initial_state: The initial state.
+        :param dead_state: The dead state.
+        :param state_counts: The NFA, DFA and minimized DFA state counts.
+        :return: The DFA object.
+        """
+
+        dfa = DFA.__new__(DFA)
+        dfa.alphabet = alphabet
+        dfa.number_of_classes = alphabet.number_of_classes
+        dfa.nfa_state_count, dfa.dfa_state_count, dfa.minimized_state_count = state_counts
+        dfa.initial_state = initial_state
+        dfa.dead_state = dead_state
+        dfa.transition_table = transition_table
+        dfa.accepting_states = accepting_states
+        return dfa
+
+    def _determinize(self, nfa: NFA) -> (List[FrozenSet[int]], List[List[int]]):
+        """
+        _determinize
+        Subset construction: builds a complete DFA (including a dead state) from the NFA.
+        DFA state 0 is the initial state and DFA state 1 is the dead state.
+
+        :param nfa: The NFA to determinize.
+        :return: The list of NFA state sets and the transitions of each DFA state.
+        """
+
+        max_states = min(self.MAX_STATES, self.MAX_TABLE_ENTRIES // max(self.number_of_classes, 1))
+
+        initial_state_set = frozenset(nfa.epsilon_closure([nfa.initial_state]))
+        state_sets: List[FrozenSet[int]] = [initial_state_set, frozenset()]
+        state_ids: Dict[FrozenSet[int], int] = {initial_state_set: 0, frozenset(): 1}
+        transitions: List[List[int]] = []
+
+        # States are numbered in the order they are discovered, so this is a breadth-first search.
+        state_id = 0
+        while state_id < len(state_sets):
+            row = []
+            for symbol_class in range(1, self.number_of_classes + 1):
+                next_state_set = frozenset(nfa.epsilon_closure(
+                    destination
+                    for state in state_sets[state_id]
+                    for destination in nfa.class_destinations(state, symbol_class)
+                ))
+                if next_state_set not in state_ids:
+                    if len(state_sets) >= max_states:
+                        raise ValueError(f'DFA has more than {max_states} states '
+                                         f'({self.number_of_classes} classes)')
+                    state_ids[next_state_set] = len(state_sets)
+                    state_sets.append(next_state_set)
+                row.append(state_ids[next_state_set])
+            transitions.append(row)
+            state_id += 1
+
+        return state_sets, transitions
+
+    def _minimize(self, transitions: List[List[int]], accepting: List[bool]) -> List[List[int]]:
+        """
+        _minimize
+        Hopcroft's algorithm: partitions the DFA states into blocks of equivalent states.
+
+        :param transitions: The transitions of each DFA state.
+        :param accepting: Whether each DFA state is accepting.
+        :return: The blocks of equivalent DFA states.
+        """
+
+        number_of_states = len(transitions)
+
+        # inverse[class_id][state] = the states that transition to state on class_id.
+        inverse = [[[] for _ in range(number_of_states)] for _ in range(self.number_of_classes)]
+        for state, row in enumerate(transitions):
+            for class_id, destination in enumerate(row):
+                inverse[class_id][destination].append(state)
+
+        blocks = [
+            block for block in (
+                [state for state in range(number_of_states) if accepting[state]],
+                [state for state in range(number_of_states) if not accepting[state]]
+            ) if block
+        ]
+        block_of = [0] * number_of_states
+        for block_id, block in enumerate(blocks):
+            for state in block:
+                block_of[state] = block_id
+
+        worklist = list(range(len(blocks)))
+        in_worklist = [True] * len(blocks)
+
+        while worklist:
+            splitter_id = worklist.pop()
+            in_worklist[splitter_id] = False
+            splitter = list(blocks[splitter_id])
+
+            for class_id in range(self.number_of_classes):
+                # Group the predecessors of the splitter by the block they are in.
+                predecessors: Dict[int, List[int]] = {}
+                for state in splitter:
+                    for predecessor in inverse[class_id][state]:
+                        predecessors.setdefault(block_of[predecessor], []).append(predecessor)
+
+                for block_id, block_predecessors in predecessors.items():
+                    block = blocks[block_id]
+                    if len(block_predecessors) == len(block):
+                        continue
+
+                    # Split the block into the predecessors and the rest.
+                    predecessor_set = set(block_predecessors)
+                    blocks[block_id] = [state for state in block if state not in predecessor_set]
+                    new_block_id = len(blocks)
+                    blocks.append(block_predecessors)
+                    in_worklist.append(False)
+                    for state in block_predecessors:
+                        block_of[state] = new_block_id
+
+                    # Only the smaller half is needed, unless the block is already waiting.
+                    if in_worklist[block_id] or len(block_predecessors) <= len(blocks[block_id]):
+                        worklist.append(new_block_id)
+                        in_worklist[new_block_id] = True
+                    else:
+                        worklist.append(block_id)
+                        in_worklist[block_id] = True
+
+        return blocks
+
+    def _build_table(self, blocks: List[List[int]], transitions: List[List[int]],
+                     accepting: List[bool]) -> None:
+        """
+        _build_table
+        Builds the dense transition table and accepting bitmap of the minimized DFA.
+
+        :param blocks: The blocks of equivalent DFA states (the minimized states).
+        :param transitions: The transitions of each (unminimized) DFA state.
+        :param accepting: Whether each (unminimized) DFA state is accepting.
+        """
+
+        # Number the blocks so the block of the initial DFA state (0) becomes state 0.
+        blocks.sort(key=min)
+        block_of = [0] * len(transitions)
+        for block_id, block in enumerate(blocks):
+            for state in block:
+                block_of[state] = block_id
+
+        self.initial_state = block_of[0]
+        self.dead_state = block_of[1]
+        for block_id, block in enumerate(blocks):
+            representative = block[0]
+            self.transition_table.extend(
+                block_of[destination] for destination in transitions[representative]
+            )
+            if accepting[representative]:
+                self.accepting_states |= 1 << block_id
+
+    def run_dfa(self, input_string: str) -> bool:
+        """
+        run_dfa
+        Run a string through the DFA (one table lookup per character).
+
+        :param input_string: The string to run.
+        :return: True if string was accepted. False otherwise.
+        """
+
+        char_classes = self.alphabet.char_classes
+        transition_table = self.transition_table
+        number_of_classes = self.number_of_classes
+        dead_state = self.dead_state
+        state = self.initial_state
+
+        for char in input_string:
+            class_id = char_classes.get(char)
+            if class_id is None:
+                class_id = self.alphabet.class_of(char)
+                if class_id is None:
+                    return False
+            state = transition_table[state * number_of_classes + class_id - 1]
+            if state == dead_state:
+                return False
+
+        return bool(self.accepting_states >> state & 1)
+
+    def run_dfa_with_stats(self, input_string: str, stats: MatchStats) -> bool:
+        """
+        run_dfa_with_stats
+        Same as run_dfa, but counts the work done in stats.
+
+        :param input_string: The string to run.
+        :param stats: The counters to add to.
+        :return: True if string was accepted. False otherwise.
+        """
+
+        state = self.initial_state
+        stats.states_visited += 1
+        stats.peak_active_states = max(stats.peak_active_states, 1)
+
+        for char in input_string:
+            class_id = self.alphabet.class_of(char)
+            if class_id is None:
+                return False
+            state = self.transition_table[state * self.number_of_classes + class_id - 1]
+            stats.transitions_taken += 1
+            if state == self.dead_state:
+                return False
+            stats.states_visited += 1
+
+        return bool(self.accepting_states >> state & 1)
@@ -0,0 +1,123 @@
+import mmap
+import os
+
+from compiledregex import CompiledRegex
+from matchengine import MatchEngine
+from typing import Dict, Iterator, List, Tuple, Union
+
+
+class FileGrep:
+    """
+    FileGrep
+    Class that finds the lines of a file accepted by a regular expression (like grep -x).
+    The file is memory-mapped and each line is run as a zero-copy slice of the mapping,
+    so the file is never read into Python strings or split into a list.
+    """
+
+    def __init__(self, compiled_regex: CompiledRegex, engine: MatchEngine = MatchEngine.AUTO):
+        """
+        __init__
+        Creates a FileGrep object.
+
+        :param compiled_regex: The compiled regular expression to run the lines through.
+        :param engine: The engine used to run the lines.
+        """
+
+        self.compiled_regex = compiled_regex
+        self.engine = engine
+
+        # Bytes can be run directly if every character of the regex is a single byte in UTF-8.
+        self.matches_bytes = compiled_regex.nfa.alphabet.max_code_point() < 128
+
+    def matches(self, line: memoryview) -> bool:
+        """
+        matches
+        Runs a line (without its line terminator) through the regular expression.
+
+        :param line: The line, as a slice of the mapped file.
+        :return: True if the line is accepted (otherwise False).
+        """
+
+        if not self.matches_bytes:
+            return self.compiled_regex.matches(str(line, 'utf-8', 'replace'), self.engine)
+
+        # The bit-parallel matcher and the lazy DFA run the bytes of the line in place.
+        if self.engine in (MatchEngine.AUTO, MatchEngine.BIT_PARALLEL):
+            bit_parallel_matcher = self.compiled_regex.bit_parallel_matcher
+            if bit_parallel_matcher is not None:
+                return bit_parallel_matcher.run_bytes(line)
+            if self.engine == MatchEngine.AUTO:
+                return self.compiled_regex.lazy_dfa.run_dfa_bytes(line)
+        elif self.engine == MatchEngine.LAZY_DFA:
+            return self.compiled_regex.lazy_dfa.run_dfa_bytes(line)
+        return self.compiled_regex.matches(str(line, 'latin-1'), self.engine)
+
+    def matching_lines(self, file_path: str) -> Iterator[Tuple[int, memoryview]]:
+        """
+        matching_lines
+        Finds the lines of a file accepted by the regular expression.
+        Lines end with \\n (a \\r before it is not part of the line).
+        A yielded slice is only valid until the next line is requested.
+
+        :param file_path: The path of the file to search.
+        :return: An iterator of (line number, line) tuples (line numbers start at 1).
+        """
+
+        with open(file_path, 'rb') as file:
+            # An empty file can't be memory-mapped (and has no lines).
+            if not os.fstat(file.fileno()).st_size:
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                with memoryview(mapped_file) as file_view:
+                    line_number = 0
+                    line_start = 0
+                    file_size = len(mapped_file)
+
+                    while line_start < file_size:
+                        line_end = mapped_file.find(b'\n', line_start)
+                        next_line_start = line_end + 1
+                        if line_end == -1:
+                            line_end = next_line_start = file_size
+                        if line_end > line_start and mapped_file[line_end - 1] == ord('\r'):
+                            line_end -= 1
+
+                        line_number += 1
+                        with file_view[line_start:line_end] as line:
+                            if self.matches(line):
+                                yield line_number, line
+                        line_start = next_line_start
+
+
+class GrepResult:
+    """
+    GrepResult
+    This class defines a group of the lines of a file accepted by a regular expression.
+    Lines are stored in a list of (line number, line) tuples, so duplicate lines are all kept.
+    """
+
+    def __init__(self, regular_expression: str, lines: List[Tuple[int, str]]):
+        """
+        __init__
+        Creates a GrepResult object.
+
+        :param regular_expression: The regular expression (a string).
+        :param lines: The accepted (line number, line) tuples, in file order.
+        """
+
+        self.regular_expression = regular_expression
+        self.lines = lines
+
+    def convert_regex_result_to_json(self) -> Dict[str, Union[str, List[dict]]]:
+        """
+        convert_regex_result_to_json
+        Returns a dictionary representing a JSON object (written by JsonWriter like a RegexResult).
+
+        :return: A dictionary that represents the JSON to write.
+        """
+
+        return {
+            "regex": self.regular_expression,
+            "lines": [{"line_number": line_number, "line": line}
+                      for line_number, line in self.lines]
+        }
@@ -1,18 +1,33 @@
-import glob
 import json
 import jsonschema
 import logging
+import os
 
 from regexresult import RegexResult
-from typing import List
+from typing import Iterator, Optional, TextIO
 
 
 class JsonReader:
     """
     JsonReader
-    Converts an input json file into a list of RegexResult objects.
+    Converts an input json file (a JSON array, or JSON Lines if the extension is .jsonl)
+    into RegexResult objects.
+    The file is read incrementally, one {regex, strings} entry at a time,
+    so memory use doesn't grow with the size of the file.
     """
 
+    JSON_LINES_EXTENSION = '.jsonl'
+
+    # Number of characters read from the input file at a time.
+    CHUNK_SIZE = 1 << 16
+
+    # The JSON schema of the input file is next to this module.
+    SCHEMA_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'batch_input_format.schema.json')
+
+    # Validator for a single entry, created the first time it is needed (shared by every reader).
+    _entry_validator: Optional[jsonschema.protocols.Validator] = None
+
     def __init__(self, input_file: str):
         """
         __init__
@@ -21,56 +36,155 @@ class JsonReader:
         :param input_file: The path to the JSON input file.
         """
 
-        # Checks if the JSON file is valid (against a JSON schema).
-        if self._valid_json_input_file(input_file):
-            self.regex_input_list = self._read_json_input_file(input_file)
-        else:
-            self.regex_input_list = []
+        self.input_file = input_file
 
-    def _valid_json_input_file(self, input_file_path: str) -> bool:
+        # Set to False if an entry (or the file itself) is not valid against the JSON schema.
+        self.valid = True
+
+    @classmethod
+    def entry_validator(cls) -> jsonschema.protocols.Validator:
         """
-        _valid_json_input_file
-        Checks if the JSON input file is valid (against a JSON schema file).
+        entry_validator
+        Returns the validator for a single entry of the input file (from the JSON schema file).
+        The schema is only loaded, checked and compiled into a validator once.
 
-        :param input_file_path: The path to the input JSON file.
-        :return: True if JSON input file is valid (False otherwise).
+        :return: The validator for the items of the input JSON array.
         """
 
-        # Recursively find the input schema file
-        # (deals with different execution points for the program).
-        schema_filename = list(glob.iglob('**/batch_input_format.schema.json', recursive=True))[0]
-        with open(input_file_path, 'r') as regex_file:
-            # Load the input file to validate against.
-            regex_json: List[dict] = json.load(regex_file)
-            with open(schema_filename, 'r') as schema_file:
+        if cls._entry_validator is None:
+            with open(cls.SCHEMA_FILE_PATH, 'r') as schema_file:
                 # Load the JSON schema file.
                 input_json_schema = json.load(schema_file)
 
-                # Validate the input JSON file against the schema.
-                try:
-                    jsonschema.validate(regex_json, input_json_schema)
-                    return True
-                except jsonschema.ValidationError as error_message:
-                    logging.critical(error_message)
-                    return False
+            validator_class = jsonschema.validators.validator_for(input_json_schema)
+            validator_class.check_schema(input_json_schema)
+            cls._entry_validator = validator_class(input_json_schema['items'])
+        return cls._entry_validator
 
-    def _read_json_input_file(self, input_file_path: str) -> List[RegexResult]:
+    def read_regex_results(self) -> Iterator[RegexResult]:
         """
-        _read_json_input_file
-        Reads the JSON input file and converts it to a RegexResult list.
+        read_regex_results
+        Reads the JSON input file and yields a RegexResult object for each entry.
+        Each entry is validated against the JSON schema before it is yielded.
+        Stops (and sets self.valid to False) at the first invalid entry.
 
-        :param input_file_path:
-        :return: A list of RegexResult objects that serve as inputs.
+        :return: An iterator of RegexResult objects that serve as inputs.
         """
 
-        # Read the input regex file.
-        with open(input_file_path, 'r') as regex_file:
-            regex_json: List[dict] = json.load(regex_file)
-
-            # Uses list comprehension to return a list of RegexResult objects.
-            return [
-                RegexResult(x['regex'], {
-                    test_string: None for test_string in x['strings']
-                })
-                for x in regex_json
-            ]
+        entry_validator = self.entry_validator()
+        number_of_entries = 0
+
+        with open(self.input_file, 'r') as regex_file:
+            if self.input_file.endswith(self.JSON_LINES_EXTENSION):
+                entries = self._iterate_json_lines(regex_file)
+            else:
+                entries = self._iterate_json_array(regex_file)
+
+            try:
+                for entry in entries:
+                    # Validate the entry against the schema.
+                    entry_validator.validate(entry)
+                    number_of_entries += 1
+                    yield RegexResult(entry['regex'], {
+                        test_string: None for test_string in entry['strings']
+                    })
+            except (ValueError, jsonschema.ValidationError) as error_message:
+                logging.critical(error_message)
+                self.valid = False
+                return
+
+        # The schema requires at least one entry.
+        if not number_of_entries:
+            logging.critical(f'{self.input_file} has no entries')
+            self.valid = False
+
+    def _iterate_json_lines(self, json_lines_file: TextIO) -> Iterator[object]:
+        """
+        _iterate_json_lines
+        Parses a JSON Lines file (one JSON value per line) and yields its values.
+        Blank lines are skipped.
+
+        :param json_lines_file: The open JSON Lines file.
+        :return: An iterator of the decoded values.
+        """
+
+        for line_number, line in enumerate(json_lines_file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise ValueError(f'Line {line_number}: {error}')
+
+    def _iterate_json_array(self, json_file: TextIO) -> Iterator[object]:
+        """
+        _iterate_json_array
+        Incrementally parses a file containing a JSON array and yields its elements.
+        Only the element being parsed is kept in memory.
+
+        :param json_file: The open JSON file.
+        :return: An iterator of the decoded elements of the array.
+        """
+
+        decoder = json.JSONDecoder()
+        buffer = ''
+        position = 0
+        end_of_file = False
+
+        def read_more() -> bool:
+            """
+            read_more
+            Drops the parsed part of the buffer and reads more of the file into it.
+            Reads at least as much as is already buffered, so a large element is read in
+            a logarithmic number of attempts.
+
+            :return: True if more characters were read (otherwise False).
+            """
+
+            nonlocal buffer, position, end_of_file
+            chunk = json_file.read(max(self.CHUNK_SIZE, len(buffer) - position))
+            buffer = buffer[position:] + chunk
+            position = 0
+            end_of_file = not chunk
+            return bool(chunk)
+
+        def next_character() -> str:
+            """
+            next_character
+            Skips whitespace and returns the next character (without consuming it).
+
+            :return: The next non whitespace character (or '' at the end of the file).
+            """
+
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer) or not read_more():
+                    return buffer[position] if position < len(buffer) else ''
+
+        if next_character() != '[':
+            raise ValueError('Input file must contain a JSON array')
+        position += 1
+
+        first_element = True
+        while True:
+            char = next_character()
+            if char == ']':
+                return
+            if not first_element:
+                if char != ',':
+                    raise ValueError(f'Expected , or ] in JSON array, found {char!r}')
+                position += 1
+                next_character()
+            first_element = False
+
+            # Decode the next element, reading more of the file until it is complete.
+            while True:
+                try:
+                    element, position = decoder.raw_decode(buffer, position)
+                    break
+                except json.JSONDecodeError:
+                    if end_of_file or not read_more():
+                        raise
+            yield element
@@ -1,15 +1,18 @@
 import json
 
 from regexresult import RegexResult
-from typing import List
+from typing import Iterable, List
 
 
 class JsonWriter:
     """
     JsonWriter
-    Writes a list of RegexResult objects to an output file path (JSON output file).
+    Writes RegexResult objects (or GrepResult objects) to an output file path
+    (JSON output file, or JSON Lines if the extension is .jsonl).
     """
 
+    JSON_LINES_EXTENSION = '.jsonl'
+
     def write_json_output_file(self, output_file_path: str,
                                regex_result_list: List[RegexResult]) -> None:
         """
@@ -20,11 +23,48 @@ class JsonWriter:
         :param regex_result_list: The list of RegexResult objects to write to the file.
         """
 
-        json_list = [
-            regex_result.convert_regex_result_to_json()
-            for regex_result in regex_result_list
-        ]
+        self.write_json_output_stream(output_file_path, regex_result_list)
+
+    def write_json_output_stream(self, output_file_path: str,
+                                 regex_results: Iterable[RegexResult]) -> None:
+        """
+        write_json_output_stream
+        Writes RegexResult objects to the output path as they are produced
+        (only one of them is held in memory at a time).
+        The file is formatted the same as json.dump(..., indent=4) of the whole list
+        (or with one object per line for a JSON Lines file).
+
+        :param output_file_path: The output file path (a JSON or JSON Lines file).
+        :param regex_results: The RegexResult objects to write to the file.
+        """
+
+        if output_file_path.endswith(self.JSON_LINES_EXTENSION):
+            self._write_json_lines_output_stream(output_file_path, regex_results)
+            return
+
+        with open(output_file_path, 'w') as file:
+            separator = '[\n'
+            for regex_result in regex_results:
+                file.write(separator)
+                separator = ',\n'
+
+                # Indent the object by one level, since it is inside the list.
+                json_object = json.dumps(regex_result.convert_regex_result_to_json(), indent=4)
+                file.write('    ' + json_object.replace('\n', '\n    '))
+
+            # An empty list is written as [] (like json.dump).
+            file.write('[]' if separator == '[\n' else '\n]')
+
+    def _write_json_lines_output_stream(self, output_file_path: str,
+                                        regex_results: Iterable[RegexResult]) -> None:
+        """
+        _write_json_lines_output_stream
+        Writes RegexResult objects to the output path, one JSON object per line.
+
+        :param output_file_path: The output file path (a JSON Lines file).
+        :param regex_results: The RegexResult objects to write to the file.
+        """
 
-        # Write the list of dictionaries to the JSON file.
         with open(output_file_path, 'w') as file:
-            json.dump(json_list, file, indent=4)
+            for regex_result in regex_results:
+                file.write(json.dumps(regex_result.convert_regex_result_to_json()) + '\n')
@@ -0,0 +1,392 @@
+import logging
+import sys
+
+from matchstats import MatchStats
+from nfa import NFA
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+class LazyDFA:
+    """
+    LazyDFA
+    Class that builds a DFA from an NFA on the fly (subset construction) while strings are run.
+    Discovered DFA states and transitions are cached, up to a bounded amount of memory.
+    Each cached DFA state has a table of its transitions indexed by alphabet class, so a new
+    character of a known class only costs a lookup (e.g. each letter of [a-z]), and the table
+    never grows with the number of distinct characters in the input.
+    """
+
+    # The ID of the DFA state with no NFA states in it (no string can be accepted from it).
+    DEAD_STATE = -1
+
+    # The transition table column of the characters in no class of the alphabet
+    # (the NFA keeps class 0 for epsilon, which is never an input character).
+    NO_CLASS = 0
+
+    # The default memory limit of the cache (in bytes).
+    DEFAULT_MAX_CACHE_BYTES = 4 * 1024 * 1024
+
+    # Estimated memory of a cached DFA state besides its set of NFA states and transition table
+    # (its entry in the state ID dictionary and its slots in the lists).
+    STATE_ENTRY_BYTES = 128
+
+    def __init__(self, nfa: NFA, max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+                 max_thrashing_flushes: int = 3, unanchored: bool = False):
+        """
+        __init__
+        Creates a LazyDFA object from an existing NFA.
+
+        :param nfa: The NFA to build the DFA from.
+        :param max_cache_bytes: The memory limit (in bytes) of the cached DFA states,
+                                before the cache is flushed.
+        :param max_thrashing_flushes: The number of flushes (that happen too quickly after
+                                      the previous flush) before falling back to NFA simulation.
+        :param unanchored: True to restart the NFA at every position
+                           (so a DFA state accepts if any suffix of the input so far is accepted).
+        """
+
+        self.nfa = nfa
+        self.unanchored = unanchored
+        self.max_cache_bytes = max_cache_bytes
+        self.max_thrashing_flushes = max_thrashing_flushes
+
+        # Statistics about the cache (useful to tune max_cache_bytes).
+        self.cache_flushes = 0
+        self.thrashing_flushes = 0
+        self.fallback_to_nfa = False
+        self._characters_since_flush = 0
+        self._cache_bytes = 0
+
+        # DFA state i is the set of NFA states self._state_sets[i].
+        # self._class_transitions[i][c] is the DFA state reached from it on class c
+        # (or None if it has not been computed yet).
+        self._state_ids: Dict[FrozenSet[int], int] = {}
+        self._state_sets: List[FrozenSet[int]] = []
+        self._class_transitions: List[List[Optional[int]]] = []
+        self._accepting: List[bool] = []
+
+        # The class of each byte, for run_dfa_bytes (built the first time it is needed).
+        self._byte_classes: Optional[List[int]] = None
+
+        self._initial_state_set = frozenset(nfa.epsilon_closure([nfa.initial_state]))
+        self._initial_state = self._add_state(self._initial_state_set)
+
+    def _add_state(self, state_set: FrozenSet[int]) -> int:
+        """
+        _add_state
+        Adds a set of NFA states to the cache as a new DFA state.
+
+        :param state_set: The (epsilon closed) set of NFA states.
+        :return: The ID of the new DFA state.
+        """
+
+        state_id = len(self._state_sets)
+        transitions: List[Optional[int]] = [None] * self.nfa.number_of_symbols
+        self._state_ids[state_set] = state_id
+        self._state_sets.append(state_set)
+        self._class_transitions.append(transitions)
+        self._accepting.append(any(self.nfa.is_accepting(state) for state in state_set))
+        self._cache_bytes += self._state_bytes(state_set, transitions)
+        return state_id
+
+    def _state_bytes(self, state_set: FrozenSet[int], transitions: List[Optional[int]]) -> int:
+        """
+        _state_bytes
+        Estimates the memory of a cached DFA state.
+
+        :param state_set: The set of NFA states of the DFA state.
+        :param transitions: The transition table of the DFA state.
+        :return: The estimated memory (in bytes).
+        """
+
+        return sys.getsizeof(state_set) + sys.getsizeof(transitions) + self.STATE_ENTRY_BYTES
+
+    def _flush_cache(self) -> None:
+        """
+        _flush_cache
+        Removes every cached DFA state except the initial one.
+        Falls back to NFA simulation if the cache keeps filling up too quickly.
+        """
+
+        self.cache_flushes += 1
+        if self._characters_since_flush < 10 * len(self._state_sets):
+            self.thrashing_flushes += 1
+            if self.thrashing_flushes >= self.max_thrashing_flushes:
+                logging.debug('Lazy DFA cache is thrashing, falling back to NFA simulation')
+                self.fallback_to_nfa = True
+        self._characters_since_flush = 0
+
+        # Clear in place, since run_dfa holds references to these lists.
+        self._state_ids.clear()
+        self._state_sets.clear()
+        self._class_transitions.clear()
+        self._accepting.clear()
+        self._cache_bytes = 0
+        self._initial_state = self._add_state(self._initial_state_set)
+
+    def _class_of(self, char: str) -> int:
+        """
+        _class_of
+        Returns the transition table column of a character.
+
+        :param char: The input character.
+        :return: The alphabet class of the character (or LazyDFA.NO_CLASS if it is in no class).
+        """
+
+        symbol_class = self.nfa.alphabet.class_of(char)
+        return self.NO_CLASS if symbol_class is None else symbol_class
+
+    def _compute_transition(self, state_id: int, symbol_class: int) -> int:
+        """
+        _compute_transition
+        Computes (and caches) the DFA state reached from a DFA state on a class of characters.
+
+        :param state_id: The DFA state to transition from.
+        :param symbol_class: The alphabet class of the input character (or LazyDFA.NO_CLASS).
+        :return: The ID of the resulting DFA state (or LazyDFA.DEAD_STATE).
+        """
+
+        # Characters in no class of the alphabet have no NFA transitions.
+        next_states = [] if symbol_class == self.NO_CLASS else [
+            destination
+            for state in self._state_sets[state_id]
+            for destination in self.nfa.class_destinations(state, symbol_class)
+        ]
+
+        if not next_states and not self.unanchored:
+            self._class_transitions[state_id][symbol_class] = self.DEAD_STATE
+            return self.DEAD_STATE
+
+        next_state_set = frozenset(self.nfa.epsilon_closure(next_states))
+        if self.unanchored:
+            next_state_set |= self._initial_state_set
+        next_state_id = self._state_ids.get(next_state_set)
+        if next_state_id is None:
+            state_bytes = self._state_bytes(next_state_set, self._class_transitions[state_id])
+            if self._cache_bytes + state_bytes > self.max_cache_bytes:
+                # The transition isn't recorded, since state_id no longer exists after a flush.
+                self._flush_cache()
+                return self._add_state(next_state_set)
+            next_state_id = self._add_state(next_state_set)
+
+        self._class_transitions[state_id][symbol_class] = next_state_id
+        return next_state_id
+
+    def run_dfa(self, input_string: str) -> bool:
+        """
+        run_dfa
+        Run a string through the DFA, discovering new DFA states as needed.
+        Once warm, each character costs a class lookup and a table lookup.
+
+        :param input_string: The string to run.
+        :return: True if string was accepted. False otherwise.
+        """
+
+        if self.fallback_to_nfa:
+            return self.nfa.simulate_nfa(input_string)
+
+        self._characters_since_flush += len(input_string)
+        char_classes = self.nfa.alphabet.char_classes
+        class_transitions = self._class_transitions
+        state = self._initial_state
+
+        for char in input_string:
+            symbol_class = char_classes.get(char)
+            if symbol_class is None:
+                symbol_class = self._class_of(char)
+            next_state: Optional[int] = class_transitions[state][symbol_class]
+            if next_state is None:
+                next_state = self._compute_transition(state, symbol_class)
+                if self.fallback_to_nfa:
+                    return self.nfa.simulate_nfa(input_string)
+            if next_state == self.DEAD_STATE:
+                return False
+            state = next_state
+
+        return self._accepting[state]
+
+    def run_dfa_with_stats(self, input_string: str, stats: MatchStats) -> bool:
+        """
+        run_dfa_with_stats
+        Same as run_dfa, but counts the work done in stats.
+        Each cache miss computes the epsilon closure of a new set of NFA states.
+
+        :param input_string: The string to run.
+        :param stats: The counters to add to.
+        :return: True if string was accepted. False otherwise.
+        """
+
+        if self.fallback_to_nfa:
+            return self.nfa.simulate_nfa_with_stats(input_string, stats)
+
+        self._characters_since_flush += len(input_string)
+        class_transitions = self._class_transitions
+        state = self._initial_state
+        stats.states_visited += 1
+        stats.peak_active_states = max(stats.peak_active_states, len(self._state_sets[state]))
+
+        for char in input_string:
+            symbol_class = self._class_of(char)
+            next_state: Optional[int] = class_transitions[state][symbol_class]
+            if next_state is None:
+                stats.dfa_cache_misses += 1
+                stats.epsilon_closures += 1
+                next_state = self._compute_transition(state, symbol_class)
+                if self.fallback_to_nfa:
+                    return self.nfa.simulate_nfa_with_stats(input_string, stats)
+            else:
+                stats.dfa_cache_hits += 1
+            if next_state == self.DEAD_STATE:
+                return False
+            state = next_state
+            stats.transitions_taken += 1
+            stats.states_visited += 1
+            stats.peak_active_states = max(stats.peak_active_states,
+                                           len(self._state_sets[state]))
+
+        return self._accepting[state]
+
+    def run_dfa_bytes(self, input_bytes: memoryview) -> bool:
+        """
+        run_dfa_bytes
+        Run a byte string through the DFA, with each byte read as the character of the same code
+        (Latin-1), so a slice of a larger buffer is run without decoding or copying it.
+
+        :param input_bytes: The bytes to run.
+        :return: True if the bytes were accepted. False otherwise.
+        """
+
+        if self.fallback_to_nfa:
+            return self.nfa.simulate_nfa(str(input_bytes, 'latin-1'))
+
+        if self._byte_classes is None:
+            self._byte_classes = [self._class_of(chr(byte)) for byte in range(256)]
+
+        self._characters_since_flush += len(input_bytes)
+        byte_classes = self._byte_classes
+        class_transitions = self._class_transitions
+        state = self._initial_state
+
+        for byte in input_bytes:
+            symbol_class = byte_classes[byte]
+            next_state: Optional[int] = class_transitions[state][symbol_class]
+            if next_state is None:
+                next_state = self._compute_transition(state, symbol_class)
+                if self.fallback_to_nfa:
+                    return self.nfa.simulate_nfa(str(input_bytes, 'latin-1'))
+            if next_state == self.DEAD_STATE:
+                return False
+            state = next_state
+
+        return self._accepting[state]
+
+    def longest_match(self, input_string: str, start: int,
+                      known_ends: Optional[Dict[Tuple[int, int], int]] = None) -> int:
+        """
+        longest_match
+        Finds the longest substring of a string, starting at a given position, that is accepted.
+        Stops as soon as the DFA reaches the dead state, or a (position, DFA state) pair whose
+        longest match end is already known.
+
+        :param input_string: The string to search.
+        :param start: The position the substring starts at.
+        :param known_ends: The longest match end (or -1) from each (position, DFA state) pair
+                           reached by earlier calls on the same string, which this call adds to.
+                           Passing the same dictionary to every call of a search means no pair is
+                           scanned twice, so finding every match takes linear time.
+        :return: The end position of the longest accepted substring (or -1 if there is none).
+        """
+
+        char_classes = self.nfa.alphabet.char_classes
+        class_transitions = self._class_transitions
+        cache_flushes = self.cache_flushes
+        state = self._initial_state
+        longest_end = start if self._accepting[state] else -1
+        path: List[Tuple[int, int]] = []
+
+        for position in range(start, len(input_string)):
+            if known_ends is not None:
+                known_end = known_ends.get((position, state))
+                if known_end is not None:
+                    longest_end = max(longest_end, known_end)
+                    break
+                path.append((position, state))
+
+            char = input_string[position]
+            symbol_class = char_classes.get(char)
+            if symbol_class is None:
+                symbol_class = self._class_of(char)
+            next_state: Optional[int] = class_transitions[state][symbol_class]
+            if next_state is None:
+                next_state = self._compute_transition(state, symbol_class)
+                if self.cache_flushes != cache_flushes and known_ends is not None:
+                    # The DFA states were renumbered, so the known pairs no longer apply.
+                    cache_flushes = self.cache_flushes
+                    known_ends.clear()
+                    path.clear()
+            if next_state == self.DEAD_STATE:
+                break
+            state = next_state
+            if self._accepting[state]:
+                longest_end = position + 1
+
+        # The longest end of the scan is also the longest end from each pair before it.
+        if known_ends is not None:
+            for position, state in path:
+                known_ends[position, state] = longest_end if longest_end >= position else -1
+
+        self._characters_since_flush += len(input_string) - start
+        return longest_end
+
+    def accepting_positions(self, input_string: str) -> bytearray:
+        """
+        accepting_positions
+        Runs a string through the DFA and records where it is in an accepting state.
+        With an unanchored DFA, this marks the end of every accepted substring in one pass.
+
+        :param input_string: The string to run.
+        :return: A bytearray where item i is 1 if the first i characters are accepted
+                 (otherwise 0), with len(input_string) + 1 items.
+        """
+
+        self._characters_since_flush += len(input_string)
+        char_classes = self.nfa.alphabet.char_classes
+        class_transitions = self._class_transitions
+        accepting = self._accepting
+        state = self._initial_state
+        positions = bytearray(len(input_string) + 1)
+        positions[0] = accepting[state]
+
+        for position, char in enumerate(input_string, 1):
+            symbol_class = char_classes.get(char)
+            if symbol_class is None:
+                symbol_class = self._class_of(char)
+            next_state: Optional[int] = class_transitions[state][symbol_class]
+            if next_state is None:
+                next_state = self._compute_transition(state, symbol_class)
+            if next_state == self.DEAD_STATE:
+                break
+            state = next_state
+            positions[position] = accepting[state]
+
+        return positions
+
+    def number_of_cached_states(self) -> int:
+        """
+        number_of_cached_states
+        Returns the number of DFA states currently in the cache.
+
+        :return: The number of cached DFA states.
+        """
+
+        return len(self._state_sets)
+
+    def cache_size(self) -> int:
+        """
+        cache_size
+        Returns the estimated memory of the DFA states currently in the cache.
+
+        :return: The estimated memory of the cache (in bytes).
+        """
+
+        return self._cache_bytes
@@ -0,0 +1,249 @@
+import os
+
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from typing import List, Optional, Tuple
+
+
+# Literals known about a node: (the only string it matches, or None if it matches other strings),
+# the prefix and suffix of every string it matches, and other substrings of every string it matches.
+LiteralInfo = Tuple[Optional[str], str, str, Tuple[str, ...]]
+
+
+class LiteralPrefilter:
+    """
+    LiteralPrefilter
+    Class to reject test strings before they are run through an automaton, using the literals
+    every string in the language of a regex must have: a prefix, a suffix, and required
+    substrings (e.g. xyz for (ab|cd)*xyz). The checks are str.startswith, str.endswith and
+    substring tests, which run at C speed. Regexes that only match one string are decided
+    by comparing the test string to it.
+    """
+
+    # Required substrings kept per node (the longest ones), so the checks stay cheap.
+    MAX_REQUIRED_LITERALS = 4
+
+    def __init__(self, exact: Optional[str], prefix: str, suffix: str,
+                 required_literals: Tuple[str, ...]):
+        """
+        __init__
+        Creates a LiteralPrefilter object.
+
+        :param exact: The only string in the language (or None if there are others).
+        :param prefix: The prefix of every string in the language.
+        :param suffix: The suffix of every string in the language.
+        :param required_literals: Other substrings of every string in the language.
+        """
+
+        self.exact = exact
+        self.prefix = prefix
+        self.suffix = suffix
+        self.required_literals = required_literals
+
+    @staticmethod
+    def from_tree(tree: RegexNode) -> Optional['LiteralPrefilter']:
+        """
+        from_tree
+        Finds the literals required by a parse tree.
+
+        :param tree: The root of the parse tree.
+        :return: The LiteralPrefilter object (or None if the regex requires no literal).
+        """
+
+        exact, prefix, suffix, required_literals = LiteralPrefilter._analyze(tree)
+        if exact is None and not prefix and not suffix and not required_literals:
+            return None
+        return LiteralPrefilter(exact, prefix, suffix, required_literals)
+
+    def convert_literal_prefilter_to_json(self) -> dict:
+        """
+        convert_literal_prefilter_to_json
+        Returns a dictionary representing a JSON object.
+
+        :return: A dictionary of the literals.
+        """
+
+        return {
+            'exact': self.exact,
+            'prefix': self.prefix,
+            'suffix': self.suffix,
+            'required_literals': list(self.required_literals)
+        }
+
+    @staticmethod
+    def from_json(json_object: dict) -> 'LiteralPrefilter':
+        """
+        from_json
+        Creates a LiteralPrefilter object from a dictionary written by
+        convert_literal_prefilter_to_json (e.g. loaded from disk).
+
+        :param json_object: The dictionary of literals.
+        :return: The LiteralPrefilter object.
+        """
+
+        return LiteralPrefilter(json_object['exact'], json_object['prefix'],
+                                json_object['suffix'], tuple(json_object['required_literals']))
+
+    def decide(self, test_string: str) -> Optional[bool]:
+        """
+        decide
+        Decides a test string from the literals of the regex, if they are enough to.
+
+        :param test_string: The string to check.
+        :return: False if the string is not in the language, True if it is the only string
+                 in the language, and None if the automaton has to run it.
+        """
+
+        if self.exact is not None:
+            return test_string == self.exact
+        if not test_string.startswith(self.prefix) or not test_string.endswith(self.suffix):
+            return False
+        for literal in self.required_literals:
+            if literal not in test_string:
+                return False
+        return None
+
+    @staticmethod
+    def _analyze(tree: RegexNode) -> LiteralInfo:
+        """
+        _analyze
+        Finds the literals of a parse tree (walked in post-order with an explicit stack).
+
+        :param tree: The root of the parse tree.
+        :return: The literals of the root.
+        """
+
+        stack = [(tree, False)]
+        infos: List[LiteralInfo] = []
+        while stack:
+            node, children_done = stack.pop()
+            node_type = node.node_type
+            if node_type == RegexNodeType.LITERAL:
+                infos.append((node.value, node.value, node.value, ()))
+                continue
+            elif node_type == RegexNodeType.EMPTY:
+                infos.append(('', '', '', ()))
+                continue
+            elif node_type == RegexNodeType.CHARACTER_CLASS:
+                infos.append((None, '', '', ()))
+                continue
+            elif not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+                continue
+
+            number_of_children = len(node.children)
+            child_infos = infos[len(infos) - number_of_children:]
+            del infos[len(infos) - number_of_children:]
+
+            if node_type == RegexNodeType.CONCATENATION:
+                infos.append(LiteralPrefilter._concatenation_info(child_infos))
+            elif node_type == RegexNodeType.UNION:
+                infos.append(LiteralPrefilter._union_info(child_infos))
+            elif child_infos[0][0] == '':
+                # A repetition of the empty string only matches the empty string.
+                infos.append(child_infos[0])
+            elif node_type == RegexNodeType.PLUS:
+                # Every string of a+ starts and ends with a string of a.
+                _, prefix, suffix, required_literals = child_infos[0]
+                infos.append((None, prefix, suffix, required_literals))
+            else:
+                # Stars and optionals match the empty string, so nothing is required.
+                infos.append((None, '', '', ()))
+
+        return infos[0]
+
+    @staticmethod
+    def _concatenation_info(child_infos: List[LiteralInfo]) -> LiteralInfo:
+        """
+        _concatenation_info
+        Finds the literals of a concatenation from the literals of its items.
+
+        :param child_infos: The literals of the items.
+        :return: The literals of the concatenation.
+        """
+
+        # Runs of items that only match one string are joined first
+        # (so long literal runs aren't copied once per character).
+        merged_infos: List[LiteralInfo] = []
+        exact_run: List[str] = []
+        for child_info in child_infos:
+            if child_info[0] is not None:
+                exact_run.append(child_info[0])
+                continue
+            if exact_run:
+                exact = ''.join(exact_run)
+                merged_infos.append((exact, exact, exact, ()))
+                exact_run = []
+            merged_infos.append(child_info)
+        if exact_run:
+            exact = ''.join(exact_run)
+            merged_infos.append((exact, exact, exact, ()))
+
+        exact, prefix, suffix, required_literals = merged_infos[0]
+        for next_exact, next_prefix, next_suffix, next_required_literals in merged_infos[1:]:
+            # The suffix of one item is followed by the prefix of the next one.
+            required_literals += next_required_literals + (suffix + next_prefix,)
+            if exact is not None:
+                prefix = exact + next_prefix
+            suffix = suffix + next_exact if next_exact is not None else next_suffix
+            exact = exact + next_exact if exact is not None and next_exact is not None else None
+
+        return (exact, prefix, suffix,
+                LiteralPrefilter._prune_literals(required_literals, prefix, suffix))
+
+    @staticmethod
+    def _union_info(child_infos: List[LiteralInfo]) -> LiteralInfo:
+        """
+        _union_info
+        Finds the literals of a union from the literals of its branches.
+
+        :param child_infos: The literals of the branches.
+        :return: The literals of the union.
+        """
+
+        exacts = {child_info[0] for child_info in child_infos}
+        exact = exacts.pop() if len(exacts) == 1 else None
+        prefix = os.path.commonprefix([child_info[1] for child_info in child_infos])
+        suffix = os.path.commonprefix(
+            [child_info[2][::-1] for child_info in child_infos]
+        )[::-1]
+
+        # A literal of the first branch is required if every other branch has a literal
+        # that contains it.
+        branch_literals = [
+            (child_info[1], child_info[2]) + child_info[3] for child_info in child_infos
+        ]
+        required_literals = tuple(
+            literal for literal in branch_literals[0]
+            if all(
+                any(literal in branch_literal for branch_literal in literals)
+                for literals in branch_literals[1:]
+            )
+        )
+
+        return (exact, prefix, suffix,
+                LiteralPrefilter._prune_literals(required_literals, prefix, suffix))
+
+    @staticmethod
+    def _prune_literals(literals: Tuple[str, ...], prefix: str, suffix: str) -> Tuple[str, ...]:
+        """
+        _prune_literals
+        Removes the literals already implied by a longer literal (or by the prefix or suffix),
+        and keeps the longest MAX_REQUIRED_LITERALS of the others.
+
+        :param literals: The required literals.
+        :param prefix: The required prefix.
+        :param suffix: The required suffix.
+        :return: The pruned literals, longest first.
+        """
+
+        kept_literals = []
+        for literal in sorted(set(literals), key=len, reverse=True):
+            if literal and literal not in prefix and literal not in suffix and not any(
+                literal in kept_literal for kept_literal in kept_literals
+            ):
+                kept_literals.append(literal)
+                if len(kept_literals) == LiteralPrefilter.MAX_REQUIRED_LITERALS:
+                    break
+        return tuple(kept_literals)
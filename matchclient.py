@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from matchserver import MatchServer
+from regexresult import RegexResult
+from typing import AsyncIterator, Iterable, Iterator, List
+
+
+class MatchClient:
+    """
+    MatchClient
+    Simple client for a MatchServer (e.g. for testing).
+    Requests are sent while the responses of earlier ones are read (pipelining),
+    up to MAX_IN_FLIGHT_REQUESTS ahead, so only those RegexResults are held in memory.
+    """
+
+    # Maximum number of requests sent before the oldest response is read.
+    MAX_IN_FLIGHT_REQUESTS = 64
+
+    def __init__(self, address: str):
+        """
+        __init__
+        Creates a MatchClient object.
+
+        :param address: The address of the server: a Unix socket path, or a TCP port ([host:]port).
+        """
+
+        self.address = address
+
+    async def run_regex_results(self,
+                                regex_results: Iterable[RegexResult]) -> AsyncIterator[RegexResult]:
+        """
+        run_regex_results
+        Sends the regex and test strings of each RegexResult to the server (reading regex_results
+        only as requests can be sent), and stores the results of the responses in the RegexResults.
+
+        :param regex_results: The RegexResult objects to run.
+        :return: An async iterator of the RegexResult objects (with their test strings run),
+                 in order, each as soon as its response is read.
+        """
+
+        socket_path, host, port = MatchServer.parse_address(self.address)
+        if socket_path is not None:
+            reader, writer = await asyncio.open_unix_connection(
+                socket_path, limit=MatchServer.MAX_REQUEST_SIZE
+            )
+        else:
+            reader, writer = await asyncio.open_connection(
+                host, port, limit=MatchServer.MAX_REQUEST_SIZE
+            )
+
+        # The requests waiting for a response, in order (None marks the end).
+        in_flight: asyncio.Queue = asyncio.Queue()
+        in_flight_slots = asyncio.Semaphore(self.MAX_IN_FLIGHT_REQUESTS)
+
+        async def send_requests():
+            try:
+                for regex_result in regex_results:
+                    await in_flight_slots.acquire()
+                    in_flight.put_nowait(regex_result)
+                    writer.write(json.dumps({
+                        'regex': regex_result.regular_expression,
+                        'strings': list(regex_result.test_strings_in_language)
+                    }).encode('utf-8') + b'\n')
+                    await writer.drain()
+            finally:
+                in_flight.put_nowait(None)
+
+        # Responses are read while requests are still being sent, so neither side blocks.
+        send_task = asyncio.ensure_future(send_requests())
+        try:
+            while True:
+                regex_result = await in_flight.get()
+                if regex_result is None:
+                    break
+                response_line = await reader.readline()
+                if not response_line:
+                    raise ConnectionError('Connection closed by the server')
+                response = json.loads(response_line)
+                if 'error' in response:
+                    raise ValueError(response['error'])
+                regex_result.test_strings_in_language.update(response['strings'])
+                in_flight_slots.release()
+                yield regex_result
+
+            # Raises the error of the input, if reading it failed.
+            await send_task
+        finally:
+            send_task.cancel()
+            await asyncio.gather(send_task, return_exceptions=True)
+            writer.close()
+
+    def run(self, regex_results: Iterable[RegexResult]) -> Iterator[RegexResult]:
+        """
+        run
+        Synchronous version of run_regex_results
+        (runs an event loop while it is iterated, to get the results in batches).
+
+        :param regex_results: The RegexResult objects to run.
+        :return: An iterator of the RegexResult objects (with their test strings run).
+        """
+
+        results = self.run_regex_results(regex_results)
+
+        async def next_results() -> List[RegexResult]:
+            batch = []
+            try:
+                while len(batch) < self.MAX_IN_FLIGHT_REQUESTS:
+                    batch.append(await results.__anext__())
+            except StopAsyncIteration:
+                pass
+            return batch
+
+        event_loop = asyncio.new_event_loop()
+        try:
+            while True:
+                batch = event_loop.run_until_complete(next_results())
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            event_loop.run_until_complete(results.aclose())
+            event_loop.close()
@@ -0,0 +1,29 @@
+from enum import Enum
+
+
+class MatchEngine(Enum):
+    """
+    MatchEngine
+    Enumeration of the engines that can run test strings through a regular expression.
+    """
+
+    # Bit-parallel matching when the regex has few enough positions (otherwise simulation).
+    AUTO = 'auto'
+
+    # Recursive backtracking over the NFA (the original engine, kept for comparison).
+    BACKTRACK = 'backtrack'
+
+    # Iterative state-set simulation of the NFA (linear in the length of the test string).
+    SIMULATION = 'simulation'
+
+    # DFA built lazily from the NFA, with a bounded cache of DFA states.
+    LAZY_DFA = 'lazy-dfa'
+
+    # Minimized DFA built ahead of time and stored as a dense transition table.
+    DFA = 'dfa'
+
+    # Bit-parallel simulation of the Glushkov (position) automaton.
+    BIT_PARALLEL = 'bit-parallel'
+
+    # Runs all the test strings of a regex together, processing shared prefixes once.
+    PREFIX_SHARING = 'prefix-sharing'
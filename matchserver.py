@@ -0,0 +1,208 @@
+import asyncio
+import ipaddress
+import json
+import jsonschema
+import logging
+import os
+import signal
+
+from asyncmatcher import AsyncMatcher
+from concurrent.futures import Executor
+from jsonreader import JsonReader
+from matchengine import MatchEngine
+from patterncache import PATTERN_CACHE
+from regexresult import RegexResult
+from typing import Optional, Tuple
+
+
+class MatchServer:
+    """
+    MatchServer
+    Long-running server that runs test strings for clients, so compiled regexes stay in the
+    pattern cache across requests (no startup or compilation per request).
+    Clients connect on a Unix socket or a loopback TCP port (the server runs regexes for anyone
+    who can connect, so it never listens on other interfaces) and send newline-delimited JSON:
+    each request is a {regex, strings} object (like an entry of a batch mode input file),
+    and each response is a {regex, strings} object (like an entry of a batch mode output file).
+    Requests can be pipelined: they run concurrently (on the executor of an AsyncMatcher, so
+    requests for the same regex are batched), and responses are sent in the order the requests
+    were received.
+    """
+
+    # Maximum number of requests of a connection running ahead of the oldest one.
+    MAX_PIPELINED_REQUESTS = 64
+
+    # Maximum length of a request line.
+    MAX_REQUEST_SIZE = 1 << 26
+
+    def __init__(self, engine: MatchEngine = MatchEngine.AUTO, executor: Optional[Executor] = None):
+        """
+        __init__
+        Creates a MatchServer object.
+
+        :param engine: The engine used to run the test strings.
+        :param executor: The executor the test strings run on (None for a thread pool).
+        """
+
+        self.engine = engine
+        self.matcher = AsyncMatcher(engine, executor)
+        self.number_of_requests = 0
+
+    @staticmethod
+    def parse_address(address: str) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+        """
+        parse_address
+        Parses a server address: a Unix socket path (containing a /),
+        or a TCP port on localhost ([host:]port, where host is a loopback address or localhost).
+
+        :param address: The address to parse.
+        :return: The Unix socket path (or None), and the TCP host and port (or None).
+        :raises ValueError: If the port is not a number or the host is not a loopback address.
+        """
+
+        if os.sep in address or '/' in address:
+            return address, None, None
+
+        host, _, port = address.rpartition(':')
+        host = host.strip('[]') or '127.0.0.1'
+        if host != 'localhost':
+            try:
+                is_loopback = ipaddress.ip_address(host).is_loopback
+            except ValueError:
+                is_loopback = False
+            if not is_loopback:
+                raise ValueError(f'{host} is not a loopback address (use localhost, 127.0.0.1 '
+                                 f'or ::1, or a Unix socket path)')
+
+        return None, host, int(port)
+
+    async def handle_request(self, request_line: bytes) -> dict:
+        """
+        handle_request
+        Runs the test strings of a single request.
+
+        :param request_line: The request (a JSON object on one line).
+        :return: The response object ({regex, strings}, or {error} if the request is invalid).
+        """
+
+        self.number_of_requests += 1
+        try:
+            entry = json.loads(request_line)
+            JsonReader.entry_validator().validate(entry)
+        except (ValueError, jsonschema.ValidationError) as error:
+            message = error.message if isinstance(error, jsonschema.ValidationError) else str(error)
+            logging.critical(f'Invalid request: {message}')
+            return {'error': message}
+
+        regex_result = RegexResult(entry['regex'], {
+            test_string: None for test_string in entry['strings']
+        })
+        try:
+            await self.matcher.run_regex_result(regex_result)
+        except Exception as error:
+            # Any other failure (e.g. a worker process that died) only fails this request,
+            # so the client still gets one response line per request.
+            logging.critical(f'Request failed: {error!r}')
+            return {'error': repr(error)}
+
+        return regex_result.convert_regex_result_to_json()
+
+    async def _read_requests(self, reader: asyncio.StreamReader, requests: asyncio.Queue) -> None:
+        """
+        _read_requests
+        Reads the requests of a connection and starts running them.
+        Their tasks are put in a queue, in order (None marks the end).
+
+        :param reader: The stream of the connection.
+        :param requests: The queue of request tasks.
+        """
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if request_line.strip():
+                    await requests.put(asyncio.ensure_future(self.handle_request(request_line)))
+        except (ConnectionError, ValueError) as error_message:
+            logging.debug(f'Connection closed while reading: {error_message}')
+        finally:
+            await requests.put(None)
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """
+        handle_connection
+        Serves a client connection until it closes.
+        Requests are read and run (up to MAX_PIPELINED_REQUESTS ahead) while the responses of
+        earlier ones are written.
+
+        :param reader: The stream to read requests from.
+        :param writer: The stream to write responses to.
+        """
+
+        requests = asyncio.Queue(self.MAX_PIPELINED_REQUESTS)
+        read_task = asyncio.ensure_future(self._read_requests(reader, requests))
+        try:
+            while True:
+                request = await requests.get()
+                if request is None:
+                    break
+                response = await request
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError as error_message:
+            logging.debug(f'Connection closed while writing: {error_message}')
+        finally:
+            read_task.cancel()
+            while not requests.empty():
+                request = requests.get_nowait()
+                if request is not None:
+                    request.cancel()
+            writer.close()
+
+    async def serve(self, address: str) -> None:
+        """
+        serve
+        Listens on the address and serves connections until the task is cancelled
+        (e.g. by Ctrl+C) or the process receives SIGTERM.
+
+        :param address: A Unix socket path, or a TCP port on localhost ([host:]port).
+        """
+
+        socket_path, host, port = self.parse_address(address)
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, socket_path,
+                                                     limit=self.MAX_REQUEST_SIZE)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port,
+                                                limit=self.MAX_REQUEST_SIZE)
+
+        stop_event = asyncio.Event()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop_event.set)
+        except (NotImplementedError, AttributeError):
+            logging.debug('SIGTERM handler unavailable on this platform')
+
+        logging.info(f'Serving on {address} with the {self.engine.value} engine')
+        try:
+            async with server:
+                await stop_event.wait()
+        finally:
+            logging.info(f'Served {self.number_of_requests} requests in '
+                         f'{self.matcher.number_of_batches} batches; {PATTERN_CACHE}')
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+    def run(self, address: str) -> None:
+        """
+        run
+        Runs the server until it is interrupted (e.g. with Ctrl+C).
+
+        :param address: A Unix socket path, or a TCP port on localhost ([host:]port).
+        """
+
+        try:
+            asyncio.run(self.serve(address))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,129 @@
+from patternanalysis import PatternAnalysis
+from typing import Optional
+
+
+class MatchStats:
+    """
+    MatchStats
+    Counters collected while compiling a regular expression and running test strings through it.
+    Counters are only collected by the instrumented runs of the engines (used when stats are
+    requested), so the normal matching path doesn't pay for them.
+    """
+
+    # Counters that describe the regex rather than the work done on the test strings.
+    REGEX_FACTS = (
+        'parse_tree_nodes', 'optimized_parse_tree_nodes', 'nfa_states', 'optimized_nfa_states',
+        'pattern_analysis'
+    )
+
+    def __init__(self):
+        """
+        __init__
+        Creates a MatchStats object. Every counter starts at 0.
+        """
+
+        self.strings = 0
+        self.characters = 0
+
+        # Strings decided by the literal prefilter (without running the engine).
+        self.prefiltered_strings = 0
+
+        # Active states summed over every position (NFA states, DFA states or Glushkov positions).
+        self.states_visited = 0
+        self.transitions_taken = 0
+        self.epsilon_closures = 0
+        self.peak_active_states = 0
+
+        # Transitions found in (or added to) the lazy DFA cache.
+        self.dfa_cache_hits = 0
+        self.dfa_cache_misses = 0
+
+        # Compiled regexes found in (or added to) the pattern cache.
+        self.pattern_cache_hits = 0
+        self.pattern_cache_misses = 0
+
+        # Size of the parse tree and of the NFA built from it (before epsilon removal),
+        # before and after the tree is simplified by RegexOptimizer.
+        self.parse_tree_nodes = 0
+        self.optimized_parse_tree_nodes = 0
+        self.nfa_states = 0
+        self.optimized_nfa_states = 0
+
+        # Facts about the language of the regex (a dictionary from PatternAnalysis),
+        # or None for the totals of many regexes.
+        self.pattern_analysis: Optional[dict] = None
+
+        # Wall time (matching time includes the cost of counting).
+        self.compile_seconds = 0.0
+        self.match_seconds = 0.0
+
+    def add(self, other: 'MatchStats', same_regex: bool = False) -> None:
+        """
+        add
+        Adds the counters of another MatchStats object to these counters.
+
+        :param other: The MatchStats object to add.
+        :param same_regex: True if both counters are for the same regex (e.g. chunks of its test
+                           strings), so the facts about the regex are kept instead of summed.
+        """
+
+        for name, value in vars(other).items():
+            if same_regex and name in self.REGEX_FACTS:
+                setattr(self, name, value)
+            elif name == 'pattern_analysis':
+                continue
+            elif name == 'peak_active_states':
+                self.peak_active_states = max(self.peak_active_states, value)
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def convert_match_stats_to_json(self) -> dict:
+        """
+        convert_match_stats_to_json
+        Returns a dictionary representing a JSON object.
+
+        :return: A dictionary that maps each counter name to its value.
+        """
+
+        return dict(vars(self))
+
+    @staticmethod
+    def from_json(json_object: dict) -> 'MatchStats':
+        """
+        from_json
+        Creates a MatchStats object from a dictionary written by convert_match_stats_to_json.
+
+        :param json_object: The dictionary of counters.
+        :return: The MatchStats object.
+        """
+
+        match_stats = MatchStats()
+        for name, value in json_object.items():
+            setattr(match_stats, name, value)
+        return match_stats
+
+    def __str__(self) -> str:
+        """
+        __str__
+        Creates a string summarizing the counters (e.g. for logging).
+
+        :return: The string summarizing the counters.
+        """
+
+        summary = (f'{self.strings} strings ({self.characters} characters, '
+                   f'{self.prefiltered_strings} prefiltered) in '
+                   f'{self.match_seconds:.6f}s, compiled in {self.compile_seconds:.6f}s; '
+                   f'{self.states_visited} states visited, '
+                   f'{self.transitions_taken} transitions taken, '
+                   f'{self.epsilon_closures} epsilon closures, '
+                   f'peak of {self.peak_active_states} active states; '
+                   f'DFA cache: {self.dfa_cache_hits} hits, {self.dfa_cache_misses} misses; '
+                   f'pattern cache: {self.pattern_cache_hits} hits, '
+                   f'{self.pattern_cache_misses} misses; '
+                   f'parse tree: {self.parse_tree_nodes} nodes '
+                   f'({self.optimized_parse_tree_nodes} optimized), '
+                   f'NFA: {self.nfa_states} states ({self.optimized_nfa_states} optimized)')
+        if self.pattern_analysis is None:
+            return summary
+
+        return summary + '; ' + str(PatternAnalysis.from_json(self.pattern_analysis))
@@ -1,209 +1,524 @@
 import logging
 
-from state import State
-from typing import Dict, List, Tuple
+from alphabet import Alphabet
+from array import array
+from matchstats import MatchStats
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
 
 EPSILON = 'ε'
 
+# The symbol class of epsilon transitions (the classes of the alphabet are 1 and up).
+EPSILON_CLASS = 0
+
 
 class NFA:
     """
     NFA
     Class to define the structure of an NFA with helper functions to help build it.
+    States are the integers 0 to number_of_states - 1 and the accepting states are a bitset.
+    Transitions are stored in flat arrays, as adjacency lists indexed by state and symbol class
+    (epsilon, or an equivalence class of characters of the Alphabet).
     """
 
+    # remove_epsilon_transitions gives up once it has done this much work per state and
+    # transition of the NFA (but always allows MIN_EPSILON_REMOVAL_WORK), since the epsilon-free
+    # NFA can be quadratic in the size of the NFA (e.g. for a repeated (a*b)*).
+    EPSILON_REMOVAL_WORK_FACTOR = 8
+    MIN_EPSILON_REMOVAL_WORK = 10000
+
     def __init__(self):
         """
         __init__
-        Creates an NFA object. All values default to empty lists or None.
+        Creates an NFA object. All values default to empty (or None).
         """
 
-        self.initial_state: State = None
-        self.accepting_states: List[State] = []
-        self.alphabet: List[str] = []
-        self.states: List[State] = []
-        self.transition_function: Dict[(State, str), List[State]] = {}
+        self.initial_state: int = None
+        self.number_of_states = 0
+
+        # Bit i is set if state i is an accepting state.
+        self.accepting_states = 0
+
+        # Each character of the alphabet is mapped to a symbol class (epsilon is EPSILON_CLASS).
+        self.alphabet = Alphabet(())
+        self.char_classes: Dict[str, int] = self.alphabet.char_classes
+        self.number_of_symbols = 1
 
-    def initialize_nfa(self, regex: str) -> None:
+        # Transitions added while building, as parallel (source, symbol class, destination) arrays.
+        self._transition_sources = array('i')
+        self._transition_symbols = array('i')
+        self._transition_destinations = array('i')
+
+        # Adjacency lists built by build_transition_table: the destinations of (state, class) are
+        # transition_destinations[transition_offsets[i]:transition_offsets[i + 1]],
+        # where i = state * number_of_symbols + class.
+        self.transition_offsets = array('i', [0])
+        self.transition_destinations = array('i')
+
+        # True once remove_epsilon_transitions has removed the epsilon transitions.
+        self.epsilon_free = False
+
+    def initialize_nfa(self, alphabet: Alphabet) -> None:
         """
         initialize_nfa
         Initialize the NFA by adding an initial state and alphabet.
 
-        :param regex: The regex to build the alphabet from.
+        :param alphabet: The alphabet of the regex (e.g. from Alphabet.from_tree).
+        """
+
+        self.set_alphabet(alphabet)
+
+        self.initial_state = self.add_state()
+
+    def set_alphabet(self, alphabet: Alphabet) -> None:
+        """
+        set_alphabet
+        Sets the alphabet of the NFA (each of its classes is a symbol class).
+
+        :param alphabet: The alphabet.
+        """
+
+        self.alphabet = alphabet
+        self.char_classes = alphabet.char_classes
+        self.number_of_symbols = alphabet.number_of_classes + 1
+
+    def add_state(self) -> int:
+        """
+        add_state
+        Adds a new (non accepting) state to the NFA.
+
+        :return: The new state.
+        """
+
+        self.number_of_states += 1
+        return self.number_of_states - 1
+
+    def is_accepting(self, state: int) -> bool:
+        """
+        is_accepting
+        Checks if a state is an accepting state (in O(1)).
+
+        :param state: The state to check.
+        :return: True if the state is accepting (otherwise False).
+        """
+
+        return bool(self.accepting_states >> state & 1)
+
+    def set_accepting(self, state: int, accepting: bool) -> None:
+        """
+        set_accepting
+        Adds a state to (or removes it from) the accepting states.
+
+        :param state: The state to change.
+        :param accepting: True to make the state accepting (otherwise False).
+        """
+
+        if accepting:
+            self.accepting_states |= 1 << state
+        else:
+            self.accepting_states &= ~(1 << state)
+
+    def accepting_state_list(self) -> List[int]:
         """
+        accepting_state_list
+        Returns the accepting states as a list (e.g. for logging).
 
-        # Convert to set to remove duplicate characters.
-        self.alphabet = list(set([x for x in regex if x.isalnum()]))
+        :return: The list of accepting states.
+        """
 
-        initial_state = State(len(self.states))
-        self.states.append(initial_state)
-        self.initial_state = initial_state
-        self.accepting_states.append(initial_state)
+        # Bit i of the bitset is character i of its reversed binary representation.
+        return [
+            state for state, bit in enumerate(bin(self.accepting_states)[:1:-1]) if bit == '1'
+        ]
 
-    def add_to_transition_function(self, transition: Tuple[State, str], state: State) -> None:
+    def add_to_transition_function(self, transition: Tuple[int, str], state: int) -> None:
         """
         add_to_transition_function
         Helper function to insert a new transition to a state.
+        build_transition_table must be called once all transitions are added.
 
-        :param transition: A tuple of a state and the input char.
+        :param transition: A tuple of a state and the input char (or EPSILON).
         :param state: The ending state of the transition.
         """
 
-        if transition in self.transition_function:
-            self.transition_function[transition].append(state)
-        else:
-            self.transition_function[transition] = [state]
+        self._transition_sources.append(transition[0])
+        self._transition_symbols.append(
+            EPSILON_CLASS if transition[1] == EPSILON else self.alphabet.class_of(transition[1])
+        )
+        self._transition_destinations.append(state)
 
-    def add_normal_char(self, old_state: State, transition_char: str, assume_accept: bool=True,
-                        start_path_state: State=None) -> State:
+    def add_class_transition(self, source: int, symbol_class: int, destination: int) -> None:
         """
-        add_normal_char
-        Add necessary states and transitions to connect one state to a new one on some character.
-        Invariants: State is in self.states, char is in self.alphabet.
-        Assume final state should be an accepting state unless told otherwise.
+        add_class_transition
+        Inserts a new transition on a symbol class (e.g. every class of a character class).
+        build_transition_table must be called once all transitions are added.
 
-        :param old_state: The state to transition from.
-        :param transition_char: The char to transition on.
-        :param assume_accept: Whether to assume final state is accepting or not.
-        :param start_path_state: the start of the path of this state.
-        :return: The state representing the final state of this sequence.
+        :param source: The starting state of the transition.
+        :param symbol_class: The symbol class of the transition.
+        :param destination: The ending state of the transition.
         """
 
-        # Build a new state to transition to
-        new_state = State(len(self.states))
+        self._transition_sources.append(source)
+        self._transition_symbols.append(symbol_class)
+        self._transition_destinations.append(destination)
 
-        # Add state to states
-        self.states.append(new_state)
+    def build_transition_table(self) -> None:
+        """
+        build_transition_table
+        Sorts the added transitions into the adjacency lists used to run the NFA
+        (a counting sort on state and symbol class).
+        """
 
-        # Add transition from old_state to new_state
-        self.add_to_transition_function((old_state, transition_char), new_state)
+        number_of_symbols = self.number_of_symbols
+        counts = array('i', bytes(4 * (self.number_of_states * number_of_symbols + 1)))
+        keys = array('i', [
+            source * number_of_symbols + symbol
+            for source, symbol in zip(self._transition_sources, self._transition_symbols)
+        ])
+        for key in keys:
+            counts[key + 1] += 1
+        for i in range(1, len(counts)):
+            counts[i] += counts[i - 1]
+
+        self.transition_offsets = array('i', counts)
+        self.transition_destinations = array('i', bytes(4 * len(keys)))
+        for key, destination in zip(keys, self._transition_destinations):
+            self.transition_destinations[counts[key]] = destination
+            counts[key] += 1
+
+    def destinations(self, state: int, char: str) -> array:
+        """
+        destinations
+        Returns the states reached from a state on a character.
 
-        # If needed add this to accepting states
-        if assume_accept:
-            self.clear_accept_from_path(start_path_state, new_state)
-            self.accepting_states.append(new_state)
+        :param state: The state to transition from.
+        :param char: The character to transition on.
+        :return: The array of destination states (empty if there are none).
+        """
 
-        return new_state
+        symbol_class = self.alphabet.class_of(char)
+        if symbol_class is None:
+            return array('i')
+        return self.class_destinations(state, symbol_class)
 
-    def clear_accept_from_path(self, start_state: State, end_state: State) -> None:
+    def epsilon_destinations(self, state: int) -> array:
         """
-        clear_accept_from_path
-
-        Clears the accept states on the path of the current end_state from
-        self.accepting_states.
+        epsilon_destinations
+        Returns the states reached from a state on an epsilon transition.
 
-        :param start_state: The start state of the path.
-        :param end_state: The ending state of the path.
+        :param state: The state to transition from.
+        :return: The array of destination states (empty if there are none).
         """
 
-        states_to_delete = range(start_state.state_id, end_state.state_id)
-        logging.debug('Deleting accept states in range: ' + str(states_to_delete))
-        logging.debug(f'Accepting states: {self.accepting_states}; ' +
-                      f'Length: {len(self.accepting_states)}')
-        temporary_states = self.accepting_states.copy()
+        return self.class_destinations(state, EPSILON_CLASS)
 
-        for state in self.accepting_states:
-            logging.debug('Processing: ' + str(state.state_id))
-            if state.state_id in states_to_delete:
-                logging.debug('Removing: ' + str(state.state_id))
-                temporary_states.remove(state)
-        self.accepting_states = temporary_states
-        logging.debug('Resulting accepting states: ' + str(self.accepting_states))
-        logging.debug('---------')
+    def class_destinations(self, state: int, symbol_class: int) -> array:
+        """
+        class_destinations
+        Returns the states reached from a state on a symbol class.
 
-    def add_epsilon_connector(self, old_state: State) -> State:
+        :param state: The state to transition from.
+        :param symbol_class: The symbol class to transition on.
+        :return: The array of destination states (empty if there are none).
         """
-        add_epsilon_connector
-        Add necessary states and transitions to connect one state to a new one on epsilon.
-        Invariants: state is in self.states. New state will not be accepting.
 
-        :param old_state: The state to transition from.
-        :return: The state representing the final state of this sequence.
+        index = state * self.number_of_symbols + symbol_class
+        return self.transition_destinations[
+            self.transition_offsets[index]:self.transition_offsets[index + 1]
+        ]
+
+    def transition_list(self) -> List[Tuple[int, str, int]]:
         """
+        transition_list
+        Returns every transition as a (state, symbol, destination) tuple (e.g. for logging),
+        where the symbol is EPSILON or the characters of a class (like a character class).
 
-        return self.add_normal_char(old_state, EPSILON, False)
+        :return: The list of transitions.
+        """
 
-    def replace_initial(self) -> State:
+        symbols = [EPSILON] + [
+            str(self.alphabet.class_set(symbol_class))
+            for symbol_class in range(1, self.number_of_symbols)
+        ]
+        return [
+            (state, symbols[symbol_class], destination)
+            for state in range(self.number_of_states)
+            for symbol_class in range(self.number_of_symbols)
+            for destination in self.class_destinations(state, symbol_class)
+        ]
+
+    def epsilon_closure(self, states: Iterable[int]) -> Set[int]:
         """
-        replace_initial
-        Build a new initial state and epsilon transition to the old one.
+        epsilon_closure
+        Finds every state reachable from the given states using only epsilon transitions.
 
-        :return: The new initial state.
+        :param states: The states to start from.
+        :return: The set of states in the epsilon closure (including the given states).
         """
 
-        # make a state
-        new_state = State(len(self.states))
-        self.states.append(new_state)
+        closure = set(states)
+        states_to_visit = list(closure)
 
-        # epsilon the state to initial
-        self.add_to_transition_function((new_state, EPSILON), self.initial_state)
+        offsets = self.transition_offsets
+        destinations = self.transition_destinations
+        number_of_symbols = self.number_of_symbols
 
-        # replace initial
-        self.initial_state = new_state
+        # Iterative depth-first search, so long epsilon chains can't exhaust the stack.
+        # (Epsilon is symbol class 0.)
+        while states_to_visit:
+            index = states_to_visit.pop() * number_of_symbols
+            for destination in destinations[offsets[index]:offsets[index + 1]]:
+                if destination not in closure:
+                    closure.add(destination)
+                    states_to_visit.append(destination)
 
-        return new_state
+        return closure
 
-    def close_branch(self, path_end_1: State, path_end_2: State) -> State:
+    def remove_epsilon_transitions(self) -> bool:
+        """
+        remove_epsilon_transitions
+        Rewrites the NFA into an equivalent NFA without epsilon transitions.
+        A state gets the character transitions of every state in its epsilon closure,
+        and is accepting if its epsilon closure contains an accepting state.
+        Only states reachable from the initial state are kept (and they are renumbered).
+        The NFA is left unchanged (and epsilon_free stays False) if that takes more work than
+        EPSILON_REMOVAL_WORK_FACTOR per state and transition, so compile time stays linear
+        in the size of the NFA, and the engines follow the epsilon transitions instead.
+
+        :return: True if the epsilon transitions were removed (otherwise False).
         """
-        close_branch
 
-        Build a new state that connects two end states to a new end state
-        with epsilon transitions.
+        number_of_symbols = self.number_of_symbols
+        offsets = self.transition_offsets
+        destinations = self.transition_destinations
+        max_work = max(self.MIN_EPSILON_REMOVAL_WORK, self.EPSILON_REMOVAL_WORK_FACTOR * (
+            self.number_of_states + len(destinations)
+        ))
+        work = 0
+
+        accepting_state_set = set(self.accepting_state_list())
+
+        # Reachable states get new IDs in the order they are discovered.
+        new_ids = {self.initial_state: 0}
+        old_states = [self.initial_state]
+        accepting_states = 0
+        sources, symbols, new_destinations = array('i'), array('i'), array('i')
+
+        new_state = 0
+        while new_state < len(old_states):
+            closure = self.epsilon_closure([old_states[new_state]])
+            work += len(closure)
+            if not accepting_state_set.isdisjoint(closure):
+                accepting_states |= 1 << new_state
+
+            # Only the states with character transitions (classes 1 and up) contribute.
+            closure = [
+                state for state in closure
+                if offsets[state * number_of_symbols + 1] !=
+                offsets[state * number_of_symbols + number_of_symbols]
+            ]
+            for symbol in range(1, number_of_symbols if closure else 1):
+                # Dictionary (instead of a set) keeps the destinations in a deterministic order.
+                symbol_destinations = {}
+                for state in closure:
+                    index = state * number_of_symbols + symbol
+                    for destination in destinations[offsets[index]:offsets[index + 1]]:
+                        symbol_destinations[destination] = None
+
+                for destination in symbol_destinations:
+                    if destination not in new_ids:
+                        new_ids[destination] = len(old_states)
+                        old_states.append(destination)
+                    sources.append(new_state)
+                    symbols.append(symbol)
+                    new_destinations.append(new_ids[destination])
+            new_state += 1
+            if work + len(new_destinations) > max_work:
+                logging.debug(f'Keeping the epsilon transitions of an NFA with '
+                              f'{self.number_of_states} states (removing them is too costly)')
+                return False
+
+        self.initial_state = 0
+        self.number_of_states = len(old_states)
+        self.accepting_states = accepting_states
+        self._transition_sources = sources
+        self._transition_symbols = symbols
+        self._transition_destinations = new_destinations
+        self.build_transition_table()
+        self.epsilon_free = True
+        return True
+
+    def reverse(self, prefixes: bool = False) -> 'NFA':
+        """
+        reverse
+        Builds an NFA accepting the reverse of every string accepted by this NFA
+        (or of every prefix of an accepted string).
+        Every transition is reversed, the initial state becomes the only accepting state,
+        and a new initial state has an epsilon transition to each accepting state
+        (or to each state that reaches an accepting state, for prefixes).
+        The reversed NFA is epsilon-free and only has the states that reach an accepting state
+        (unless removing its epsilon transitions is too costly).
+
+        :param prefixes: True to accept the reverse of every prefix of an accepted string.
+        :return: The reversed NFA.
+        """
 
-        :return: The new final state
+        reversed_nfa = NFA()
+        reversed_nfa.set_alphabet(self.alphabet)
+        for _ in range(self.number_of_states):
+            reversed_nfa.add_state()
+        reversed_nfa.set_accepting(self.initial_state, True)
+
+        for state in range(self.number_of_states):
+            for symbol_class in range(self.number_of_symbols):
+                for destination in self.class_destinations(state, symbol_class):
+                    reversed_nfa.add_class_transition(destination, symbol_class, state)
+
+        end_states = self.accepting_state_list()
+        if prefixes:
+            # The states that reach an accepting state are the ones the accepting states reach
+            # in the reversed NFA.
+            reversed_nfa.build_transition_table()
+            end_state_set = set(end_states)
+            states_to_visit = list(end_states)
+            while states_to_visit:
+                state = states_to_visit.pop()
+                for symbol_class in range(reversed_nfa.number_of_symbols):
+                    for destination in reversed_nfa.class_destinations(state, symbol_class):
+                        if destination not in end_state_set:
+                            end_state_set.add(destination)
+                            states_to_visit.append(destination)
+            end_states = sorted(end_state_set)
+
+        reversed_nfa.initial_state = reversed_nfa.add_state()
+        for state in end_states:
+            reversed_nfa.add_class_transition(reversed_nfa.initial_state, EPSILON_CLASS, state)
+
+        reversed_nfa.build_transition_table()
+        reversed_nfa.remove_epsilon_transitions()
+        return reversed_nfa
+
+    def initial_states(self) -> FrozenSet[int]:
         """
+        initial_states
+        Returns the set of active states before any input is read.
 
-        # Makes a new state.
-        new_state = State(len(self.states))
+        :return: The epsilon closure of the initial state.
+        """
 
-        # epsilon transition from end states
-        self.add_to_transition_function((path_end_1, EPSILON), new_state)
-        self.add_to_transition_function((path_end_2, EPSILON), new_state)
+        return frozenset(self.epsilon_closure([self.initial_state]))
 
-        # alter accept states
-        self.accepting_states.append(new_state)
-        return new_state
+    def step_states(self, states: FrozenSet[int], char: str) -> FrozenSet[int]:
+        """
+        step_states
+        Runs a single character from a set of active states.
 
-    def add_star(self, start_star: State, end_star: State) -> State:
+        :param states: The active states.
+        :param char: The input character.
+        :return: The active states after the character (empty if none are left).
         """
-        add_star
 
-        Connect the start and end with epsilon transitions and edit start states to add star
+        symbol_class = self.alphabet.class_of(char)
+        if symbol_class is None:
+            return frozenset()
+
+        next_states = set()
+        for state in states:
+            next_states.update(self.class_destinations(state, symbol_class))
+        return frozenset(next_states if self.epsilon_free else self.epsilon_closure(next_states))
 
-        :return: The new final state
+    def any_accepting(self, states: FrozenSet[int]) -> bool:
         """
-        self.add_to_transition_function((end_star, EPSILON), start_star)
-        new_state = State(len(self.states))
-        self.add_to_transition_function((start_star, EPSILON), new_state)
+        any_accepting
+        Checks if a set of active states contains an accepting state.
 
-        if start_star not in self.accepting_states:
-            self.accepting_states.append(start_star)
-        if end_star in self.accepting_states:
-            self.accepting_states.remove(end_star)
-        self.accepting_states.append(new_state)
+        :param states: The active states.
+        :return: True if any of the states is accepting (otherwise False).
+        """
 
-        return new_state
+        return any(self.accepting_states >> state & 1 for state in states)
 
-    def add_plus(self, start_plus: State, end_plus: State) -> State:
+    def simulate_nfa(self, input_string: str) -> bool:
         """
-        add_plus
-
-        Connect the start and end with epsilon transitions and edit start states to add plus
+        simulate_nfa
+        Run a string through the NFA by tracking the set of active states at each position.
+        Runs in O(len(input_string) * number of states) time with a constant stack depth.
 
-        :return: The new final state
+        :param input_string: The string to run.
+        :return: True if string was accepted. False otherwise.
         """
 
-        self.add_to_transition_function((end_plus, EPSILON), start_plus)
+        char_classes = self.char_classes
+        number_of_symbols = self.number_of_symbols
+        offsets = self.transition_offsets
+        destinations = self.transition_destinations
+        current_states = self.epsilon_closure([self.initial_state])
+
+        for char in input_string:
+            symbol_class = char_classes.get(char)
+            if symbol_class is None:
+                symbol_class = self.alphabet.class_of(char)
+                if symbol_class is None:
+                    logging.debug(f'Reject on {char}: not in the alphabet')
+                    return False
+
+            next_states = set()
+            for state in current_states:
+                index = state * number_of_symbols + symbol_class
+                next_states.update(destinations[offsets[index]:offsets[index + 1]])
 
-        if start_plus in self.accepting_states:
-            self.accepting_states.remove(start_plus)
-        if end_plus not in self.accepting_states:
-            self.accepting_states.append(end_plus)
+            # No active states left, so no suffix of the string can be accepted.
+            if not next_states:
+                logging.debug(f'Reject on {char}: no active states')
+                return False
 
-        return end_plus
+            # Closures were already folded into the transitions of an epsilon-free NFA.
+            current_states = next_states if self.epsilon_free else self.epsilon_closure(next_states)
+
+        return any(self.accepting_states >> state & 1 for state in current_states)
+
+    def simulate_nfa_with_stats(self, input_string: str, stats: MatchStats) -> bool:
+        """
+        simulate_nfa_with_stats
+        Same as simulate_nfa, but counts the work done in stats.
+
+        :param input_string: The string to run.
+        :param stats: The counters to add to.
+        :return: True if string was accepted. False otherwise.
+        """
 
-    def run_nfa(self, input_string: str, current_state: State,
-                path: List[Tuple[State, str]]=None) -> bool:
+        number_of_symbols = self.number_of_symbols
+        offsets = self.transition_offsets
+        destinations = self.transition_destinations
+        current_states = self.epsilon_closure([self.initial_state])
+        stats.epsilon_closures += 1
+        stats.states_visited += len(current_states)
+        stats.peak_active_states = max(stats.peak_active_states, len(current_states))
+
+        for char in input_string:
+            symbol_class = self.alphabet.class_of(char)
+            if symbol_class is None:
+                return False
+
+            next_states = set()
+            for state in current_states:
+                index = state * number_of_symbols + symbol_class
+                stats.transitions_taken += offsets[index + 1] - offsets[index]
+                next_states.update(destinations[offsets[index]:offsets[index + 1]])
+
+            if not next_states:
+                return False
+
+            if not self.epsilon_free:
+                next_states = self.epsilon_closure(next_states)
+                stats.epsilon_closures += 1
+            current_states = next_states
+            stats.states_visited += len(current_states)
+            stats.peak_active_states = max(stats.peak_active_states, len(current_states))
+
+        return any(self.accepting_states >> state & 1 for state in current_states)
+
+    def run_nfa(self, input_string: str, current_state: int,
+                path: List[Tuple[int, str]]=None) -> bool:
         """
         run_nfa                                  <!-- RECURSIVE -->
         Run a string through an NFA.
@@ -220,16 +535,18 @@ class NFA:
         path.append((current_state, input_string))
 
         # Set up the current state
-        if current_state in self.accepting_states and input_string is "":
+        if self.is_accepting(current_state) and input_string == "":
             logging.debug('Accept on path: ' + str(path))
             return True
 
-        # Finds all resulting states from epsilon transitions.
-        if (current_state, EPSILON) in self.transition_function:
-            destinations = self.transition_function[(current_state, EPSILON)]
+        # Finds all resulting states from epsilon transitions
+        # (skipping the states already on the path at this position, so epsilon cycles end).
+        destinations = self.epsilon_destinations(current_state)
+        if destinations:
             results = [
                 self.run_nfa(input_string, destination, path.copy())
                 for destination in destinations
+                if (destination, input_string) not in path
             ]
             if True in results:
                 logging.debug('accept on path: ' + str(path))
@@ -241,13 +558,11 @@ class NFA:
             return False
 
         # Checks if the transition exists in the transition function.
-        if (current_state, input_string[0]) in self.transition_function:
-            logging.debug(f'Continuing on {current_state} {input_string[0]} to ' +
-                          f'{self.transition_function[current_state, input_string[0]]}')
+        destinations = self.destinations(current_state, input_string[0])
+        if destinations:
+            logging.debug(f'Continuing on {current_state} {input_string[0]} to {destinations}')
 
             # Runs through all the resulting states from character transitions.
-            destinations = self.transition_function[(current_state, input_string[0])]
-            logging.debug('Destination: ' + str(destinations))
             results = [
                 self.run_nfa(input_string[1:], destination, path.copy())
                 for destination in destinations
@@ -0,0 +1,141 @@
+from automatoncache import AutomatonCache
+from collections import deque
+from lazydfa import LazyDFA
+from matchengine import MatchEngine
+from matchstats import MatchStats
+from multiprocessing import Pool
+from patterncache import PATTERN_CACHE
+from regexresult import RegexResult
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+def _initialize_worker(cache_directory: Optional[str], pattern_cache_size: int = 512,
+                       lazy_dfa_cache_size: int = LazyDFA.DEFAULT_MAX_CACHE_BYTES) -> None:
+    """
+    _initialize_worker
+    Sets up the pattern cache of a worker process like the one of the main process.
+
+    :param cache_directory: The directory of the automaton cache (or None if there is none).
+    :param pattern_cache_size: The maximum number of compiled patterns to keep.
+    :param lazy_dfa_cache_size: The memory limit (in bytes) of the cache of each lazy DFA.
+    """
+
+    PATTERN_CACHE.max_size = pattern_cache_size
+    PATTERN_CACHE.lazy_dfa_cache_size = lazy_dfa_cache_size
+    if cache_directory is not None:
+        PATTERN_CACHE.automaton_cache = AutomatonCache(cache_directory)
+
+
+def _run_test_string_chunk(regular_expression: str, test_strings: List[str], engine_value: str,
+                           collect_stats: bool) -> Tuple[List[Optional[bool]], Optional[dict]]:
+    """
+    _run_test_string_chunk
+    Runs a chunk of test strings through a regex (in a worker process).
+    Each worker compiles a regex once, through its own pattern cache.
+
+    :param regular_expression: The regular expression.
+    :param test_strings: The test strings to run.
+    :param engine_value: The value of the MatchEngine to use (enums are passed by value).
+    :param collect_stats: True to collect counters for the chunk.
+    :return: The result for each test string (in the same order),
+             and the counters as a dictionary (or None if they weren't collected).
+    """
+
+    regex_result = RegexResult(regular_expression, {
+        test_string: None for test_string in test_strings
+    })
+    regex_result.run_test_strings(MatchEngine(engine_value), collect_stats)
+    stats = regex_result.stats.convert_match_stats_to_json() if collect_stats else None
+    return list(regex_result.test_strings_in_language.values()), stats
+
+
+class ParallelRunner:
+    """
+    ParallelRunner
+    Class that runs the test strings of RegexResult objects on a pool of worker processes.
+    Large lists of test strings are split into chunks, and results are yielded in input order.
+    """
+
+    def __init__(self, number_of_workers: int, engine: MatchEngine, chunk_size: int = 1000,
+                 collect_stats: bool = False):
+        """
+        __init__
+        Creates a ParallelRunner object.
+
+        :param number_of_workers: The number of worker processes.
+        :param engine: The engine used to run the test strings.
+        :param chunk_size: The maximum number of test strings sent to a worker at a time.
+        :param collect_stats: True to collect counters (summed over the chunks of each regex).
+        """
+
+        self.number_of_workers = number_of_workers
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.collect_stats = collect_stats
+
+        # Bounds the number of chunks in flight, so the input is still read incrementally.
+        self.max_pending_chunks = 4 * number_of_workers
+
+    def run(self, regex_results: Iterable[RegexResult]) -> Iterator[RegexResult]:
+        """
+        run
+        Runs the test strings of each RegexResult on the pool and yields the RegexResults
+        (with their test strings run) in the order they were given.
+
+        :param regex_results: The RegexResult objects to go through.
+        :return: An iterator of the RegexResult objects.
+        """
+
+        automaton_cache = PATTERN_CACHE.automaton_cache
+        cache_directory = automaton_cache.cache_directory if automaton_cache is not None else None
+
+        with Pool(self.number_of_workers, _initialize_worker,
+                  (cache_directory, PATTERN_CACHE.max_size,
+                   PATTERN_CACHE.lazy_dfa_cache_size)) as pool:
+            pending = deque()
+            number_of_pending_chunks = 0
+
+            for regex_result in regex_results:
+                test_strings = list(regex_result.test_strings_in_language)
+                chunks = [
+                    pool.apply_async(_run_test_string_chunk, (
+                        regex_result.regular_expression,
+                        test_strings[start:start + self.chunk_size],
+                        self.engine.value,
+                        self.collect_stats
+                    ))
+                    for start in range(0, len(test_strings), self.chunk_size)
+                ]
+                pending.append((regex_result, test_strings, chunks))
+                number_of_pending_chunks += len(chunks)
+
+                # Wait for the oldest entries once enough chunks are in flight.
+                while number_of_pending_chunks > self.max_pending_chunks:
+                    number_of_pending_chunks -= len(pending[0][2])
+                    yield self._collect(*pending.popleft())
+
+            while pending:
+                yield self._collect(*pending.popleft())
+
+    def _collect(self, regex_result: RegexResult, test_strings: List[str],
+                 chunks: list) -> RegexResult:
+        """
+        _collect
+        Waits for the chunks of a RegexResult and stores their results in it.
+
+        :param regex_result: The RegexResult the chunks belong to.
+        :param test_strings: The test strings of the RegexResult (in the order they were sent).
+        :param chunks: The pending results (multiprocessing AsyncResult objects) of the chunks.
+        :return: The RegexResult (with its test strings run).
+        """
+
+        chunk_results = [chunk.get() for chunk in chunks]
+        results = [result for results, _ in chunk_results for result in results]
+        for test_string, result in zip(test_strings, results):
+            regex_result.test_strings_in_language[test_string] = result
+
+        if self.collect_stats:
+            regex_result.stats = MatchStats()
+            for _, stats in chunk_results:
+                regex_result.stats.add(MatchStats.from_json(stats), same_regex=True)
+        return regex_result
@@ -0,0 +1,197 @@
+from characterset import CharacterSet
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from typing import Dict, List, Optional, Tuple
+
+
+# Facts known about a node: whether it matches the empty string, the minimum and maximum length
+# of its strings (None if unbounded), and the characters its strings can start and end with.
+NodeFacts = Tuple[bool, int, Optional[int], CharacterSet, CharacterSet]
+
+
+class PatternAnalysis:
+    """
+    PatternAnalysis
+    Class to hold facts about the language of a regex, found from its parse tree: whether it
+    accepts the empty string, the minimum and maximum length of its strings (or unbounded),
+    and the characters its strings can start and end with.
+    They reject most non-matching test strings in constant time, before the engine runs.
+    """
+
+    def __init__(self, nullable: bool, min_length: int, max_length: Optional[int],
+                 first_chars: CharacterSet, last_chars: CharacterSet):
+        """
+        __init__
+        Creates a PatternAnalysis object.
+
+        :param nullable: True if the empty string is in the language (otherwise False).
+        :param min_length: The length of the shortest string in the language.
+        :param max_length: The length of the longest string in the language (None if unbounded).
+        :param first_chars: The characters the non-empty strings in the language can start with.
+        :param last_chars: The characters the non-empty strings in the language can end with.
+        """
+
+        self.nullable = nullable
+        self.min_length = min_length
+        self.max_length = max_length
+        self.first_chars = first_chars
+        self.last_chars = last_chars
+
+    @staticmethod
+    def from_tree(tree: RegexNode) -> 'PatternAnalysis':
+        """
+        from_tree
+        Finds the facts about the language of a parse tree
+        (walked in post-order with an explicit stack).
+
+        :param tree: The root of the parse tree.
+        :return: The PatternAnalysis object.
+        """
+
+        stack = [(tree, False)]
+        facts: List[NodeFacts] = []
+        literal_sets: Dict[str, CharacterSet] = {}
+        while stack:
+            node, children_done = stack.pop()
+            node_type = node.node_type
+            if node_type == RegexNodeType.LITERAL:
+                chars = literal_sets.get(node.value)
+                if chars is None:
+                    chars = literal_sets[node.value] = CharacterSet.from_chars(node.value)
+                facts.append((False, 1, 1, chars, chars))
+                continue
+            elif node_type == RegexNodeType.CHARACTER_CLASS:
+                facts.append((False, 1, 1, node.value, node.value))
+                continue
+            elif node_type == RegexNodeType.EMPTY:
+                facts.append((True, 0, 0, CharacterSet(), CharacterSet()))
+                continue
+            elif not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+                continue
+
+            number_of_children = len(node.children)
+            child_facts = facts[len(facts) - number_of_children:]
+            del facts[len(facts) - number_of_children:]
+
+            if node_type == RegexNodeType.CONCATENATION:
+                facts.append(PatternAnalysis._concatenation_facts(child_facts))
+            elif node_type == RegexNodeType.UNION:
+                max_lengths = [child[2] for child in child_facts]
+                facts.append((
+                    any(child[0] for child in child_facts),
+                    min(child[1] for child in child_facts),
+                    None if None in max_lengths else max(max_lengths),
+                    CharacterSet.union(child[3] for child in child_facts),
+                    CharacterSet.union(child[4] for child in child_facts)
+                ))
+            else:
+                nullable, min_length, max_length, first_chars, last_chars = child_facts[0]
+                if node_type != RegexNodeType.OPTIONAL and max_length != 0:
+                    # Repeating a non-empty string has no maximum length.
+                    max_length = None
+                if node_type != RegexNodeType.PLUS:
+                    nullable, min_length = True, 0
+                facts.append((nullable, min_length, max_length, first_chars, last_chars))
+
+        return PatternAnalysis(*facts[0])
+
+    @staticmethod
+    def _concatenation_facts(child_facts: List[NodeFacts]) -> NodeFacts:
+        """
+        _concatenation_facts
+        Finds the facts about a concatenation from the facts about its items.
+
+        :param child_facts: The facts about the items.
+        :return: The facts about the concatenation.
+        """
+
+        max_lengths = [child[2] for child in child_facts]
+
+        # A string can start with the first characters of each item up to the first one that
+        # can't be empty (and end with the last characters of each item after the last one).
+        first_chars = []
+        for child in child_facts:
+            first_chars.append(child[3])
+            if not child[0]:
+                break
+        last_chars = []
+        for child in reversed(child_facts):
+            last_chars.append(child[4])
+            if not child[0]:
+                break
+
+        return (
+            all(child[0] for child in child_facts),
+            sum(child[1] for child in child_facts),
+            None if None in max_lengths else sum(max_lengths),
+            CharacterSet.union(first_chars),
+            CharacterSet.union(last_chars)
+        )
+
+    def decide(self, test_string: str) -> Optional[bool]:
+        """
+        decide
+        Decides a test string in constant time from the facts about the language, if they are
+        enough to.
+
+        :param test_string: The string to check.
+        :return: False if the string is not in the language, True if it is the empty string and
+                 the language has it, and None if the engine has to run it.
+        """
+
+        if not test_string:
+            return self.nullable
+        length = len(test_string)
+        if length < self.min_length or (self.max_length is not None and length > self.max_length):
+            return False
+        if test_string[0] not in self.first_chars or test_string[-1] not in self.last_chars:
+            return False
+        return None
+
+    def convert_pattern_analysis_to_json(self) -> dict:
+        """
+        convert_pattern_analysis_to_json
+        Returns a dictionary representing a JSON object.
+
+        :return: A dictionary of the facts (a maximum length of None is unbounded,
+                 and the character sets are lists of [first, last] code point intervals).
+        """
+
+        return {
+            'nullable': self.nullable,
+            'min_length': self.min_length,
+            'max_length': self.max_length,
+            'first_chars': [list(interval) for interval in self.first_chars.intervals],
+            'last_chars': [list(interval) for interval in self.last_chars.intervals]
+        }
+
+    @staticmethod
+    def from_json(json_object: dict) -> 'PatternAnalysis':
+        """
+        from_json
+        Creates a PatternAnalysis object from a dictionary written by
+        convert_pattern_analysis_to_json.
+
+        :param json_object: The dictionary of facts.
+        :return: The PatternAnalysis object.
+        """
+
+        return PatternAnalysis(json_object['nullable'], json_object['min_length'],
+                               json_object['max_length'],
+                               CharacterSet(map(tuple, json_object['first_chars'])),
+                               CharacterSet(map(tuple, json_object['last_chars'])))
+
+    def __str__(self) -> str:
+        """
+        __str__
+        Creates a string summarizing the facts (e.g. for logging).
+
+        :return: The string summarizing the facts.
+        """
+
+        max_length = 'unbounded' if self.max_length is None else self.max_length
+        return (f'length {self.min_length} to {max_length}, '
+                f'{"accepts" if self.nullable else "rejects"} the empty string, '
+                f'first characters {self.first_chars}, last characters {self.last_chars}')
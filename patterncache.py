@@ -0,0 +1,125 @@
+import threading
+
+from collections import OrderedDict
+from compiledregex import CompiledRegex
+from lazydfa import LazyDFA
+from transformation import Transform
+from typing import Optional
+
+
+class PatternCache:
+    """
+    PatternCache
+    Bounded cache of compiled regular expressions (keyed by the pattern text).
+    The least recently used pattern is evicted when the cache is full.
+    Lookups are locked, so the cache can be shared by threads (e.g. of an AsyncMatcher).
+    """
+
+    def __init__(self, max_size: int = 512,
+                 lazy_dfa_cache_size: int = LazyDFA.DEFAULT_MAX_CACHE_BYTES):
+        """
+        __init__
+        Creates a PatternCache object.
+
+        :param max_size: The maximum number of compiled patterns to keep.
+        :param lazy_dfa_cache_size: The memory limit (in bytes) of the cache of each lazy DFA
+                                    of the compiled patterns.
+        """
+
+        self.max_size = max_size
+        self.lazy_dfa_cache_size = lazy_dfa_cache_size
+
+        # Compiled automata are also loaded from (and saved to) this AutomatonCache, if it is set.
+        self.automaton_cache = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._compiled_patterns: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, regular_expression: str) -> Optional[CompiledRegex]:
+        """
+        get
+        Returns the compiled regular expression, compiling it on a cache miss.
+        Regular expressions that fail to compile are cached as None.
+
+        :param regular_expression: The regular expression to compile.
+        :return: The CompiledRegex object (or None if the regular expression is invalid).
+        """
+
+        with self._lock:
+            if regular_expression in self._compiled_patterns:
+                self.hits += 1
+                self._compiled_patterns.move_to_end(regular_expression)
+                return self._compiled_patterns[regular_expression]
+
+            self.misses += 1
+            compiled_regex = self._compile(regular_expression)
+            self._compiled_patterns[regular_expression] = compiled_regex
+            if len(self._compiled_patterns) > self.max_size:
+                self._compiled_patterns.popitem(last=False)
+                self.evictions += 1
+
+            return compiled_regex
+
+    def _compile(self, regular_expression: str) -> Optional[CompiledRegex]:
+        """
+        _compile
+        Compiles a regular expression to an NFA (epsilon-free, unless that is too costly)
+        (or loads it from the automaton cache, if there is one).
+
+        :param regular_expression: The regular expression to compile.
+        :return: The CompiledRegex object (or None if the regular expression is invalid).
+        """
+
+        if self.automaton_cache is not None:
+            nfa = self.automaton_cache.load_nfa(regular_expression)
+            if nfa is not None:
+                return CompiledRegex(regular_expression, nfa, self.automaton_cache,
+                                     lazy_dfa_cache_size=self.lazy_dfa_cache_size)
+
+        transform = Transform()
+        nfa = transform.transform_to_nfa(regular_expression)
+        if nfa is None:
+            return None
+
+        # Compute the epsilon closures once, so matching only follows character transitions
+        # (the NFA keeps its epsilon transitions if the epsilon-free NFA would be too large).
+        nfa.remove_epsilon_transitions()
+        if self.automaton_cache is not None:
+            self.automaton_cache.save_nfa(regular_expression, nfa)
+        return CompiledRegex(regular_expression, nfa, self.automaton_cache, transform.parse_tree,
+                             self.lazy_dfa_cache_size)
+
+    def clear(self) -> None:
+        """
+        clear
+        Removes every compiled pattern from the cache (the counters are kept).
+        """
+
+        self._compiled_patterns.clear()
+
+    def __len__(self) -> int:
+        """
+        __len__
+        Returns the number of compiled patterns in the cache.
+
+        :return: The number of compiled patterns.
+        """
+
+        return len(self._compiled_patterns)
+
+    def __str__(self) -> str:
+        """
+        __str__
+        Returns a summary of the cache counters.
+
+        :return: The string representation of the cache.
+        """
+
+        return (f'Pattern cache: {len(self)}/{self.max_size} patterns, {self.hits} hits, '
+                f'{self.misses} misses, {self.evictions} evictions')
+
+
+# Process-wide cache shared by regular mode, batch mode and test mode.
+PATTERN_CACHE = PatternCache()
@@ -0,0 +1,223 @@
+import sys
+
+from alphabet import Alphabet
+from array import array
+from lazydfa import LazyDFA
+from nfa import EPSILON_CLASS, NFA
+from patterncache import PATTERN_CACHE
+from typing import Dict, FrozenSet, List, Optional
+
+
+class PatternSet(LazyDFA):
+    """
+    PatternSet
+    Class that combines many regular expressions into one automaton (like RE2::Set).
+    One pass over a string reports every pattern that accepts it, so the cost per string
+    depends on its length rather than on the number of patterns.
+    The combined NFA is the disjoint union of the NFAs of the patterns, over one alphabet
+    that refines the alphabets of every pattern, and it is run as a LazyDFA (with the same
+    memory-bounded cache and NFA fallback) whose states are tagged with the IDs of the patterns
+    they accept.
+    """
+
+    def __init__(self, regular_expressions: List[str],
+                 max_cache_bytes: int = LazyDFA.DEFAULT_MAX_CACHE_BYTES):
+        """
+        __init__
+        Creates a PatternSet object. The ID of a pattern is its index in regular_expressions.
+        Patterns that fail to compile never match.
+
+        :param regular_expressions: The regular expressions to combine.
+        :param max_cache_bytes: The memory limit (in bytes) of the cached DFA states,
+                                before the cache is flushed.
+        """
+
+        self.regular_expressions = regular_expressions
+        self._nfas: List[Optional[NFA]] = []
+        for regular_expression in regular_expressions:
+            compiled_regex = PATTERN_CACHE.get(regular_expression)
+            self._nfas.append(compiled_regex.nfa if compiled_regex is not None else None)
+
+        # Combined state g is a state of the NFA of pattern state_patterns[g]
+        # (state 0 is the initial state, with an epsilon transition to each pattern).
+        self._state_patterns = array('i', [-1])
+        self._matches: List[FrozenSet[int]] = []
+        self._initial_steps: Dict[int, FrozenSet[int]] = {}
+        super().__init__(self._combine_nfas(), max_cache_bytes)
+
+    def _combine_nfas(self) -> NFA:
+        """
+        _combine_nfas
+        Builds the disjoint union of the NFAs of the patterns. Each class of a pattern's
+        alphabet is a union of classes of the combined alphabet, so each of its transitions
+        becomes a transition on each of those classes.
+
+        :return: The combined NFA.
+        """
+
+        patterns = [
+            (pattern_id, nfa, nfa.alphabet.class_sets())
+            for pattern_id, nfa in enumerate(self._nfas) if nfa is not None
+        ]
+        alphabet = Alphabet(
+            class_set for _, _, class_sets in patterns for class_set in class_sets[1:]
+        )
+
+        combined_nfa = NFA()
+        combined_nfa.initialize_nfa(alphabet)
+        for pattern_id, nfa, class_sets in patterns:
+            offset = combined_nfa.number_of_states
+            combined_nfa.number_of_states += nfa.number_of_states
+            combined_nfa.accepting_states |= nfa.accepting_states << offset
+            self._state_patterns.extend([pattern_id] * nfa.number_of_states)
+            combined_nfa.add_class_transition(
+                combined_nfa.initial_state, EPSILON_CLASS, offset + nfa.initial_state
+            )
+
+            # The combined classes of each class of the pattern (epsilon stays epsilon).
+            combined_classes = [[EPSILON_CLASS]] + [
+                alphabet.classes_of(class_set) for class_set in class_sets[1:]
+            ]
+            for state in range(nfa.number_of_states):
+                for symbol_class in range(nfa.number_of_symbols):
+                    for destination in nfa.class_destinations(state, symbol_class):
+                        for combined_class in combined_classes[symbol_class]:
+                            combined_nfa.add_class_transition(
+                                offset + state, combined_class, offset + destination
+                            )
+
+        combined_nfa.build_transition_table()
+        return combined_nfa
+
+    def is_valid(self, pattern_id: int) -> bool:
+        """
+        is_valid
+        Checks if a pattern compiled (patterns that failed to compile never match).
+
+        :param pattern_id: The ID of the pattern.
+        :return: True if the pattern compiled (otherwise False).
+        """
+
+        return self._nfas[pattern_id] is not None
+
+    def number_of_states(self) -> int:
+        """
+        number_of_states
+        Returns the number of states in the combined NFA.
+
+        :return: The number of NFA states.
+        """
+
+        return self.nfa.number_of_states
+
+    def _accepted_patterns(self, state_set: FrozenSet[int]) -> FrozenSet[int]:
+        """
+        _accepted_patterns
+        Returns the IDs of the patterns accepted by a set of combined NFA states.
+
+        :param state_set: The set of combined NFA states.
+        :return: The IDs of the patterns with an accepting state in the set.
+        """
+
+        return frozenset(
+            self._state_patterns[state] for state in state_set if self.nfa.is_accepting(state)
+        )
+
+    def _add_state(self, state_set: FrozenSet[int]) -> int:
+        """
+        _add_state
+        Adds a set of combined NFA states to the cache as a new DFA state,
+        tagged with the IDs of the patterns it accepts.
+
+        :param state_set: The (epsilon closed) set of combined NFA states.
+        :return: The ID of the new DFA state.
+        """
+
+        self._matches.append(self._accepted_patterns(state_set))
+        return super()._add_state(state_set)
+
+    def _state_bytes(self, state_set: FrozenSet[int], transitions: List[Optional[int]]) -> int:
+        """
+        _state_bytes
+        Estimates the memory of a cached DFA state, including its tag
+        (so the cache is flushed before the tags take it over its budget).
+
+        :param state_set: The set of combined NFA states of the DFA state.
+        :param transitions: The transition table of the DFA state.
+        :return: The estimated memory (in bytes).
+        """
+
+        return super()._state_bytes(state_set, transitions) + \
+            sys.getsizeof(self._accepted_patterns(state_set))
+
+    def _flush_cache(self) -> None:
+        """
+        _flush_cache
+        Removes every cached DFA state (and its tag) except the initial one.
+        """
+
+        # Clear in place, since matching_patterns holds references to these lists.
+        self._matches.clear()
+        super()._flush_cache()
+
+    def _simulate_matching_patterns(self, test_string: str) -> FrozenSet[int]:
+        """
+        _simulate_matching_patterns
+        Runs a string through the combined NFA by tracking its set of active states
+        (used once the cache is thrashing).
+
+        :param test_string: The string to run.
+        :return: The IDs of the patterns that accept the string.
+        """
+
+        if not test_string:
+            return self._matches[self._initial_state]
+
+        # The first step (from every pattern at once) is the costly one, so it is kept per class
+        # (at most one set of states per class of the alphabet).
+        symbol_class = self._class_of(test_string[0])
+        states = self._initial_steps.get(symbol_class)
+        if states is None:
+            states = self._initial_steps[symbol_class] = self.nfa.step_states(
+                self._initial_state_set, test_string[0]
+            )
+
+        for char in test_string[1:]:
+            if not states:
+                return frozenset()
+            states = self.nfa.step_states(states, char)
+
+        return self._accepted_patterns(states)
+
+    def matching_patterns(self, test_string: str) -> FrozenSet[int]:
+        """
+        matching_patterns
+        Runs a string through the combined automaton (one pass, a class lookup and a table
+        lookup per character once warm).
+
+        :param test_string: The string to run.
+        :return: The IDs of the patterns that accept the string.
+        """
+
+        if self.fallback_to_nfa:
+            return self._simulate_matching_patterns(test_string)
+
+        self._characters_since_flush += len(test_string)
+        char_classes = self.nfa.alphabet.char_classes
+        class_transitions = self._class_transitions
+        state = self._initial_state
+
+        for char in test_string:
+            symbol_class = char_classes.get(char)
+            if symbol_class is None:
+                symbol_class = self._class_of(char)
+            next_state: Optional[int] = class_transitions[state][symbol_class]
+            if next_state is None:
+                next_state = self._compute_transition(state, symbol_class)
+                if self.fallback_to_nfa:
+                    return self._simulate_matching_patterns(test_string)
+            if next_state == self.DEAD_STATE:
+                return frozenset()
+            state = next_state
+
+        return self._matches[state]
@@ -8,7 +8,8 @@ class RegexChar(Enum):
     """
     RegexChar
     Enumeration of all possible characters in a regular expression.
-    Test strings should only have RegexChar.ALPHANUMERIC characters in it.
+    Literals and character classes only have RegexChar.ALPHANUMERIC characters in them
+    (other characters can only be matched by . or a negated character class).
     """
 
     # Operators
@@ -20,6 +21,12 @@ class RegexChar(Enum):
     # Groups
     GROUP = '()'
 
+    # Character classes ([a-z], [^a-z]) and any character (.)
+    CHARACTER_CLASS = '[]'
+    NEGATION = '^'
+    RANGE = '-'
+    ANY = '.'
+
     # Valid alphanumeric characters
     ALPHANUMERIC = [x for x in string.printable if x.isalnum()]
 
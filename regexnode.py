@@ -0,0 +1,66 @@
+from characterset import CharacterSet
+from regexnodetype import RegexNodeType
+from typing import List, Union
+
+
+class RegexNode:
+    """
+    RegexNode
+    Class to define a node of a regular expression parse tree.
+    """
+
+    __slots__ = ('node_type', 'value', 'children')
+
+    def __init__(self, node_type: RegexNodeType, value: Union[str, CharacterSet] = None,
+                 children: List['RegexNode'] = None):
+        """
+        __init__
+        Creates a new RegexNode.
+
+        :param node_type: The kind of node.
+        :param value: The character of a literal node, the CharacterSet of a character class node
+                      (otherwise None).
+        :param children: The child nodes (an empty list for leaves).
+        """
+
+        self.node_type = node_type
+        self.value = value
+        self.children = children if children is not None else []
+
+    def __str__(self) -> str:
+        """
+        __str__
+        Returns the regular expression represented by the tree rooted at this node.
+
+        :return: The string representation of the node.
+        """
+
+        if self.node_type == RegexNodeType.LITERAL:
+            return self.value
+        elif self.node_type == RegexNodeType.CHARACTER_CLASS:
+            return str(self.value)
+        elif self.node_type == RegexNodeType.EMPTY:
+            return '()'
+        elif self.node_type == RegexNodeType.CONCATENATION:
+            return ''.join(
+                f'({child})' if child.node_type == RegexNodeType.UNION else str(child)
+                for child in self.children
+            )
+        elif self.node_type == RegexNodeType.UNION:
+            return '|'.join(str(child) for child in self.children)
+
+        child = self.children[0]
+        if child.node_type in (RegexNodeType.LITERAL, RegexNodeType.CHARACTER_CLASS,
+                               RegexNodeType.EMPTY):
+            return str(child) + self.node_type.value
+        return f'({child})' + self.node_type.value
+
+    def __repr__(self) -> str:
+        """
+        __repr__
+        Returns what __str__ is set to.
+
+        :return: A string representation of the RegexNode from __str__.
+        """
+
+        return str(self)
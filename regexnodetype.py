@@ -0,0 +1,22 @@
+from enum import Enum
+
+
+class RegexNodeType(Enum):
+    """
+    RegexNodeType
+    Enumeration of the kinds of nodes in a regular expression parse tree.
+    """
+
+    # Leaves
+    LITERAL = 'literal'
+    CHARACTER_CLASS = 'character class'
+    EMPTY = 'empty'
+
+    # Nodes with any number of children
+    CONCATENATION = 'concatenation'
+    UNION = 'union'
+
+    # Operators (nodes with a single child)
+    STAR = '*'
+    PLUS = '+'
+    OPTIONAL = '?'
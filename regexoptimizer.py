@@ -0,0 +1,351 @@
+from characterset import CharacterSet
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from typing import Dict, List, Union
+
+
+# The kinds of nodes that match a single character (their value is the character or CharacterSet).
+CHARACTER_NODE_TYPES = (RegexNodeType.LITERAL, RegexNodeType.CHARACTER_CLASS)
+
+
+class RegexOptimizer:
+    """
+    RegexOptimizer
+    Class to simplify a parse tree (from RegexParser) into an equivalent, smaller one
+    before the automata are built from it:
+    - nested concatenations and unions are flattened (so runs of literals are one concatenation),
+      and empty groups are removed from concatenations,
+    - nested repetitions are collapsed: (a*)*, (a+)*, (a?)* and (a*)? become a*, (a?)+ becomes a*,
+    - duplicate branches of a union are removed, and branches with a common prefix are factored
+      (abc|abd becomes ab(c|d)), with an empty branch turning the rest into an optional,
+    - branches of a union that match a single character are merged into one character class
+      (a|b|[0-9] becomes [ab0-9]).
+    Trees are walked with explicit stacks, so deep trees can't exhaust the call stack.
+    """
+
+    def __init__(self):
+        """
+        __init__
+        Creates a new RegexOptimizer object.
+        """
+
+        # Structural IDs (equal for equal subtrees, and the value of a literal or class) and
+        # nullability (whether the node accepts the empty string) of the nodes they were needed
+        # for, keyed by id(node). The nodes are kept alive in self._nodes, so IDs aren't reused.
+        self._structure_ids: Dict[tuple, int] = {}
+        self._node_ids: Dict[int, Union[int, str]] = {}
+        self._nullable: Dict[int, bool] = {}
+        self._nodes: List[RegexNode] = []
+
+    @staticmethod
+    def count_nodes(tree: RegexNode) -> int:
+        """
+        count_nodes
+        Counts the nodes of a parse tree.
+
+        :param tree: The root of the parse tree.
+        :return: The number of nodes.
+        """
+
+        number_of_nodes = 0
+        nodes_to_visit = [tree]
+        while nodes_to_visit:
+            number_of_nodes += 1
+            nodes_to_visit.extend(nodes_to_visit.pop().children)
+
+        return number_of_nodes
+
+    def optimize(self, tree: RegexNode) -> RegexNode:
+        """
+        optimize
+        Main entry point to simplify a parse tree. The given tree is not modified.
+
+        :param tree: The root of the parse tree.
+        :return: The root of the simplified parse tree.
+        """
+
+        # Post-order walk: a node is simplified once its children have been.
+        # Literals and empty nodes are already simple, so they are reused as is.
+        stack = [(tree, False)]
+        simplified_nodes: List[RegexNode] = []
+        while stack:
+            node, children_done = stack.pop()
+            if not node.children:
+                simplified_nodes.append(node)
+                continue
+            elif not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+                continue
+
+            number_of_children = len(node.children)
+            children = simplified_nodes[len(simplified_nodes) - number_of_children:]
+            del simplified_nodes[len(simplified_nodes) - number_of_children:]
+            simplified_nodes.append(self._simplify(node.node_type, children))
+
+        return simplified_nodes[0]
+
+    def _node_id(self, node: RegexNode) -> Union[int, str, CharacterSet]:
+        """
+        _node_id
+        Returns the structural ID of a node (equal for equal subtrees).
+
+        :param node: The node.
+        :return: The value of a literal or character class node, otherwise an integer ID.
+        """
+
+        if node.node_type in CHARACTER_NODE_TYPES:
+            return node.value
+
+        node_ids = self._node_ids
+        stack = [node]
+        while stack:
+            node_to_identify = stack[-1]
+            if id(node_to_identify) in node_ids:
+                stack.pop()
+                continue
+
+            children = [
+                child for child in node_to_identify.children
+                if child.node_type not in CHARACTER_NODE_TYPES and id(child) not in node_ids
+            ]
+            if children:
+                stack.extend(children)
+                continue
+
+            stack.pop()
+            structure = (node_to_identify.node_type, tuple(
+                child.value if child.node_type in CHARACTER_NODE_TYPES else node_ids[id(child)]
+                for child in node_to_identify.children
+            ))
+            node_ids[id(node_to_identify)] = self._structure_ids.setdefault(
+                structure, len(self._structure_ids)
+            )
+            self._nodes.append(node_to_identify)
+
+        return node_ids[id(node)]
+
+    def _is_nullable(self, node: RegexNode) -> bool:
+        """
+        _is_nullable
+        Checks if a node accepts the empty string.
+
+        :param node: The node.
+        :return: True if the node accepts the empty string (otherwise False).
+        """
+
+        nullable = self._nullable
+        stack = [node]
+        while stack:
+            node_to_check = stack[-1]
+            node_type = node_to_check.node_type
+            if node_type in CHARACTER_NODE_TYPES or id(node_to_check) in nullable:
+                stack.pop()
+                continue
+            if node_type in (RegexNodeType.EMPTY, RegexNodeType.STAR, RegexNodeType.OPTIONAL):
+                nullable[id(node_to_check)] = True
+            else:
+                children = [
+                    child for child in node_to_check.children
+                    if child.node_type not in CHARACTER_NODE_TYPES and id(child) not in nullable
+                ]
+                if children:
+                    stack.extend(children)
+                    continue
+                child_nullable = [
+                    child.node_type not in CHARACTER_NODE_TYPES and nullable[id(child)]
+                    for child in node_to_check.children
+                ]
+                nullable[id(node_to_check)] = (
+                    any(child_nullable) if node_type == RegexNodeType.UNION
+                    else all(child_nullable)
+                )
+            self._nodes.append(node_to_check)
+            stack.pop()
+
+        return node.node_type not in CHARACTER_NODE_TYPES and nullable[id(node)]
+
+    def _simplify(self, node_type: RegexNodeType, children: List[RegexNode]) -> RegexNode:
+        """
+        _simplify
+        Creates the simplified node of a given kind (not a leaf) from its simplified children.
+
+        :param node_type: The kind of node.
+        :param children: The simplified child nodes.
+        :return: The simplified node.
+        """
+
+        if node_type == RegexNodeType.CONCATENATION:
+            return self._make_concatenation(children)
+        elif node_type == RegexNodeType.UNION:
+            return self._make_union(children)
+
+        child = children[0]
+        child_type = child.node_type
+        if child_type == RegexNodeType.EMPTY:
+            return child
+
+        if node_type == RegexNodeType.STAR:
+            # (a*)*, (a+)* and (a?)* are a*.
+            if child_type in (RegexNodeType.STAR, RegexNodeType.PLUS, RegexNodeType.OPTIONAL):
+                return RegexNode(RegexNodeType.STAR, children=child.children)
+        elif node_type == RegexNodeType.PLUS:
+            # (a*)+ is a*, (a+)+ is a+, and (a?)+ is a*.
+            if child_type in (RegexNodeType.STAR, RegexNodeType.PLUS):
+                return child
+            elif child_type == RegexNodeType.OPTIONAL:
+                return RegexNode(RegexNodeType.STAR, children=child.children)
+        else:
+            # An optional node that already accepts the empty string (e.g. (a*)?) is the node.
+            if self._is_nullable(child):
+                return child
+            # (a+)? is a*.
+            elif child_type == RegexNodeType.PLUS:
+                return RegexNode(RegexNodeType.STAR, children=child.children)
+
+        return RegexNode(node_type, children=[child])
+
+    def _make_concatenation(self, items: List[RegexNode]) -> RegexNode:
+        """
+        _make_concatenation
+        Creates a concatenation, flattening nested concatenations and removing empty items.
+
+        :param items: The items to concatenate (simplified nodes).
+        :return: The simplified node.
+        """
+
+        flattened_items = []
+        for item in items:
+            if item.node_type == RegexNodeType.CONCATENATION:
+                flattened_items.extend(item.children)
+            elif item.node_type != RegexNodeType.EMPTY:
+                flattened_items.append(item)
+
+        if not flattened_items:
+            return RegexNode(RegexNodeType.EMPTY)
+        elif len(flattened_items) == 1:
+            return flattened_items[0]
+        return RegexNode(RegexNodeType.CONCATENATION, children=flattened_items)
+
+    def _make_union(self, branches: List[RegexNode]) -> RegexNode:
+        """
+        _make_union
+        Creates a union, flattening nested unions, removing duplicate branches,
+        and factoring the common prefixes of the branches.
+
+        :param branches: The branches of the union (simplified nodes).
+        :return: The simplified node.
+        """
+
+        flattened_branches = []
+        for branch in branches:
+            if branch.node_type == RegexNodeType.UNION:
+                flattened_branches.extend(branch.children)
+            else:
+                flattened_branches.append(branch)
+
+        # Trie of the branches, each one a sequence of items (keyed by structural ID).
+        # A trie node is [edges (ID -> [item, child trie node]), True if a branch ends here].
+        root = [{}, False]
+        for branch in flattened_branches:
+            trie_node = root
+            if branch.node_type == RegexNodeType.CONCATENATION:
+                items = branch.children
+            elif branch.node_type == RegexNodeType.EMPTY:
+                items = []
+            else:
+                items = [branch]
+            for item in items:
+                edges = trie_node[0]
+                item_id = self._node_id(item)
+                if item_id not in edges:
+                    edges[item_id] = [item, [{}, False]]
+                trie_node = edges[item_id][1]
+            trie_node[1] = True
+
+        return self._trie_to_node(root)
+
+    def _trie_to_node(self, root: list) -> RegexNode:
+        """
+        _trie_to_node
+        Creates the node matching every sequence of items in a trie (built by _make_union).
+        Each trie node is the union of its edges (each one an item, followed by the node of its
+        child), made optional if a sequence ends there.
+
+        :param root: The root of the trie.
+        :return: The simplified node.
+        """
+
+        # Post-order walk of the trie. The node of each trie node is built as a list of items
+        # in reverse order, so a chain of single edges is appended to instead of copied.
+        stack = [(root, False)]
+        reversed_sequences: List[List[RegexNode]] = []
+        while stack:
+            trie_node, children_done = stack.pop()
+            edges, ends_here = trie_node
+            if not children_done:
+                stack.append((trie_node, True))
+                stack.extend((child, False) for _, child in reversed(list(edges.values())))
+                continue
+
+            child_sequences = reversed_sequences[len(reversed_sequences) - len(edges):]
+            del reversed_sequences[len(reversed_sequences) - len(edges):]
+            for (item, _), child_sequence in zip(edges.values(), child_sequences):
+                child_sequence.append(item)
+
+            if len(child_sequences) == 1 and not ends_here:
+                reversed_sequences.append(child_sequences[0])
+                continue
+
+            alternatives = []
+            for child_sequence in child_sequences:
+                alternative = self._make_concatenation(child_sequence[::-1])
+                if alternative.node_type == RegexNodeType.UNION:
+                    alternatives.extend(alternative.children)
+                else:
+                    alternatives.append(alternative)
+            if not alternatives:
+                reversed_sequences.append([])
+                continue
+            alternatives = self._merge_character_alternatives(alternatives)
+
+            node = (
+                alternatives[0] if len(alternatives) == 1
+                else RegexNode(RegexNodeType.UNION, children=alternatives)
+            )
+            if ends_here and not self._is_nullable(node):
+                node = RegexNode(RegexNodeType.OPTIONAL, children=[node])
+            reversed_sequences.append([node])
+
+        return self._make_concatenation(reversed_sequences[0][::-1])
+
+    @staticmethod
+    def _merge_character_alternatives(alternatives: List[RegexNode]) -> List[RegexNode]:
+        """
+        _merge_character_alternatives
+        Merges the alternatives of a union that match a single character (literals and character
+        classes) into one character class, which takes the place of the first of them.
+
+        :param alternatives: The alternatives of the union.
+        :return: The alternatives with at most one literal or character class.
+        """
+
+        character_nodes = [
+            alternative for alternative in alternatives
+            if alternative.node_type in CHARACTER_NODE_TYPES
+        ]
+        if len(character_nodes) < 2:
+            return alternatives
+
+        merged_node = RegexNode(RegexNodeType.CHARACTER_CLASS, CharacterSet.union(
+            CharacterSet.from_chars(node.value) if node.node_type == RegexNodeType.LITERAL
+            else node.value
+            for node in character_nodes
+        ))
+        merged_alternatives = []
+        for alternative in alternatives:
+            if alternative.node_type not in CHARACTER_NODE_TYPES:
+                merged_alternatives.append(alternative)
+            elif alternative is character_nodes[0]:
+                merged_alternatives.append(merged_node)
+        return merged_alternatives
@@ -0,0 +1,193 @@
+import logging
+
+from characterset import CharacterSet
+from regexchar import RegexChar
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from typing import List, Optional
+
+
+class RegexParser:
+    """
+    RegexParser
+    Class to parse a regular expression into a parse tree (AST) of RegexNode objects.
+    Supports alphanumeric characters, character classes ([a-z0-9], [^a-z]), . (any character),
+    groups, *, +, ? and |.
+    The regex is parsed in a single pass over its characters with an explicit stack of open groups
+    (linear time, and no recursion, so deeply nested groups are fine).
+    """
+
+    def __init__(self):
+        """
+        __init__
+        Creates a new RegexParser object.
+        """
+
+        self.regex = ''
+        self.position = 0
+
+        # The groups being parsed (the outermost is the whole regex). Each one has its completed
+        # branches (before a union), and the items of the branch being parsed.
+        self._open_branches: List[List[RegexNode]] = []
+        self._open_items: List[List[RegexNode]] = []
+
+    def parse(self, regex: str) -> Optional[RegexNode]:
+        """
+        parse
+        Main entry point to parse a regular expression.
+        Returns either the root of the parse tree or None if an error occurred.
+
+        :param regex: The regular expression to parse.
+        :return: The root RegexNode of the parse tree.
+        """
+
+        if not regex:
+            logging.critical('Empty regex error')
+            return
+
+        self.regex = regex
+        try:
+            tree = self._parse()
+        except ValueError as error_message:
+            logging.critical(error_message)
+            return
+
+        return tree
+
+    def _parse(self) -> RegexNode:
+        """
+        _parse
+        Parses the regex (raises a ValueError if it is invalid).
+
+        :return: The root RegexNode of the parse tree.
+        """
+
+        repeat_operators = {
+            RegexChar.STAR.value, RegexChar.PLUS.value, RegexChar.OPTIONAL.value
+        }
+        opening_group = RegexChar.opening_group()
+        closing_group = RegexChar.closing_group()
+        opening_class = RegexChar.CHARACTER_CLASS.value[0]
+        union = RegexChar.UNION.value
+        any_char = RegexChar.ANY.value
+
+        self._open_branches = [[]]
+        self._open_items = [[]]
+
+        # True if the last item can take a repeat operator (it isn't already repeated).
+        repeatable = False
+        self.position = 0
+        while self.position < len(self.regex):
+            char = self.regex[self.position]
+            if char.isalnum():
+                self._open_items[-1].append(RegexNode(RegexNodeType.LITERAL, char))
+                repeatable = True
+            elif char == any_char:
+                self._open_items[-1].append(
+                    RegexNode(RegexNodeType.CHARACTER_CLASS, CharacterSet.any_char())
+                )
+                repeatable = True
+            elif char == opening_class:
+                self._open_items[-1].append(self._parse_character_class())
+                repeatable = True
+            elif char in repeat_operators:
+                items = self._open_items[-1]
+                if not repeatable:
+                    raise ValueError('Error applying operator: ' + str(char))
+                items[-1] = RegexNode(RegexNodeType(char), children=[items[-1]])
+                repeatable = False
+            elif char == union:
+                self._open_branches[-1].append(self._close_branch(self._open_items[-1]))
+                self._open_items[-1] = []
+                repeatable = False
+            elif char == opening_group:
+                self._open_branches.append([])
+                self._open_items.append([])
+                repeatable = False
+            elif char == closing_group:
+                if len(self._open_items) == 1:
+                    raise ValueError('Error closing group at position ' + str(self.position))
+                group = self._close_group()
+                self._open_items[-1].append(group)
+                repeatable = True
+            else:
+                raise ValueError('Error reading character: ' + str(char))
+            self.position += 1
+
+        self.position = len(self.regex)
+        if len(self._open_items) > 1:
+            raise ValueError('Error closing group at position ' + str(self.position))
+        return self._close_group()
+
+    def _parse_character_class(self) -> RegexNode:
+        """
+        _parse_character_class
+        Parses the character class (like [a-z0-9] or [^a-z]) that starts at the current position,
+        and moves the position to its closing bracket.
+
+        :return: The node of the character class (a literal if it has a single character).
+        """
+
+        start_position = self.position
+        closing_class = RegexChar.CHARACTER_CLASS.value[-1]
+        negated = self.regex.startswith(RegexChar.NEGATION.value, self.position + 1)
+        self.position += 2 if negated else 1
+
+        intervals = []
+        while self.position < len(self.regex) and self.regex[self.position] != closing_class:
+            # A range is two characters with a - between them. A - anywhere else (e.g. before
+            # the ]) is not a range, and is rejected below like any other character that is
+            # not alphanumeric.
+            is_range = self.regex.startswith(RegexChar.RANGE.value, self.position + 1) and \
+                self.regex[self.position + 2:self.position + 3] not in ('', closing_class)
+            first_char = self.regex[self.position]
+            last_char = self.regex[self.position + 2] if is_range else first_char
+            if not first_char.isalnum() or not last_char.isalnum():
+                raise ValueError('Error reading character class at position ' + str(self.position))
+            if first_char > last_char:
+                raise ValueError(f'Error reading character range: {first_char}-{last_char}')
+            intervals.append((ord(first_char), ord(last_char)))
+            self.position += 3 if is_range else 1
+
+        if self.position == len(self.regex):
+            raise ValueError('Error closing character class at position ' + str(self.position))
+        if not intervals:
+            raise ValueError('Empty character class at position ' + str(start_position))
+
+        character_set = CharacterSet(intervals)
+        if negated:
+            character_set = character_set.complement()
+        char = character_set.single_char()
+        if char is not None:
+            return RegexNode(RegexNodeType.LITERAL, char)
+        return RegexNode(RegexNodeType.CHARACTER_CLASS, character_set)
+
+    def _close_group(self) -> RegexNode:
+        """
+        _close_group
+        Removes the innermost open group and returns its node.
+
+        :return: The node of the group (a union if it has more than one branch).
+        """
+
+        branches = self._open_branches.pop()
+        branches.append(self._close_branch(self._open_items.pop()))
+        if len(branches) == 1:
+            return branches[0]
+        return RegexNode(RegexNodeType.UNION, children=branches)
+
+    @staticmethod
+    def _close_branch(items: List[RegexNode]) -> RegexNode:
+        """
+        _close_branch
+        Returns the node of a branch (the concatenation of its items).
+
+        :param items: The items of the branch.
+        :return: The node of the branch (an empty node if there are no items).
+        """
+
+        if not items:
+            return RegexNode(RegexNodeType.EMPTY)
+        elif len(items) == 1:
+            return items[0]
+        return RegexNode(RegexNodeType.CONCATENATION, children=items)
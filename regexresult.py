@@ -1,7 +1,14 @@
 import logging
+import time
 
-from typing import Dict
+from compiledregex import CompiledRegex
+from matchengine import MatchEngine
+from matchstats import MatchStats
+from patterncache import PATTERN_CACHE
+from regexoptimizer import RegexOptimizer
+from regexparser import RegexParser
 from transformation import Transform
+from typing import Dict, List, Optional
 
 
 class RegexResult:
@@ -23,37 +30,139 @@ class RegexResult:
         self.regular_expression = regular_expression
         self.test_strings_in_language = test_strings_in_language
 
+        # Counters for the last run of the test strings (None unless stats were requested).
+        self.stats: Optional[MatchStats] = None
+
     def convert_regex_result_to_json(self) -> dict:
         """
         convert_regex_result_to_json
         Returns a dictionary representing a JSON object.
+        The counters are included (as "stats") if they were collected.
 
         :return: A dictionary that represents the JSON to write.
         """
 
         # Return a dictionary that represents an object in the JSON.
-        return {
+        json_object = {
             "regex": self.regular_expression,
             "strings": self.test_strings_in_language
         }
+        if self.stats is not None:
+            json_object["stats"] = self.stats.convert_match_stats_to_json()
+        return json_object
 
-    def run_test_strings(self) -> None:
+    def run_test_strings(self, engine: MatchEngine = MatchEngine.AUTO,
+                         collect_stats: bool = False) -> None:
         """
         run_test_strings
         Run the test strings through the regex by converting to an equivalent NFA.
+        The compiled NFA is looked up in (or added to) the process-wide pattern cache.
+
+        :param engine: The engine used to run the test strings (defaults to MatchEngine.AUTO).
+        :param collect_stats: True to run the instrumented engines and store counters in self.stats.
         """
 
-        # build equivalent NFA
-        nfa = Transform().transform_to_nfa(self.regular_expression)
-        if nfa is None:
+        if collect_stats:
+            self._run_test_strings_with_stats(engine)
+            return
+
+        # Get the equivalent NFA (compiled once per regex and shared through the pattern cache).
+        compiled_regex = PATTERN_CACHE.get(self.regular_expression)
+        if compiled_regex is None:
             logging.critical('Error transforming the NFA!')
             return
 
-        logging.debug('Transitions: ' + str(nfa.transition_function))
-        logging.debug('Initial state: ' + str(nfa.initial_state))
-        logging.debug('Accepting states: ' + str(nfa.accepting_states))
+        nfa = compiled_regex.nfa
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug('Transitions: ' + str(nfa.transition_list()))
+            logging.debug('Initial state: ' + str(nfa.initial_state))
+            logging.debug('Accepting states: ' + str(nfa.accepting_state_list()))
+
+        test_strings = self._run_prefilters(compiled_regex)
+
+        if engine == MatchEngine.PREFIX_SHARING:
+            self.test_strings_in_language.update(
+                compiled_regex.matches_with_prefix_sharing(test_strings)
+            )
+            return
 
         # run tests on NFA
-        for test_string in self.test_strings_in_language:
+        for test_string in test_strings:
             logging.debug('Testing string: ' + str(test_string))
-            self.test_strings_in_language[test_string] = nfa.run_nfa(test_string, nfa.initial_state)
+            self.test_strings_in_language[test_string] = compiled_regex.matches(test_string, engine)
+
+        if engine == MatchEngine.LAZY_DFA:
+            lazy_dfa = compiled_regex.lazy_dfa
+            logging.debug(f'Lazy DFA: {lazy_dfa.number_of_cached_states()} cached states '
+                          f'({lazy_dfa.cache_size()} bytes), '
+                          f'{lazy_dfa.cache_flushes} cache flushes')
+
+    def _run_test_strings_with_stats(self, engine: MatchEngine) -> None:
+        """
+        _run_test_strings_with_stats
+        Run the test strings through the regex like run_test_strings,
+        with the instrumented engines, and store the counters in self.stats.
+
+        :param engine: The engine used to run the test strings.
+        """
+
+        self.stats = MatchStats()
+
+        pattern_cache_hits, pattern_cache_misses = PATTERN_CACHE.hits, PATTERN_CACHE.misses
+        start_time = time.perf_counter()
+        compiled_regex = PATTERN_CACHE.get(self.regular_expression)
+        self.stats.compile_seconds = time.perf_counter() - start_time
+        self.stats.pattern_cache_hits = PATTERN_CACHE.hits - pattern_cache_hits
+        self.stats.pattern_cache_misses = PATTERN_CACHE.misses - pattern_cache_misses
+
+        if compiled_regex is None:
+            logging.critical('Error transforming the NFA!')
+            return
+
+        parse_tree = RegexParser().parse(self.regular_expression)
+        optimized_parse_tree = RegexOptimizer().optimize(parse_tree)
+        self.stats.parse_tree_nodes = RegexOptimizer.count_nodes(parse_tree)
+        self.stats.optimized_parse_tree_nodes = RegexOptimizer.count_nodes(optimized_parse_tree)
+        self.stats.nfa_states = Transform.count_states(parse_tree)
+        self.stats.optimized_nfa_states = Transform.count_states(optimized_parse_tree)
+        self.stats.pattern_analysis = compiled_regex.analysis.convert_pattern_analysis_to_json()
+
+        start_time = time.perf_counter()
+        test_strings = self._run_prefilters(compiled_regex)
+        self.stats.prefiltered_strings = len(self.test_strings_in_language) - len(test_strings)
+        self.stats.strings += self.stats.prefiltered_strings
+        for test_string in test_strings:
+            self.test_strings_in_language[test_string] = compiled_regex.matches_with_stats(
+                test_string, engine, self.stats
+            )
+        self.stats.match_seconds = time.perf_counter() - start_time
+
+        logging.debug(f'Stats for {self.regular_expression}: {self.stats}')
+
+    def _run_prefilters(self, compiled_regex: CompiledRegex) -> List[str]:
+        """
+        _run_prefilters
+        Decides the test strings the prefilters of the regex can (e.g. strings too short,
+        or without a required substring), so only the other strings are run through the engine.
+
+        :param compiled_regex: The compiled regular expression.
+        :return: The test strings that still have to be run.
+        """
+
+        prefilters = compiled_regex.prefilters
+        if not prefilters:
+            return list(self.test_strings_in_language)
+
+        test_strings = []
+        for test_string in self.test_strings_in_language:
+            for prefilter in prefilters:
+                result = prefilter.decide(test_string)
+                if result is not None:
+                    self.test_strings_in_language[test_string] = result
+                    break
+            else:
+                test_strings.append(test_string)
+
+        logging.debug(f'Prefilters decided {len(self.test_strings_in_language) - len(test_strings)}'
+                      f' of {len(self.test_strings_in_language)} strings')
+        return test_strings
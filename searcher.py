@@ -0,0 +1,170 @@
+from lazydfa import LazyDFA
+from nfa import NFA
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+class Searcher:
+    """
+    Searcher
+    Class that finds the substrings of a text accepted by an NFA (unanchored search).
+    Matches are leftmost-longest and don't overlap.
+    An unanchored lazy DFA of the reversed NFA is run once, right to left over the text,
+    to mark every position where a match starts. The forward lazy DFA then only runs from
+    those positions, to find the end of each match. The scans share the longest match end of
+    each (position, DFA state) pair they reach, so no pair is scanned twice and the search takes
+    linear time (at most the number of DFA states per character).
+    A text read in blocks is searched one window at a time, so memory is bounded by the block
+    size and the length of the text a match could still span (rather than by the whole text).
+    """
+
+    def __init__(self, nfa: NFA, max_cache_bytes: int = LazyDFA.DEFAULT_MAX_CACHE_BYTES):
+        """
+        __init__
+        Creates a Searcher object from an existing NFA.
+
+        :param nfa: The NFA to search with.
+        :param max_cache_bytes: The memory limit (in bytes) of the cache of each lazy DFA.
+        """
+
+        self.nfa = nfa
+        self.max_cache_bytes = max_cache_bytes
+        self.forward_dfa = LazyDFA(nfa, max_cache_bytes)
+        self.reverse_dfa = LazyDFA(nfa.reverse(), max_cache_bytes, unanchored=True)
+
+        # Accepts the reverse of every prefix of an accepted string, to find how far back from
+        # the end of a window a match could still start (built the first time it is needed).
+        self._prefix_dfa: Optional[LazyDFA] = None
+
+    def match_starts(self, text: str) -> bytearray:
+        """
+        match_starts
+        Marks every position of the text where an accepted substring starts (in one pass).
+
+        :param text: The text to search.
+        :return: A bytearray where item i is 1 if an accepted substring starts at position i
+                 (otherwise 0), with len(text) + 1 items.
+        """
+
+        return self._match_starts_of_reversed(text[::-1])
+
+    def _match_starts_of_reversed(self, reversed_text: str) -> bytearray:
+        """
+        _match_starts_of_reversed
+        Marks every position of a text where an accepted substring starts, given the text
+        reversed.
+
+        :param reversed_text: The text to search, reversed.
+        :return: A bytearray where item i is 1 if an accepted substring starts at position i
+                 of the text (otherwise 0), with len(reversed_text) + 1 items.
+        """
+
+        # The reverse DFA accepts after reading text[i:] backwards if a match starts at i.
+        match_starts = self.reverse_dfa.accepting_positions(reversed_text)
+        match_starts.reverse()
+        return match_starts
+
+    def _unresolved_start(self, reversed_window: str) -> int:
+        """
+        _unresolved_start
+        Finds the first position of a window where a match could start and continue past the
+        end of the window (the suffix from there is a prefix of an accepted string).
+        Only the part of the window the prefix DFA can still read backwards is scanned.
+
+        :param reversed_window: The window, reversed.
+        :return: The first such position (the length of the window if there is none).
+        """
+
+        if self._prefix_dfa is None:
+            self._prefix_dfa = LazyDFA(self.nfa.reverse(prefixes=True), self.max_cache_bytes)
+
+        longest_prefix = self._prefix_dfa.longest_match(reversed_window, 0)
+        return len(reversed_window) - max(longest_prefix, 0)
+
+    def _find_matches(self, text: str, reversed_text: str,
+                      resolved: int) -> Iterator[Tuple[int, int]]:
+        """
+        _find_matches
+        Finds every (leftmost-longest, non overlapping) accepted substring of a text that
+        starts before a given position.
+
+        :param text: The text to search.
+        :param reversed_text: The text, reversed.
+        :param resolved: The position matches must start before.
+        :return: An iterator of the (start, end) positions of the matches, from left to right.
+        """
+
+        match_starts = self._match_starts_of_reversed(reversed_text)
+        known_ends: Dict[Tuple[int, int], int] = {}
+        position = match_starts.find(1, 0, resolved)
+        while position != -1:
+            end = self.forward_dfa.longest_match(text, position, known_ends)
+            yield position, end
+            position = match_starts.find(1, end if end > position else position + 1, resolved)
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        finditer
+        Finds every (leftmost-longest, non overlapping) accepted substring of the text.
+        An empty match is only reported where no longer match starts.
+
+        :param text: The text to search.
+        :return: An iterator of the (start, end) positions of the matches, from left to right.
+        """
+
+        return self._find_matches(text, text[::-1], len(text) + 1)
+
+    def finditer_blocks(self, blocks: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+        """
+        finditer_blocks
+        Finds every (leftmost-longest, non overlapping) accepted substring of a text read in
+        blocks (e.g. from a file), with the same matches as finditer on the whole text.
+        Each window is the text not searched yet plus new blocks. Matches are reported up to
+        the first position where a match could continue past the window, and the text from
+        there is carried into the next window (which reads at least twice as much text as is
+        carried, so the search still takes linear time).
+
+        :param blocks: The blocks of the text, in order.
+        :return: An iterator of the (start, end) positions of the matches in the whole text,
+                 with the text of each match, from left to right.
+        """
+
+        blocks = iter(blocks)
+        window = ''
+        window_start = 0
+        at_end = False
+
+        while not at_end:
+            window_blocks = [window]
+            window_length = carried_length = len(window)
+            while window_length == carried_length or window_length < 2 * carried_length:
+                block = next(blocks, None)
+                if block is None:
+                    at_end = True
+                    break
+                window_blocks.append(block)
+                window_length += len(block)
+            window = ''.join(window_blocks)
+            del window_blocks
+
+            reversed_window = window[::-1]
+            resolved = len(window) + 1 if at_end else self._unresolved_start(reversed_window)
+            search_start = 0
+            for start, end in self._find_matches(window, reversed_window, resolved):
+                yield window_start + start, window_start + end, window[start:end]
+                search_start = end if end > start else start + 1
+
+            # Nothing starts between the last match and the unresolved text.
+            carry_start = max(search_start, resolved)
+            window = window[carry_start:]
+            window_start += carry_start
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """
+        search
+        Finds the first (leftmost-longest) accepted substring of the text.
+
+        :param text: The text to search.
+        :return: The (start, end) positions of the match (or None if there is no match).
+        """
+
+        return next(self.finditer(text), None)
@@ -0,0 +1,122 @@
+import os
+import random
+import sys
+
+import pytest
+
+from typing import Callable, List, Tuple
+
+# The modules of the program are at the top of the repository (it runs as a directory).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patterncache import PatternCache  # noqa: E402
+
+# Characters of the test strings (é is only matched by . and the negated classes).
+TEST_STRING_CHARACTERS = 'abcdé'
+
+# Atoms of the generated regexes (every one means the same thing to the re module).
+REGEX_ATOMS = ['a', 'b', 'c', '.', '[a-c]', '[^b]', '[ab]', '[bd]', '[^a-c]', '[a-b0-9]']
+
+# Maximum depth of nested repetitions in the generated regexes.
+MAX_NESTED_REPETITIONS = 2
+
+
+@pytest.fixture
+def pattern_cache() -> PatternCache:
+    """
+    pattern_cache
+    Returns an empty PatternCache, so tests don't share compiled regexes.
+    """
+
+    return PatternCache()
+
+
+def _random_regex(rng: random.Random, depth: int = 0, enclosing_repetitions: int = 0) -> str:
+    """
+    _random_regex
+    Generates a random regular expression in the syntax shared by this program and re.
+    Repetitions are nested at most MAX_NESTED_REPETITIONS deep, since re takes exponential
+    time on deeper ones (like ((a|b*)+)*).
+
+    :param rng: The random number generator.
+    :param depth: The depth of the regex being generated (deeper ones are more often atoms).
+    :param enclosing_repetitions: The number of repetitions (*, + or ?) around the regex.
+    :return: The regular expression.
+    """
+
+    repeated = rng.random() < 0.3 and enclosing_repetitions < MAX_NESTED_REPETITIONS
+    child_repetitions = enclosing_repetitions + repeated
+
+    choice = rng.random()
+    if depth > 3 or choice < 0.35:
+        regex = rng.choice(REGEX_ATOMS)
+    elif choice < 0.5:
+        regex = _random_regex(rng, depth + 1, child_repetitions) + \
+            _random_regex(rng, depth + 1, child_repetitions)
+    elif choice < 0.65:
+        regex = '(' + _random_regex(rng, depth + 1, child_repetitions) + '|' + \
+            _random_regex(rng, depth + 1, child_repetitions) + ')'
+    elif choice < 0.7:
+        regex = '()'
+    else:
+        regex = '(' + _random_regex(rng, depth + 1, child_repetitions) + ')'
+
+    if repeated:
+        is_class = regex.startswith('[') and regex.endswith(']') and regex.count('[') == 1
+        if len(regex) > 1 and not is_class and not (regex[0] == '(' and regex[-1] == ')'):
+            regex = '(' + regex + ')'
+        regex += rng.choice('*+?')
+    return regex
+
+
+@pytest.fixture
+def random_regex() -> Callable[[random.Random], str]:
+    """
+    random_regex
+    Returns a function that generates a random regular expression (given a random number
+    generator) in the syntax shared by this program and re.
+    """
+
+    return _random_regex
+
+
+@pytest.fixture
+def random_strings() -> Callable[[random.Random, int, int], List[str]]:
+    """
+    random_strings
+    Returns a function that generates random test strings (given a random number generator,
+    the number of strings and their maximum length).
+    """
+
+    def generate(rng: random.Random, number_of_strings: int, max_length: int) -> List[str]:
+        return [
+            ''.join(rng.choice(TEST_STRING_CHARACTERS) for _ in range(rng.randint(0, max_length)))
+            for _ in range(number_of_strings)
+        ]
+
+    return generate
+
+
+@pytest.fixture
+def leftmost_longest_matches() -> Callable[[Callable[[str], bool], str], List[Tuple[int, int]]]:
+    """
+    leftmost_longest_matches
+    Returns a brute-force reference for unanchored search: given a function that tells if a
+    whole string is accepted and a text, it returns the (start, end) positions of the
+    leftmost-longest, non overlapping matches (an empty match only where no longer one starts).
+    """
+
+    def find(is_accepted: Callable[[str], bool], text: str) -> List[Tuple[int, int]]:
+        matches = []
+        position = 0
+        while position <= len(text):
+            ends = [end for end in range(position, len(text) + 1)
+                    if is_accepted(text[position:end])]
+            if not ends:
+                position += 1
+                continue
+            matches.append((position, ends[-1]))
+            position = ends[-1] if ends[-1] > position else position + 1
+        return matches
+
+    return find
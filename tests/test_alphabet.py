@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from alphabet import Alphabet
+from bitparallelmatcher import BitParallelMatcher
+from characterset import CharacterSet
+from regexparser import RegexParser
+
+CHARACTER_SETS = [
+    CharacterSet.from_chars('aé'),
+    CharacterSet([(ord('a'), ord('z'))]),
+    CharacterSet([(ord('0'), ord('9')), (ord('x'), ord('x'))]).complement(),
+    CharacterSet([(0x10000, 0x10FFFF)]),
+]
+
+
+def _random_chars(rng: random.Random, number_of_chars: int):
+    # Characters from every range of code points (skipping surrogates).
+    return [chr(rng.choice([rng.randint(0, 0x7F), rng.randint(0x80, 0xD7FF),
+                            rng.randint(0xE000, 0x10FFFF)]))
+            for _ in range(number_of_chars)]
+
+
+def test_classes_partition_the_character_sets():
+    alphabet = Alphabet(CHARACTER_SETS)
+    class_sets = alphabet.class_sets()
+    assert class_sets[0] == CharacterSet()
+    for class_id in range(1, alphabet.number_of_classes + 1):
+        assert alphabet.class_set(class_id) == class_sets[class_id]
+
+    # Each character set is the union of its classes, and no two classes share a character.
+    for character_set in CHARACTER_SETS:
+        assert CharacterSet.union(
+            class_sets[class_id] for class_id in alphabet.classes_of(character_set)
+        ) == character_set
+    for char in _random_chars(random.Random(0), 2000):
+        class_id = alphabet.class_of(char)
+        if class_id is None:
+            assert not any(char in character_set for character_set in CHARACTER_SETS)
+        else:
+            assert [char in class_set for class_set in class_sets].count(True) == 1
+            assert char in class_sets[class_id]
+
+
+def test_json_round_trip():
+    alphabet = Alphabet(CHARACTER_SETS)
+    loaded_alphabet = Alphabet.from_json(alphabet.convert_alphabet_to_json())
+    assert loaded_alphabet.number_of_classes == alphabet.number_of_classes
+    for char in _random_chars(random.Random(1), 2000):
+        assert loaded_alphabet.class_of(char) == alphabet.class_of(char), char
+
+
+@pytest.mark.parametrize('regex', ['abc', '[a-c]x', '.', 'a|[^a]'])
+def test_alphabet_of_a_regex(regex):
+    alphabet = Alphabet.from_tree(RegexParser().parse(regex))
+    for char in 'abcxyé\U0001F600':
+        assert (alphabet.class_of(char) is not None) == \
+            any(char in character_set for character_set in alphabet.class_sets()), char
+
+
+def test_character_caches_are_bounded(monkeypatch):
+    monkeypatch.setattr(Alphabet, 'MAX_CACHED_CHARS', 300)
+    matcher = BitParallelMatcher(RegexParser().parse('(.|[^a-c])*[a-c]'))
+    chars = _random_chars(random.Random(2), 5000)
+    for char in chars:
+        expected_mask = matcher.character_mask(char)
+        # A character is run the same way after it is cached (or not).
+        assert matcher.character_mask(char) == expected_mask
+        assert matcher.run(char) == (char in 'abc'), char
+
+    assert len(matcher.alphabet.char_classes) <= 300
+    assert len(matcher.character_masks) <= 300
+
+
+def test_characters_in_no_class_are_not_cached():
+    matcher = BitParallelMatcher(RegexParser().parse('[a-c]+'))
+    for char in 'xyzé\U0001F600':
+        assert matcher.character_mask(char) == 0
+        assert char not in matcher.alphabet.char_classes
+        assert char not in matcher.character_masks
+
+
+@pytest.mark.parametrize('regex', ['[a-]', '[-a]', '[a-c-e]', '[', '[]', '[^]', '[z-a]'])
+def test_invalid_character_classes(regex):
+    assert RegexParser().parse(regex) is None
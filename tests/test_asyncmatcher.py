@@ -0,0 +1,200 @@
+import asyncio
+import re
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import asyncmatcher
+
+from asyncmatcher import AsyncMatcher, match_many
+from matchengine import MatchEngine
+from regexresult import RegexResult
+
+
+@pytest.fixture(autouse=True)
+def fresh_pattern_cache(monkeypatch, pattern_cache):
+    """
+    fresh_pattern_cache
+    Compiles the regexes of the batches in an empty cache.
+    """
+
+    monkeypatch.setattr('regexresult.PATTERN_CACHE', pattern_cache)
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """
+    batches
+    Records the batches run by AsyncMatcher objects, which wait for the returned event to be
+    set before they start (it is set at the end of the test).
+    """
+
+    run_test_string_batch = asyncmatcher._run_test_string_batch
+    started_batches = []
+    release = threading.Event()
+
+    def run_recorded_batch(regular_expression, test_strings, engine_value):
+        started_batches.append((regular_expression, test_strings))
+        assert release.wait(10)
+        return run_test_string_batch(regular_expression, test_strings, engine_value)
+
+    monkeypatch.setattr(asyncmatcher, '_run_test_string_batch', run_recorded_batch)
+    yield started_batches, release
+    release.set()
+
+
+async def _wait_for_batches(started_batches, number_of_batches):
+    while len(started_batches) < number_of_batches:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize('engine', [MatchEngine.AUTO, MatchEngine.LAZY_DFA,
+                                    MatchEngine.PREFIX_SHARING])
+def test_match_many_agrees_with_re(engine):
+    regexes = ['(a|b)*abb', 'a*', '[^a]+', 'é?b']
+    test_strings = ['', 'a', 'b', 'abb', 'babb', 'éb', 'cc', 'aaa']
+
+    async def run_all():
+        matcher = AsyncMatcher(engine)
+        return await asyncio.gather(*(
+            matcher.match_many(regex, test_strings) for regex in regexes
+        ))
+
+    for regex, results in zip(regexes, asyncio.run(run_all())):
+        assert results == {
+            test_string: re.fullmatch(regex, test_string) is not None
+            for test_string in test_strings
+        }, regex
+
+
+def test_invalid_regex_accepts_nothing():
+    assert asyncio.run(match_many('a(', ['a', ''])) == {'a': None, '': None}
+
+
+def test_run_regex_result_is_like_run_test_strings():
+    regex_result = RegexResult('(ab)+', {'ab': None, 'abab': None, 'a': None})
+    expected = RegexResult('(ab)+', dict(regex_result.test_strings_in_language))
+    expected.run_test_strings()
+
+    assert asyncio.run(AsyncMatcher().run_regex_result(regex_result)) is regex_result
+    assert regex_result.test_strings_in_language == expected.test_strings_in_language
+
+
+def test_concurrent_requests_are_coalesced(batches):
+    started_batches, release = batches
+
+    async def run_all():
+        matcher = AsyncMatcher()
+        requests = [
+            asyncio.ensure_future(matcher.match_many('a+', [test_string, 'a']))
+            for test_string in ['', 'a', 'aa', 'b', 'a']
+        ] + [asyncio.ensure_future(matcher.match_many('b', ['b']))]
+        await _wait_for_batches(started_batches, 2)
+        release.set()
+        return matcher, await asyncio.gather(*requests)
+
+    matcher, results = asyncio.run(run_all())
+    assert matcher.number_of_batches == 2
+    # Each distinct test string is run once.
+    assert sorted(started_batches) == [('a+', ['', 'a', 'aa', 'b']), ('b', ['b'])]
+    assert results == [{'': False, 'a': True}, {'a': True}, {'aa': True, 'a': True},
+                       {'b': False, 'a': True}, {'a': True}, {'b': True}]
+
+
+def test_requests_wait_for_the_running_batch_of_their_regex(batches):
+    started_batches, release = batches
+
+    async def run_all():
+        matcher = AsyncMatcher()
+        first_request = asyncio.ensure_future(matcher.match_many('a+', ['a']))
+        await _wait_for_batches(started_batches, 1)
+
+        # These arrive while the first batch runs, so they are the next batch.
+        later_requests = [asyncio.ensure_future(matcher.match_many('a+', [test_string]))
+                          for test_string in ['aa', 'b', 'aa']]
+        await asyncio.sleep(0.05)
+        assert len(started_batches) == 1
+
+        release.set()
+        return await first_request, await asyncio.gather(*later_requests)
+
+    assert asyncio.run(run_all()) == ({'a': True}, [{'aa': True}, {'b': False}, {'aa': True}])
+    assert started_batches == [('a+', ['a']), ('a+', ['aa', 'b'])]
+
+
+def test_large_requests_are_not_coalesced(batches):
+    started_batches, release = batches
+    release.set()
+
+    async def run_all():
+        matcher = AsyncMatcher(max_batch_size=3)
+        return await asyncio.gather(
+            matcher.match_many('a*', ['a', 'b']),
+            matcher.match_many('a*', ['aa']),
+            matcher.match_many('a*', ['', 'aaa', 'ab', 'ba']),
+            matcher.match_many('a*', ['a']),
+        )
+
+    results = asyncio.run(run_all())
+    # A request larger than the batch size is never split.
+    assert started_batches == [('a*', ['a', 'b', 'aa']), ('a*', ['', 'aaa', 'ab', 'ba']),
+                               ('a*', ['a'])]
+    assert results[2] == {'': True, 'aaa': True, 'ab': False, 'ba': False}
+
+
+def test_cancelled_requests_are_dropped(batches):
+    started_batches, release = batches
+
+    async def run_all():
+        # One worker, busy with the first batch, so the other batches wait to start.
+        matcher = AsyncMatcher(executor=ThreadPoolExecutor(1))
+        busy_request = asyncio.ensure_future(matcher.match_many('a', ['a']))
+        await _wait_for_batches(started_batches, 1)
+
+        abandoned_request = asyncio.ensure_future(matcher.match_many('b', ['b']))
+        shared_requests = [asyncio.ensure_future(matcher.match_many('c', [test_string]))
+                           for test_string in ['c', 'cc']]
+        await asyncio.sleep(0.05)
+        abandoned_request.cancel()
+        shared_requests[0].cancel()
+        # (Cancellations are handled by the event loop, before the worker is released.)
+        await asyncio.sleep(0.05)
+
+        release.set()
+        results = await busy_request, await shared_requests[1]
+        matcher.executor.shutdown()
+        return results
+
+    assert asyncio.run(run_all()) == ({'a': True}, {'cc': False})
+    # The batch nobody waits for is never run.
+    assert started_batches == [('a', ['a']), ('c', ['c', 'cc'])]
+
+
+def test_batch_errors_are_raised_to_every_caller(monkeypatch):
+    def fail(regular_expression, test_strings, engine_value):
+        raise RuntimeError('worker died')
+
+    monkeypatch.setattr(asyncmatcher, '_run_test_string_batch', fail)
+
+    async def run_all():
+        matcher = AsyncMatcher()
+        return await asyncio.gather(matcher.match_many('a', ['a']),
+                                    matcher.match_many('a', ['b']), return_exceptions=True)
+
+    assert [repr(error) for error in asyncio.run(run_all())] == \
+        [repr(RuntimeError('worker died'))] * 2
+
+
+def test_process_executor():
+    async def run_all():
+        executor = AsyncMatcher.process_executor(1)
+        try:
+            matcher = AsyncMatcher(MatchEngine.DFA, executor)
+            return await asyncio.gather(matcher.match_many('(a|b)*abb', ['abb', 'ab']),
+                                        matcher.match_many('a(', ['a']))
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(run_all()) == [{'abb': True, 'ab': False}, {'a': None}]
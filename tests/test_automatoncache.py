@@ -0,0 +1,152 @@
+import os
+import random
+import re
+
+import pytest
+
+from automatoncache import AutomatonCache
+from bitparallelmatcher import BitParallelMatcher
+from dfa import DFA
+from matchengine import MatchEngine
+from patterncache import PatternCache
+
+ENGINES = [engine for engine in MatchEngine if engine != MatchEngine.PREFIX_SHARING]
+
+# (The last regex has too many positions for the bit-parallel matcher.)
+REGEXES = ['(a|b)*abb', 'abc(d|e)*f', '[^a-c]+é?', '()', 'a?' * 8 + 'a' * 8,
+           '(ab|c)*' + 'a' * BitParallelMatcher.MAX_POSITIONS]
+
+
+def _compile_everything(cache_directory, regex):
+    """
+    Compiles a regex with an automaton cache in the directory, and builds every automaton
+    and prefilter it has (so they are saved to the cache, or loaded from it).
+    """
+
+    pattern_cache = PatternCache()
+    pattern_cache.automaton_cache = AutomatonCache(str(cache_directory))
+    compiled_regex = pattern_cache.get(regex)
+    compiled_regex.dfa, compiled_regex.bit_parallel_matcher, compiled_regex.prefilters
+    return compiled_regex
+
+
+def _cache_files(cache_directory):
+    return sorted(file_name for file_name in os.listdir(cache_directory)
+                  if file_name.endswith(AutomatonCache.FILE_EXTENSION))
+
+
+@pytest.mark.parametrize('regex', REGEXES)
+def test_loaded_automata_match_like_the_built_ones(tmp_path, monkeypatch, random_strings,
+                                                    regex):
+    built_regex = _compile_everything(tmp_path, regex)
+    assert len(_cache_files(tmp_path)) == 4
+
+    # The regex isn't parsed again: everything is loaded from the files.
+    monkeypatch.setattr('patterncache.Transform', None)
+    monkeypatch.setattr('compiledregex.RegexParser', None)
+    loaded_regex = _compile_everything(tmp_path, regex)
+    assert (loaded_regex.dfa is None) == (built_regex.dfa is None)
+    assert (loaded_regex.bit_parallel_matcher is None) == \
+        (built_regex.bit_parallel_matcher is None)
+    assert loaded_regex.analysis.convert_pattern_analysis_to_json() == \
+        built_regex.analysis.convert_pattern_analysis_to_json()
+    assert (loaded_regex.prefilter is None) == (built_regex.prefilter is None)
+    if built_regex.prefilter is not None:
+        assert loaded_regex.prefilter.convert_literal_prefilter_to_json() == \
+            built_regex.prefilter.convert_literal_prefilter_to_json()
+
+    python_regex = re.compile(regex)
+    test_strings = random_strings(random.Random(regex), 200, 10) + ['abb', 'abcdef', 'a' * 70]
+    for test_string in test_strings:
+        expected = python_regex.fullmatch(test_string) is not None
+        for engine in ENGINES:
+            assert loaded_regex.matches(test_string, engine) == expected, (test_string, engine)
+
+
+def test_dfa_over_the_budget_is_cached_as_unavailable(tmp_path, pattern_cache):
+    automaton_cache = AutomatonCache(str(tmp_path))
+    assert automaton_cache.load_dfa('a*') == (False, None)
+    automaton_cache.save_dfa('a*', None)
+    assert automaton_cache.load_dfa('a*') == (True, None)
+
+    automaton_cache.save_bit_parallel_matcher('a*', None)
+    assert automaton_cache.load_bit_parallel_matcher('a*') == (True, None)
+
+
+def test_dfa_round_trip(tmp_path, pattern_cache):
+    automaton_cache = AutomatonCache(str(tmp_path))
+    dfa = DFA(pattern_cache.get('(a|b)*abb').nfa)
+    automaton_cache.save_dfa('(a|b)*abb', dfa)
+
+    cached, loaded_dfa = automaton_cache.load_dfa('(a|b)*abb')
+    assert cached
+    assert list(loaded_dfa.transition_table) == list(dfa.transition_table)
+    assert (loaded_dfa.nfa_state_count, loaded_dfa.dfa_state_count,
+            loaded_dfa.minimized_state_count) == \
+        (dfa.nfa_state_count, dfa.dfa_state_count, dfa.minimized_state_count)
+    for test_string in ['abb', 'babb', 'ab', '', 'abbc']:
+        assert loaded_dfa.run_dfa(test_string) == dfa.run_dfa(test_string), test_string
+
+
+@pytest.mark.parametrize('version', ['FORMAT_VERSION', 'ENGINE_VERSION'])
+def test_files_of_other_versions_are_not_loaded(tmp_path, monkeypatch, version):
+    _compile_everything(tmp_path, '(a|b)*abb')
+
+    monkeypatch.setattr(AutomatonCache, version, getattr(AutomatonCache, version) + 1)
+    automaton_cache = AutomatonCache(str(tmp_path))
+    assert automaton_cache.load_nfa('(a|b)*abb') is None
+    assert automaton_cache.load_dfa('(a|b)*abb') == (False, None)
+    assert automaton_cache.load_bit_parallel_matcher('(a|b)*abb') == (False, None)
+    assert automaton_cache.load_prefilters('(a|b)*abb') == (False, None, None)
+
+    # The regex is compiled again (and saved next to the files of the other version).
+    _compile_everything(tmp_path, '(a|b)*abb')
+    assert len(_cache_files(tmp_path)) == 8
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda contents: contents[:len(contents) - 4],
+    lambda contents: contents[:10],
+    lambda contents: b'XXXX' + contents[4:],
+    lambda contents: contents[:6] + bytes([99]) + contents[7:],
+])
+def test_corrupted_files_are_removed(tmp_path, pattern_cache, corrupt):
+    automaton_cache = AutomatonCache(str(tmp_path))
+    automaton_cache.save_nfa('(a|b)*abb', pattern_cache.get('(a|b)*abb').nfa)
+    file_path = tmp_path / _cache_files(tmp_path)[0]
+    file_path.write_bytes(corrupt(file_path.read_bytes()))
+
+    assert automaton_cache.load_nfa('(a|b)*abb') is None
+    assert _cache_files(tmp_path) == []
+
+
+def test_empty_file_is_replaced_on_the_next_save(tmp_path, pattern_cache):
+    automaton_cache = AutomatonCache(str(tmp_path))
+    nfa = pattern_cache.get('(a|b)*abb').nfa
+    automaton_cache.save_nfa('(a|b)*abb', nfa)
+    (tmp_path / _cache_files(tmp_path)[0]).write_bytes(b'')
+
+    # (An empty file can't be memory-mapped.)
+    assert automaton_cache.load_nfa('(a|b)*abb') is None
+    automaton_cache.save_nfa('(a|b)*abb', nfa)
+    assert automaton_cache.load_nfa('(a|b)*abb').simulate_nfa('babb')
+
+
+def test_file_of_another_regex_is_not_loaded(tmp_path, pattern_cache):
+    automaton_cache = AutomatonCache(str(tmp_path))
+    automaton_cache.save_nfa('a', pattern_cache.get('a').nfa)
+    file_name, = _cache_files(tmp_path)
+    os.replace(tmp_path / file_name,
+               automaton_cache._file_path('b', AutomatonCache.NFA_KIND))
+
+    assert automaton_cache.load_nfa('b') is None
+    assert automaton_cache.load_nfa('a') is None
+
+
+def test_clear_removes_only_cache_files(tmp_path):
+    _compile_everything(tmp_path, 'abc')
+    (tmp_path / 'other.txt').write_text('kept')
+
+    AutomatonCache(str(tmp_path)).clear()
+    assert _cache_files(tmp_path) == []
+    assert (tmp_path / 'other.txt').read_text() == 'kept'
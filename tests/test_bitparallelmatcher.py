@@ -0,0 +1,44 @@
+import random
+import re
+
+from bitparallelmatcher import BitParallelMatcher
+from regexparser import RegexParser
+
+
+def test_matches_re_fullmatch(random_regex, random_strings):
+    rng = random.Random(0)
+    for _ in range(300):
+        regex = random_regex(rng)
+        matcher = BitParallelMatcher.from_tree(RegexParser().parse(regex))
+        if matcher is None:
+            continue
+
+        python_regex = re.compile(regex)
+        for test_string in random_strings(rng, 20, 8):
+            assert matcher.run(test_string) == (python_regex.fullmatch(test_string) is not None), \
+                (regex, test_string)
+
+
+def test_run_bytes_agrees_with_run():
+    matcher = BitParallelMatcher(RegexParser().parse('(a|b)*a[a-c]?'))
+    rng = random.Random(1)
+    for _ in range(200):
+        test_string = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 10)))
+        assert matcher.run_bytes(memoryview(test_string.encode('ascii'))) == \
+            matcher.run(test_string), test_string
+
+
+def test_too_many_positions_for_a_word():
+    regex = 'a' * BitParallelMatcher.MAX_POSITIONS
+    assert BitParallelMatcher.from_tree(RegexParser().parse(regex)) is not None
+    assert BitParallelMatcher.from_tree(RegexParser().parse(regex + 'a')) is None
+
+
+def test_from_follow_sets_copies_the_matcher():
+    matcher = BitParallelMatcher(RegexParser().parse('(ab|c)*[b-d]'))
+    copied_matcher = BitParallelMatcher.from_follow_sets(
+        matcher.alphabet, matcher.class_masks, matcher.follow, matcher.accepting_mask
+    )
+
+    for test_string in ['b', 'abd', 'cab', 'ab', '', 'ccc']:
+        assert copied_matcher.run(test_string) == matcher.run(test_string), test_string
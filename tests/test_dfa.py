@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from dfa import DFA
+from matchengine import MatchEngine
+
+# The minimal DFA of this regex has 2^15 states (more than DFA.MAX_STATES).
+EXPONENTIAL_REGEX = '(a|b)*a' + '(a|b)' * 14
+
+
+@pytest.mark.parametrize('regex, minimized_state_count', [
+    ('(a|b)*abb', 5),
+    ('(a|b)*', 2),
+    ('(a*b*)*', 2),
+    ('(ab|ab)(ab)*', 4),
+    ('[a-c]|[b-d]', 3),
+])
+def test_minimized_state_counts(pattern_cache, regex, minimized_state_count):
+    # The counts include the dead state.
+    dfa = pattern_cache.get(regex).dfa
+    assert dfa.minimized_state_count == minimized_state_count
+    assert dfa.minimized_state_count <= dfa.dfa_state_count
+
+
+def test_too_many_states_falls_back_to_the_lazy_dfa(pattern_cache):
+    compiled_regex = pattern_cache.get(EXPONENTIAL_REGEX)
+    with pytest.raises(ValueError):
+        DFA(compiled_regex.nfa)
+    assert compiled_regex.dfa is None
+
+    rng = random.Random(0)
+    for _ in range(200):
+        test_string = ''.join(rng.choice('ab') for _ in range(rng.randint(10, 25)))
+        assert compiled_regex.matches(test_string, MatchEngine.DFA) == \
+            compiled_regex.nfa.simulate_nfa(test_string), test_string
+
+
+def test_state_budget_depends_on_the_number_of_classes(pattern_cache, monkeypatch):
+    compiled_regex = pattern_cache.get('(a|b)*abb')
+    monkeypatch.setattr(DFA, 'MAX_TABLE_ENTRIES', 2 * compiled_regex.nfa.alphabet.number_of_classes)
+    with pytest.raises(ValueError):
+        DFA(compiled_regex.nfa)
+
+    monkeypatch.setattr(DFA, 'MAX_TABLE_ENTRIES', 1 << 20)
+    monkeypatch.setattr(DFA, 'MAX_STATES', 3)
+    with pytest.raises(ValueError):
+        DFA(compiled_regex.nfa)
+
+
+def test_from_tables_copies_the_automaton(pattern_cache):
+    dfa = pattern_cache.get('(a|b)*abb').dfa
+    copied_dfa = DFA.from_tables(
+        dfa.alphabet, dfa.transition_table, dfa.accepting_states, dfa.initial_state,
+        dfa.dead_state, (dfa.nfa_state_count, dfa.dfa_state_count, dfa.minimized_state_count)
+    )
+
+    for test_string in ['abb', 'aabb', 'ab', '', 'abbc', 'babb']:
+        assert copied_dfa.run_dfa(test_string) == dfa.run_dfa(test_string), test_string
@@ -0,0 +1,51 @@
+import random
+import re
+
+import pytest
+
+from matchengine import MatchEngine
+from matchstats import MatchStats
+
+# Prefix sharing runs lists of strings (it is tested with matches_with_prefix_sharing).
+ENGINES = [engine for engine in MatchEngine if engine != MatchEngine.PREFIX_SHARING]
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_engines_agree_with_re_fullmatch(pattern_cache, random_regex, random_strings, seed):
+    rng = random.Random(seed)
+    for _ in range(250):
+        regex = random_regex(rng)
+        compiled_regex = pattern_cache.get(regex)
+        assert compiled_regex is not None, regex
+
+        python_regex = re.compile(regex)
+        for test_string in random_strings(rng, 20, 8):
+            expected = python_regex.fullmatch(test_string) is not None
+            for engine in ENGINES:
+                assert compiled_regex.matches(test_string, engine) == expected, \
+                    (regex, test_string, engine)
+                assert compiled_regex.matches_with_stats(test_string, engine, MatchStats()) == \
+                    expected, (regex, test_string, engine)
+
+
+@pytest.mark.parametrize('regex, accepted, rejected', [
+    ('(a|b)*abb', ['abb', 'aabb', 'babb'], ['', 'ab', 'abba']),
+    ('()', [''], ['a']),
+    ('(a*)*', ['', 'aaa'], ['b']),
+    ('((a|())*b*)*c', ['c', 'abac', 'bbc'], ['', 'ab', 'cc']),
+    ('a?' * 8 + 'a' * 8, ['a' * 8, 'a' * 16], ['a' * 7, 'a' * 17]),
+    ('[^a-c]+', ['d', 'é', 'xyz'], ['', 'a', 'dad']),
+])
+def test_engines_on_known_cases(pattern_cache, regex, accepted, rejected):
+    compiled_regex = pattern_cache.get(regex)
+    for engine in ENGINES:
+        for test_string in accepted:
+            assert compiled_regex.matches(test_string, engine), (engine, test_string)
+        for test_string in rejected:
+            assert not compiled_regex.matches(test_string, engine), (engine, test_string)
+
+
+@pytest.mark.parametrize('regex', ['a(', 'a)', '(', ')', '*a', 'a**', 'a|*', '(()', '[a-', '[]',
+                                   '[c-a]', 'a b'])
+def test_invalid_regexes_do_not_compile(pattern_cache, regex):
+    assert pattern_cache.get(regex) is None
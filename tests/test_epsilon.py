@@ -0,0 +1,105 @@
+import random
+import re
+
+import pytest
+
+from matchengine import MatchEngine
+from nfa import NFA
+from patternset import PatternSet
+
+ENGINES = [engine for engine in MatchEngine if engine != MatchEngine.PREFIX_SHARING]
+
+# Removing the epsilon transitions of this regex takes more work than the default budget
+# (its language is (a|b)*).
+OVER_BUDGET_REGEX = '(a*b*)*' * 50
+
+
+@pytest.fixture
+def no_epsilon_removal(monkeypatch, pattern_cache):
+    """
+    no_epsilon_removal
+    Sets the epsilon removal budget to 0, so every NFA keeps its epsilon transitions
+    (including those of the PatternSet, which compiles its patterns with the returned cache).
+    """
+
+    monkeypatch.setattr(NFA, 'EPSILON_REMOVAL_WORK_FACTOR', 0)
+    monkeypatch.setattr(NFA, 'MIN_EPSILON_REMOVAL_WORK', 0)
+    monkeypatch.setattr('patternset.PATTERN_CACHE', pattern_cache)
+    return pattern_cache
+
+
+def test_pattern_over_the_budget_keeps_its_epsilon_transitions(pattern_cache):
+    compiled_regex = pattern_cache.get(OVER_BUDGET_REGEX)
+    assert not compiled_regex.nfa.epsilon_free
+
+    # (Backtracking takes exponential time on this regex, so it only runs the empty string.)
+    assert compiled_regex.matches('', MatchEngine.BACKTRACK)
+    for engine in ENGINES:
+        if engine == MatchEngine.BACKTRACK:
+            continue
+        for test_string in ['', 'a', 'ba', 'abba']:
+            assert compiled_regex.matches(test_string, engine), (engine, test_string)
+        for test_string in ['c', 'abc']:
+            assert not compiled_regex.matches(test_string, engine), (engine, test_string)
+
+    assert compiled_regex.matches_with_prefix_sharing(['', 'ab', 'abc']) == \
+        {'': True, 'ab': True, 'abc': False}
+
+
+def test_engines_follow_epsilon_transitions(no_epsilon_removal, random_regex, random_strings):
+    rng = random.Random(0)
+    for _ in range(200):
+        regex = random_regex(rng)
+        compiled_regex = no_epsilon_removal.get(regex)
+        python_regex = re.compile(regex)
+        test_strings = random_strings(rng, 15, 6)
+
+        expected = {
+            test_string: python_regex.fullmatch(test_string) is not None
+            for test_string in test_strings
+        }
+        for engine in ENGINES:
+            for test_string in test_strings:
+                assert compiled_regex.matches(test_string, engine) == expected[test_string], \
+                    (regex, test_string, engine)
+        assert compiled_regex.matches_with_prefix_sharing(test_strings) == expected, regex
+
+
+@pytest.mark.parametrize('regex', ['(a*)*', '(()|a)*b', '((a|())*b*)*c', '(()*)*', '((a?)*)*b'])
+def test_backtracking_path_guard_ends_epsilon_cycles(no_epsilon_removal, regex):
+    compiled_regex = no_epsilon_removal.get(regex)
+    assert not compiled_regex.nfa.epsilon_free
+
+    python_regex = re.compile(regex)
+    for test_string in ['', 'a', 'b', 'c', 'aab', 'abac', 'ba']:
+        assert compiled_regex.matches(test_string, MatchEngine.BACKTRACK) == \
+            (python_regex.fullmatch(test_string) is not None), test_string
+
+
+def test_pattern_set_follows_epsilon_transitions(no_epsilon_removal, random_regex,
+                                                 random_strings):
+    rng = random.Random(1)
+    regular_expressions = [random_regex(rng) for _ in range(30)]
+    python_regexes = [re.compile(regex) for regex in regular_expressions]
+    pattern_set = PatternSet(regular_expressions + [OVER_BUDGET_REGEX])
+    assert not any(no_epsilon_removal.get(regex).nfa.epsilon_free for regex in regular_expressions)
+
+    for test_string in random_strings(rng, 300, 6):
+        expected = {
+            pattern_id for pattern_id, python_regex in enumerate(python_regexes)
+            if python_regex.fullmatch(test_string) is not None
+        }
+        # (re takes exponential time on the regex over the budget, whose language is (a|b)*.)
+        if set(test_string) <= {'a', 'b'}:
+            expected.add(len(regular_expressions))
+        assert pattern_set.matching_patterns(test_string) == expected, test_string
+
+
+def test_search_follows_epsilon_transitions(no_epsilon_removal, leftmost_longest_matches):
+    for regex in ['a*b', '(a|ab)(c|bcd)', '(()|a)*b', 'a?']:
+        compiled_regex = no_epsilon_removal.get(regex)
+        python_regex = re.compile(regex)
+        for text in ['aabxab', 'abcd', 'xbb', '', 'cab']:
+            assert list(compiled_regex.finditer(text)) == leftmost_longest_matches(
+                lambda string: python_regex.fullmatch(string) is not None, text
+            ), (regex, text)
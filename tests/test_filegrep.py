@@ -0,0 +1,73 @@
+import random
+import re
+
+import pytest
+
+from filegrep import FileGrep, GrepResult
+from matchengine import MatchEngine
+
+ENGINES = [engine for engine in MatchEngine if engine != MatchEngine.PREFIX_SHARING]
+
+
+def _grep(compiled_regex, engine, file_path):
+    # A yielded line is only valid until the next one is requested, so it is decoded first.
+    return [(line_number, str(line, 'utf-8'))
+            for line_number, line in FileGrep(compiled_regex, engine).matching_lines(file_path)]
+
+
+def _expected_lines(regex, contents):
+    python_regex = re.compile(regex)
+    lines = contents.split('\n')
+    if lines[-1] == '':
+        # (A final line break doesn't start another line.)
+        lines.pop()
+    return [(line_number, line.rstrip('\r')) for line_number, line in enumerate(lines, 1)
+            if python_regex.fullmatch(line.rstrip('\r')) is not None]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_matching_lines_agree_with_re_fullmatch(tmp_path, pattern_cache, random_regex,
+                                                random_strings, engine):
+    rng = random.Random(engine.value)
+    file_path = tmp_path / 'lines.txt'
+    for _ in range(40):
+        regex = random_regex(rng)
+        line_breaks = [rng.choice(['\n', '\r\n']) for _ in range(30)]
+        contents = ''.join(line + line_break
+                           for line, line_break in zip(random_strings(rng, 30, 5), line_breaks))
+        if rng.random() < 0.5:
+            # A final line without a line break.
+            contents += random_strings(rng, 1, 5)[0]
+        file_path.write_bytes(contents.encode('utf-8'))
+
+        assert _grep(pattern_cache.get(regex), engine, str(file_path)) == \
+            _expected_lines(regex, contents), (regex, contents)
+
+
+@pytest.mark.parametrize('regex, expected', [
+    ('a.b', [(1, 'aéb')]),
+    ('.', [(4, 'é')]),
+    ('é*', [(3, ''), (4, 'é')]),
+    ('ab', [(2, 'ab'), (5, 'ab')]),
+    ('[^a]+', [(4, 'é'), (6, 'xyz')]),
+])
+@pytest.mark.parametrize('engine', ENGINES)
+def test_non_ascii_lines(tmp_path, pattern_cache, regex, expected, engine):
+    file_path = tmp_path / 'lines.txt'
+    file_path.write_bytes('aéb\nab\r\n\r\né\nab\nxyz'.encode('utf-8'))
+    assert _grep(pattern_cache.get(regex), engine, str(file_path)) == expected
+
+
+def test_empty_file(tmp_path, pattern_cache):
+    file_path = tmp_path / 'empty.txt'
+    file_path.write_bytes(b'')
+    assert _grep(pattern_cache.get('a*'), MatchEngine.AUTO, str(file_path)) == []
+
+
+def test_grep_result_json():
+    grep_result = GrepResult('a+', [(1, 'a'), (3, 'aa'), (4, 'a')])
+    assert grep_result.convert_regex_result_to_json() == {
+        'regex': 'a+',
+        'lines': [{'line_number': 1, 'line': 'a'}, {'line_number': 3, 'line': 'aa'},
+                  {'line_number': 4, 'line': 'a'}]
+    }
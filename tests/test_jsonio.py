@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from jsonreader import JsonReader
+from jsonwriter import JsonWriter
+from regexresult import RegexResult
+
+ENTRIES = [
+    {'regex': '(a|b)*abb', 'strings': ['abb', 'ab', '']},
+    {'regex': '[a-c]+', 'strings': ['cab', 'd', 'quote " and backslash \\', 'line\nbreak']},
+    {'regex': 'é*', 'strings': ['éé', 'e']},
+]
+
+
+def _write_input_file(path, entries, json_lines: bool = False, indent=None) -> str:
+    with open(path, 'w') as input_file:
+        if json_lines:
+            # Blank lines are allowed between entries.
+            input_file.write('\n\n'.join(json.dumps(entry) for entry in entries) + '\n')
+        else:
+            json.dump(entries, input_file, indent=indent)
+    return str(path)
+
+
+def _read_entries(input_file_path: str):
+    json_reader = JsonReader(input_file_path)
+    entries = [
+        {'regex': regex_result.regular_expression,
+         'strings': list(regex_result.test_strings_in_language)}
+        for regex_result in json_reader.read_regex_results()
+    ]
+    return entries, json_reader.valid
+
+
+@pytest.mark.parametrize('file_name, json_lines, indent', [
+    ('input.json', False, None),
+    ('input.json', False, 4),
+    ('input.jsonl', True, None),
+])
+@pytest.mark.parametrize('chunk_size', [3, JsonReader.CHUNK_SIZE])
+def test_reader_reads_every_entry(tmp_path, monkeypatch, file_name, json_lines, indent,
+                                  chunk_size):
+    # Small chunks split entries (and strings) across reads.
+    monkeypatch.setattr(JsonReader, 'CHUNK_SIZE', chunk_size)
+    input_file_path = _write_input_file(tmp_path / file_name, ENTRIES, json_lines, indent)
+    assert _read_entries(input_file_path) == (ENTRIES, True)
+
+
+@pytest.mark.parametrize('file_name, contents, number_of_valid_entries', [
+    ('input.json', '[{"regex": "a", "strings": ["a"]}, {"regex": "b"}]', 1),
+    ('input.json', '[{"regex": "a", "strings": ["a"]}, {"regex": 5, "strings": ["a"]}]', 1),
+    ('input.json', '[{"regex": "a", "strings": ["a"]}, ', 1),
+    ('input.json', '[]', 0),
+    ('input.json', '{"regex": "a", "strings": ["a"]}', 0),
+    ('input.jsonl', '{"regex": "a", "strings": ["a"]}\nnot json\n', 1),
+    ('input.jsonl', '', 0),
+])
+def test_reader_stops_at_the_first_invalid_entry(tmp_path, file_name, contents,
+                                                 number_of_valid_entries):
+    input_file_path = tmp_path / file_name
+    input_file_path.write_text(contents)
+    entries, valid = _read_entries(str(input_file_path))
+    assert not valid
+    assert entries == [{'regex': 'a', 'strings': ['a']}] * number_of_valid_entries
+
+
+def _results():
+    return [
+        RegexResult(entry['regex'], {test_string: None for test_string in entry['strings']})
+        for entry in ENTRIES
+    ]
+
+
+def test_writer_writes_json_like_json_dump(tmp_path):
+    regex_results = _results()
+    for regex_result in regex_results:
+        regex_result.run_test_strings()
+
+    output_file_path = str(tmp_path / 'output.json')
+    JsonWriter().write_json_output_stream(output_file_path, iter(regex_results))
+
+    expected = [regex_result.convert_regex_result_to_json() for regex_result in regex_results]
+    with open(output_file_path) as output_file:
+        assert output_file.read() == json.dumps(expected, indent=4)
+
+
+def test_writer_writes_one_object_per_json_line(tmp_path):
+    regex_results = _results()
+    output_file_path = str(tmp_path / 'output.jsonl')
+    JsonWriter().write_json_output_stream(output_file_path, iter(regex_results))
+
+    with open(output_file_path) as output_file:
+        lines = output_file.read().splitlines()
+    assert [json.loads(line) for line in lines] == \
+        [regex_result.convert_regex_result_to_json() for regex_result in regex_results]
+
+
+@pytest.mark.parametrize('file_name', ['output.json', 'output.jsonl'])
+def test_writer_writes_no_results(tmp_path, file_name):
+    output_file_path = str(tmp_path / file_name)
+    JsonWriter().write_json_output_stream(output_file_path, iter([]))
+    with open(output_file_path) as output_file:
+        assert output_file.read() == ('' if file_name.endswith('.jsonl') else '[]')
+
+
+@pytest.mark.parametrize('input_name, output_name', [
+    ('input.json', 'output.jsonl'),
+    ('input.jsonl', 'output.json'),
+])
+def test_read_run_and_write_round_trip(tmp_path, input_name, output_name):
+    input_file_path = _write_input_file(tmp_path / input_name, ENTRIES,
+                                        input_name.endswith('.jsonl'))
+    output_file_path = str(tmp_path / output_name)
+
+    def run(regex_results):
+        for regex_result in regex_results:
+            regex_result.run_test_strings()
+            yield regex_result
+
+    json_reader = JsonReader(input_file_path)
+    JsonWriter().write_json_output_stream(output_file_path,
+                                          run(json_reader.read_regex_results()))
+    assert json_reader.valid
+
+    with open(output_file_path) as output_file:
+        if output_name.endswith('.jsonl'):
+            output = [json.loads(line) for line in output_file]
+        else:
+            output = json.load(output_file)
+
+    assert [entry['regex'] for entry in output] == [entry['regex'] for entry in ENTRIES]
+    assert [list(entry['strings']) for entry in output] == \
+        [entry['strings'] for entry in ENTRIES]
+    assert output[0]['strings'] == {'abb': True, 'ab': False, '': False}
@@ -0,0 +1,81 @@
+import random
+
+from lazydfa import LazyDFA
+
+# The minimal DFA of this regex has 2^8 states (it remembers the last 8 characters).
+EXPONENTIAL_REGEX = '(a|b)*a' + '(a|b)' * 7
+
+
+def _random_ab_strings(seed: int, number_of_strings: int, max_length: int):
+    rng = random.Random(seed)
+    return [''.join(rng.choice('ab') for _ in range(rng.randint(0, max_length)))
+            for _ in range(number_of_strings)]
+
+
+def test_small_cache_is_flushed_and_stays_within_its_budget(pattern_cache):
+    nfa = pattern_cache.get(EXPONENTIAL_REGEX).nfa
+    lazy_dfa = LazyDFA(nfa, max_cache_bytes=8192, max_thrashing_flushes=1000)
+
+    for test_string in _random_ab_strings(0, 300, 30):
+        assert lazy_dfa.run_dfa(test_string) == nfa.simulate_nfa(test_string), test_string
+        assert lazy_dfa.cache_size() <= lazy_dfa.max_cache_bytes
+
+    assert lazy_dfa.cache_flushes > 0
+    assert not lazy_dfa.fallback_to_nfa
+
+
+def test_thrashing_cache_falls_back_to_nfa_simulation(pattern_cache):
+    nfa = pattern_cache.get(EXPONENTIAL_REGEX).nfa
+    lazy_dfa = LazyDFA(nfa, max_cache_bytes=2048, max_thrashing_flushes=2)
+
+    for test_string in _random_ab_strings(1, 300, 30):
+        assert lazy_dfa.run_dfa(test_string) == nfa.simulate_nfa(test_string), test_string
+
+    assert lazy_dfa.fallback_to_nfa
+    assert lazy_dfa.thrashing_flushes >= 2
+
+
+def test_large_cache_keeps_every_state(pattern_cache):
+    nfa = pattern_cache.get(EXPONENTIAL_REGEX).nfa
+    lazy_dfa = LazyDFA(nfa)
+
+    for test_string in _random_ab_strings(2, 300, 30):
+        assert lazy_dfa.run_dfa(test_string) == nfa.simulate_nfa(test_string), test_string
+
+    assert lazy_dfa.cache_flushes == 0
+    assert lazy_dfa.number_of_cached_states() <= 2 ** 8 + 8
+
+
+def test_characters_in_no_class_share_one_column(pattern_cache):
+    nfa = pattern_cache.get('[a-z]+').nfa
+    lazy_dfa = LazyDFA(nfa)
+
+    assert lazy_dfa.run_dfa('abc')
+    for code_point in range(0x400, 0x800):
+        assert not lazy_dfa.run_dfa('ab' + chr(code_point))
+
+    # One row per cached state, one column per class of the alphabet.
+    assert lazy_dfa.number_of_cached_states() <= 3
+    assert all(len(row) == nfa.number_of_symbols for row in lazy_dfa._class_transitions)
+
+
+def test_run_dfa_bytes_agrees_with_run_dfa(pattern_cache):
+    nfa = pattern_cache.get('(a|b)*abb').nfa
+    lazy_dfa = LazyDFA(nfa)
+
+    for test_string in _random_ab_strings(3, 200, 12) + ['abbc', 'c', '']:
+        assert lazy_dfa.run_dfa_bytes(memoryview(test_string.encode('ascii'))) == \
+            lazy_dfa.run_dfa(test_string), test_string
+
+
+def test_accepting_positions_and_longest_match(pattern_cache):
+    nfa = pattern_cache.get('ab*').nfa
+    lazy_dfa = LazyDFA(nfa)
+
+    assert lazy_dfa.accepting_positions('abbc') == bytearray([0, 1, 1, 1, 0])
+    assert lazy_dfa.longest_match('xabbc', 1) == 4
+    assert lazy_dfa.longest_match('xabbc', 0) == -1
+    assert lazy_dfa.longest_match('xabbc', 5) == -1
+
+    unanchored_dfa = LazyDFA(nfa, unanchored=True)
+    assert unanchored_dfa.accepting_positions('xabxa') == bytearray([0, 0, 1, 1, 0, 1])
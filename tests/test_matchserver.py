@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from matchclient import MatchClient
+from matchserver import MatchServer
+from regexresult import RegexResult
+
+
+@pytest.fixture(autouse=True)
+def fresh_pattern_cache(monkeypatch, pattern_cache):
+    """
+    fresh_pattern_cache
+    Compiles the regexes of the requests in an empty cache.
+    """
+
+    monkeypatch.setattr('regexresult.PATTERN_CACHE', pattern_cache)
+
+
+@pytest.fixture
+def server_address(tmp_path):
+    """
+    server_address
+    Runs a MatchServer on a Unix socket (on an event loop in another thread, so clients can
+    run their own) and returns its address.
+    """
+
+    socket_path = str(tmp_path / 'server.sock')
+    server = MatchServer()
+    event_loop = asyncio.new_event_loop()
+
+    async def start():
+        unix_server = await asyncio.start_unix_server(server.handle_connection, socket_path)
+        return unix_server
+
+    async def stop(unix_server):
+        # Connections still being served are cancelled before the event loop stops.
+        unix_server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    thread = threading.Thread(target=event_loop.run_forever)
+    thread.start()
+    unix_server = asyncio.run_coroutine_threadsafe(start(), event_loop).result(10)
+    yield socket_path
+
+    asyncio.run_coroutine_threadsafe(stop(unix_server), event_loop).result(10)
+    event_loop.call_soon_threadsafe(event_loop.stop)
+    thread.join()
+    event_loop.close()
+
+
+@pytest.mark.parametrize('address, parsed_address', [
+    ('8765', (None, '127.0.0.1', 8765)),
+    (':8765', (None, '127.0.0.1', 8765)),
+    ('localhost:1', (None, 'localhost', 1)),
+    ('127.0.0.2:1', (None, '127.0.0.2', 1)),
+    ('[::1]:1', (None, '::1', 1)),
+    ('/tmp/server.sock', ('/tmp/server.sock', None, None)),
+    ('./server.sock', ('./server.sock', None, None)),
+])
+def test_parse_address(address, parsed_address):
+    assert MatchServer.parse_address(address) == parsed_address
+
+
+@pytest.mark.parametrize('address', ['0.0.0.0:1', 'example.com:1', '[::]:1', '10.0.0.1:1',
+                                     'localhost:port'])
+def test_parse_address_rejects_other_hosts(address):
+    with pytest.raises(ValueError):
+        MatchServer.parse_address(address)
+
+
+def _exchange(socket_path, request_lines):
+    """
+    Sends request lines on one connection (all before reading any response),
+    and returns the responses.
+    """
+
+    async def exchange():
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        writer.write(b''.join(line + b'\n' for line in request_lines))
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in request_lines]
+        writer.close()
+        return responses
+
+    return asyncio.run(exchange())
+
+
+def test_pipelined_responses_are_in_order(server_address):
+    requests = [
+        {'regex': regex, 'strings': ['', 'a', 'ab', 'abb', 'b' * i]}
+        for i, regex in enumerate(['(a|b)*abb', 'a*', 'b+', '(a|b)*abb', 'a|ab'] * 10)
+    ]
+    responses = _exchange(server_address, [json.dumps(request).encode() for request in requests])
+
+    for request, response in zip(requests, responses):
+        regex_result = RegexResult(request['regex'],
+                                   {test_string: None for test_string in request['strings']})
+        regex_result.run_test_strings()
+        assert response == regex_result.convert_regex_result_to_json()
+
+
+def test_invalid_requests_get_error_responses(server_address):
+    responses = _exchange(server_address, [
+        b'not json',
+        b'{"regex": 5, "strings": ["a"]}',
+        b'{"regex": "a"}',
+        b'{"regex": "a(", "strings": ["a"]}',
+        b'{"regex": "a", "strings": ["a", "b"]}',
+    ])
+
+    assert all('error' in response for response in responses[:3])
+    # (An invalid regex accepts nothing, like in batch mode.)
+    assert responses[3] == {'regex': 'a(', 'strings': {'a': None}}
+    assert responses[4] == {'regex': 'a', 'strings': {'a': True, 'b': False}}
+
+
+def test_failed_request_does_not_end_the_connection(tmp_path):
+    server = MatchServer()
+    run_regex_result = server.matcher.run_regex_result
+
+    async def fail_on_b(regex_result):
+        if regex_result.regular_expression == 'b':
+            raise RuntimeError('worker died')
+        return await run_regex_result(regex_result)
+
+    server.matcher.run_regex_result = fail_on_b
+    socket_path = str(tmp_path / 'server.sock')
+
+    async def exchange():
+        server_task = asyncio.ensure_future(server.serve(socket_path))
+        while not (tmp_path / 'server.sock').exists():
+            await asyncio.sleep(0.01)
+
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        for regex in ['a', 'b', 'a']:
+            writer.write(json.dumps({'regex': regex, 'strings': ['a']}).encode() + b'\n')
+        responses = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+
+        server_task.cancel()
+        await asyncio.gather(server_task, return_exceptions=True)
+        return responses
+
+    assert asyncio.run(exchange()) == [
+        {'regex': 'a', 'strings': {'a': True}},
+        {'error': "RuntimeError('worker died')"},
+        {'regex': 'a', 'strings': {'a': True}},
+    ]
+    # The socket file is removed when the server stops.
+    assert not (tmp_path / 'server.sock').exists()
+    assert server.number_of_requests == 3
+
+
+def test_client_runs_regex_results(server_address, monkeypatch):
+    # Fewer requests in flight than there are requests, so sending waits for responses.
+    monkeypatch.setattr(MatchClient, 'MAX_IN_FLIGHT_REQUESTS', 4)
+    sent = []
+
+    def regex_results():
+        for i in range(50):
+            regex_result = RegexResult('a*b' if i % 2 else '(ab)+', {
+                'ab' * i: None, 'a' * i + 'b': None, '': None
+            })
+            sent.append(regex_result)
+            yield regex_result
+
+    results = list(MatchClient(server_address).run(regex_results()))
+    assert results == sent
+
+    for regex_result in results:
+        expected = RegexResult(regex_result.regular_expression,
+                               dict.fromkeys(regex_result.test_strings_in_language))
+        expected.run_test_strings()
+        assert regex_result.test_strings_in_language == expected.test_strings_in_language
+
+
+def test_client_raises_error_responses(server_address):
+    with pytest.raises(ValueError):
+        # (The server only accepts string regexes.)
+        list(MatchClient(server_address).run([RegexResult(5, {'a': None})]))
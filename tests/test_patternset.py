@@ -0,0 +1,57 @@
+import random
+import re
+
+import pytest
+
+from patternset import PatternSet
+
+
+@pytest.fixture(autouse=True)
+def fresh_pattern_cache(monkeypatch, pattern_cache):
+    """
+    fresh_pattern_cache
+    Compiles the patterns of each PatternSet in an empty cache.
+    """
+
+    monkeypatch.setattr('patternset.PATTERN_CACHE', pattern_cache)
+
+
+def _expected_matches(python_regexes, test_string):
+    return frozenset(
+        pattern_id for pattern_id, python_regex in enumerate(python_regexes)
+        if python_regex is not None and python_regex.fullmatch(test_string) is not None
+    )
+
+
+@pytest.mark.parametrize('max_cache_bytes', [PatternSet.DEFAULT_MAX_CACHE_BYTES, 16384, 4096])
+def test_matching_patterns_agree_with_re(random_regex, random_strings, max_cache_bytes):
+    rng = random.Random(max_cache_bytes)
+    regular_expressions = [random_regex(rng) for _ in range(60)]
+    python_regexes = [re.compile(regex) for regex in regular_expressions]
+    pattern_set = PatternSet(regular_expressions, max_cache_bytes)
+
+    for test_string in random_strings(rng, 500, 8):
+        assert pattern_set.matching_patterns(test_string) == \
+            _expected_matches(python_regexes, test_string), test_string
+        if not pattern_set.fallback_to_nfa:
+            assert pattern_set.cache_size() <= max_cache_bytes
+
+    if max_cache_bytes < PatternSet.DEFAULT_MAX_CACHE_BYTES:
+        assert pattern_set.cache_flushes > 0
+
+
+def test_invalid_patterns_never_match():
+    regular_expressions = ['a*', '(a', 'b|a', '*', '[a-']
+    pattern_set = PatternSet(regular_expressions)
+
+    assert [pattern_set.is_valid(pattern_id) for pattern_id in range(5)] == \
+        [True, False, True, False, False]
+    assert pattern_set.matching_patterns('a') == {0, 2}
+    assert pattern_set.matching_patterns('') == {0}
+    assert pattern_set.matching_patterns('(a') == frozenset()
+
+
+def test_no_valid_patterns():
+    pattern_set = PatternSet(['(', ')'])
+    assert pattern_set.matching_patterns('') == frozenset()
+    assert pattern_set.matching_patterns('a') == frozenset()
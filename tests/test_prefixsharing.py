@@ -0,0 +1,60 @@
+import random
+import re
+
+import pytest
+
+from bitparallelmatcher import BitParallelMatcher
+from matchengine import MatchEngine
+from regexresult import RegexResult
+
+# Strings sharing long prefixes (including duplicates, the empty string and a prefix of others).
+PREFIX_HEAVY_STRINGS = ['', 'a', 'ab', 'abc', 'abc', 'abca', 'abcab', 'abd', 'b', 'ba', 'abcd',
+                        'abcabc', 'abcabcd', 'abé', 'dab', 'ab', '']
+
+# The second regex has more positions than fit in a word, so it runs with NFA simulation.
+REGEXES = ['(abc)*(ab|d)?', '(a|b)*c' + 'a?' * BitParallelMatcher.MAX_POSITIONS]
+
+
+@pytest.mark.parametrize('regex, bit_parallel', [(REGEXES[0], True), (REGEXES[1], False)])
+def test_prefix_sharing_agrees_with_matches(pattern_cache, regex, bit_parallel):
+    compiled_regex = pattern_cache.get(regex)
+    assert (compiled_regex.bit_parallel_matcher is not None) == bit_parallel
+
+    rng = random.Random(0)
+    test_strings = PREFIX_HEAVY_STRINGS + [
+        'abc' * rng.randint(0, 4) + ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 4)))
+        for _ in range(200)
+    ]
+    assert compiled_regex.matches_with_prefix_sharing(test_strings) == {
+        test_string: compiled_regex.matches(test_string) for test_string in test_strings
+    }
+
+
+def test_prefix_sharing_agrees_with_re_fullmatch(pattern_cache, random_regex, random_strings):
+    rng = random.Random(1)
+    for _ in range(200):
+        regex = random_regex(rng)
+        python_regex = re.compile(regex)
+        test_strings = random_strings(rng, 30, 6)
+        assert pattern_cache.get(regex).matches_with_prefix_sharing(test_strings) == {
+            test_string: python_regex.fullmatch(test_string) is not None
+            for test_string in test_strings
+        }, regex
+
+
+def test_no_test_strings(pattern_cache):
+    assert pattern_cache.get('a*').matches_with_prefix_sharing([]) == {}
+
+
+def test_regex_result_with_prefix_sharing(monkeypatch, pattern_cache):
+    monkeypatch.setattr('regexresult.PATTERN_CACHE', pattern_cache)
+    test_strings = {test_string: None for test_string in PREFIX_HEAVY_STRINGS}
+
+    regex_result = RegexResult(REGEXES[0], dict(test_strings))
+    regex_result.run_test_strings(MatchEngine.PREFIX_SHARING)
+    expected = RegexResult(REGEXES[0], dict(test_strings))
+    expected.run_test_strings(MatchEngine.AUTO)
+
+    # The results keep the order of the input strings.
+    assert list(regex_result.test_strings_in_language.items()) == \
+        list(expected.test_strings_in_language.items())
@@ -0,0 +1,118 @@
+import random
+import re
+
+import pytest
+
+# Regexes whose matches re.finditer finds too (re is leftmost-first, not leftmost-longest,
+# so these have no alternatives where the first one is shorter and no empty matches).
+UNAMBIGUOUS_REGEXES = ['a+', '[a-c]+', 'ab', 'a[^a]*b', '(ab)+c?', 'é+', '[^b]+']
+
+
+def _is_accepted_by(regex: str):
+    # (. matches any character, including line breaks.)
+    python_regex = re.compile(regex, re.DOTALL)
+    return lambda string: python_regex.fullmatch(string) is not None
+
+
+def _random_text(rng: random.Random, max_length: int) -> str:
+    return ''.join(rng.choice('aabbcdé\n') for _ in range(rng.randint(0, max_length)))
+
+
+def _blocks(rng: random.Random, text: str):
+    # Random block sizes, with empty blocks in between.
+    position = 0
+    while position < len(text):
+        block_size = rng.choice([0, 1, 2, 3, 7, 20])
+        yield text[position:position + block_size]
+        position += block_size
+
+
+def test_finditer_agrees_with_re_fullmatch(pattern_cache, random_regex,
+                                           leftmost_longest_matches):
+    rng = random.Random(0)
+    for _ in range(150):
+        regex = random_regex(rng)
+        compiled_regex = pattern_cache.get(regex)
+        is_accepted = _is_accepted_by(regex)
+        for _ in range(3):
+            text = _random_text(rng, 12)
+            assert list(compiled_regex.finditer(text)) == \
+                leftmost_longest_matches(is_accepted, text), (regex, text)
+
+
+@pytest.mark.parametrize('regex', UNAMBIGUOUS_REGEXES)
+def test_finditer_agrees_with_re_finditer(pattern_cache, regex):
+    compiled_regex = pattern_cache.get(regex)
+    python_regex = re.compile(regex, re.DOTALL)
+    rng = random.Random(regex)
+    for _ in range(100):
+        text = _random_text(rng, 40)
+        assert list(compiled_regex.finditer(text)) == \
+            [match.span() for match in python_regex.finditer(text)], text
+
+
+def test_finditer_blocks_agrees_with_finditer(pattern_cache, random_regex):
+    rng = random.Random(1)
+    regexes = UNAMBIGUOUS_REGEXES + ['a*', '(a|ab)(c|bcd)', '()', 'a.*b', 'b?c?'] + \
+        [random_regex(rng) for _ in range(100)]
+    for regex in regexes:
+        compiled_regex = pattern_cache.get(regex)
+        for _ in range(3):
+            text = _random_text(rng, 60)
+            expected = [(start, end, text[start:end])
+                        for start, end in compiled_regex.finditer(text)]
+            assert list(compiled_regex.finditer_blocks(_blocks(rng, text))) == expected, \
+                (regex, text)
+
+
+def test_finditer_blocks_of_a_long_text(pattern_cache):
+    # A match spanning every block, then short matches.
+    compiled_regex = pattern_cache.get('a[^b]*b|c+')
+    text = 'a' + 'x' * 10000 + 'b' + 'cxc' * 1000
+    expected = [(start, end, text[start:end]) for start, end in compiled_regex.finditer(text)]
+    blocks = (text[position:position + 64] for position in range(0, len(text), 64))
+    assert list(compiled_regex.finditer_blocks(blocks)) == expected
+    assert expected[0] == (0, 10002, text[:10002])
+    assert len(expected) == 1002
+
+
+def test_finditer_blocks_without_text(pattern_cache):
+    assert list(pattern_cache.get('a*').finditer_blocks([])) == [(0, 0, '')]
+    assert list(pattern_cache.get('a+').finditer_blocks(['', ''])) == []
+
+
+def test_search_finds_the_first_match(pattern_cache):
+    assert pattern_cache.get('b+').search('aabbbcbb') == (2, 5)
+    assert pattern_cache.get('(a|ab)(c|bcd)').search('xabcdx') == (1, 5)
+    assert pattern_cache.get('a*').search('bab') == (0, 0)
+    assert pattern_cache.get('d').search('abc') is None
+
+
+def test_reversed_prefix_nfa_accepts_reversed_prefixes(pattern_cache, random_regex,
+                                                       random_strings):
+    rng = random.Random(2)
+    for _ in range(100):
+        regex = random_regex(rng)
+        reversed_nfa = pattern_cache.get(regex).nfa.reverse(prefixes=True)
+        python_regex = re.compile(regex)
+        for test_string in random_strings(rng, 10, 4):
+            # test_string is a prefix of an accepted string if one of its extensions
+            # (by up to 4 characters, enough for these small regexes) is accepted.
+            extensions = [''] + random_strings(rng, 200, 4)
+            is_prefix = any(python_regex.fullmatch(test_string + extension) is not None
+                            for extension in extensions)
+            if is_prefix:
+                assert reversed_nfa.simulate_nfa(test_string[::-1]), (regex, test_string)
+
+
+@pytest.mark.parametrize('regex, prefixes, not_prefixes', [
+    ('abc', ['', 'a', 'ab', 'abc'], ['b', 'abcd', 'ac']),
+    ('(ab)*c', ['', 'a', 'abab', 'ababa', 'abc'], ['b', 'aa', 'cc', 'abcc']),
+    ('a[^b]*b|c+', ['', 'a', 'axyz', 'axb', 'ccc'], ['b', 'axbb', 'ca', 'x']),
+])
+def test_reversed_prefix_nfa_on_known_cases(pattern_cache, regex, prefixes, not_prefixes):
+    reversed_nfa = pattern_cache.get(regex).nfa.reverse(prefixes=True)
+    for prefix in prefixes:
+        assert reversed_nfa.simulate_nfa(prefix[::-1]), prefix
+    for string in not_prefixes:
+        assert not reversed_nfa.simulate_nfa(string[::-1]), string
@@ -1,212 +1,177 @@
 import logging
 
-from nfa import NFA
-from regexchar import RegexChar
-from state import State
-from typing import List, Optional
+from alphabet import Alphabet
+from nfa import EPSILON, NFA
+from regexnode import RegexNode
+from regexnodetype import RegexNodeType
+from regexoptimizer import RegexOptimizer
+from regexparser import RegexParser
+from typing import Optional
 
 
 class Transform:
     """
     Transform
     Class to transform a regular expression into an equivalent NFA.
+    The regex is parsed into a parse tree (RegexParser), the tree is simplified (RegexOptimizer),
+    and the NFA is then built from the tree with Thompson's construction,
+    in time linear in the size of the tree.
     """
 
-    def __init__(self):
+    def __init__(self, optimize: bool = True):
         """
         __init__
         Creates a new Transform object.
+
+        :param optimize: True to simplify the parse tree before building the NFA.
         """
 
-        self.last_state: State = None
-        self.open_groups: List[State] = []
-        self.last_closed_group: State = None
-        self.union_in_progress: List[(State, State)] = []
-        self.last_star: List[State] = []
+        self.optimize = optimize
+
+        # The (simplified) parse tree of the last regex transformed (None if it couldn't be parsed).
+        self.parse_tree: Optional[RegexNode] = None
 
     def transform_to_nfa(self, regex: str) -> Optional[NFA]:
         """
         transform_to_nfa
-        Main entry point to convert regex to NFA by parsing through the regex.
+        Main entry point to convert regex to NFA by parsing it and building the NFA from its tree.
         Returns either the NFA or None if error occurred.
 
         :param regex: The regular expression to convert.
         :return: An equivalent NFA.
         """
 
-        if not regex:
-            logging.critical('Empty regex error')
-            return
-
-        # Make an NFA and initialize_nfa
-        nfa = NFA()
-        nfa.initialize_nfa(regex)
-        self.last_state = nfa.initial_state
-        self.open_groups.append(self.last_state)
-
-        # Parse regex:
-        # If I read an open grouping char (i.e. '(' or '['), add it as an open group.
-        # If I read a closed grouping char (i.e. ')' or ']'), move the last open state to closed.
-        # If I read an operator, apply the operator to the last closed group.
-        # If there are no closed groups, there is an error.
-        # If I read a character, process it and set it as the last closed group.
-        for char in regex:
-            # Check if it is a group
-            if char in RegexChar.opening_group():
-                self.open_groups.append(self.last_state)
-            elif char in RegexChar.closing_group():
-                # close the group
-                self.last_closed_group = self.open_groups[-1]
-                for union in self.union_in_progress[::-1]:
-                    if union[0] == self.open_groups[-1]:
-                        self.close_union(nfa)
-                self.open_groups = self.open_groups[:-1]
-            # check if the char is an operator
-            elif char in RegexChar.operators():
-                if char == RegexChar.UNION.value:
-                    self.union_nfa(nfa)
-                # apply the operator to the last closed group
-                elif self.last_closed_group is None:
-                    # Error in regex
-                    logging.critical('Error applying operator: ' + str(char))
-                    return
-                else:
-                    if char == RegexChar.STAR.value:
-                        self.star_nfa(nfa)
-                    elif char == RegexChar.OPTIONAL.value:
-                        self.option_nfa(nfa)
-                    elif char == RegexChar.PLUS.value:
-                        self.plus_nfa(nfa)
-            # build the state
-            elif char.isalnum():
-                # if alphanumeric, concatenate
-                nfa = self.concatenate_nfa(nfa, char)
-            else:
-                # error
-                logging.critical('Error reading character: ' + str(char))
-                return
-
-        # post processing
-        self.last_closed_group = self.open_groups[-1]
-        if self.union_in_progress:
-            for union in self.union_in_progress[::-1]:
-                self.close_union(nfa)
-        self.open_groups = self.open_groups[:-1]
-        return nfa
-
-    def concatenate_nfa(self, nfa: NFA, char_to_concatenate: str) -> NFA:
-        """
-        concatenate_nfa
-        Concatenate a regex char to an existing NFA.
-
-        :param nfa: The existing NFA.
-        :param char_to_concatenate: Character from regex to concatenate.
-        :return: The resulting NFA.
-        """
+        self.parse_tree = RegexParser().parse(regex)
+        if self.parse_tree is None:
+            return None
 
-        # As states are added, update the last state to connect from
-        # if this isn't the first char of the regex (only a start state), add an epsilon transition.
-        if len(nfa.states) > 1:
-            self.last_state = nfa.add_epsilon_connector(self.last_state)
-
-        # add the last state as an last close group
-        self.last_closed_group = self.last_state
-
-        # Connect to to new state on concat_char
-        if self.union_in_progress:
-            self.last_state = nfa.add_normal_char(
-                self.last_state, char_to_concatenate, True, self.union_in_progress[-1][1]
-            )
-        elif self.last_star:
-            self.last_state = nfa.add_normal_char(
-                self.last_state, char_to_concatenate, True, self.last_star[-1]
-            )
-            self.last_star = self.last_star[:-1]
-
-        else:
-            self.last_state = nfa.add_normal_char(
-                self.last_state, char_to_concatenate, True, self.open_groups[-1]
-            )
+        if self.optimize:
+            tree = self.parse_tree
+            self.parse_tree = RegexOptimizer().optimize(tree)
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(f'Optimized parse tree: {self.parse_tree} '
+                              f'({RegexOptimizer.count_nodes(tree)} nodes and '
+                              f'{self.count_states(tree)} states before, '
+                              f'{RegexOptimizer.count_nodes(self.parse_tree)} nodes and '
+                              f'{self.count_states(self.parse_tree)} states after)')
 
+        nfa = NFA()
+        nfa.initialize_nfa(Alphabet.from_tree(self.parse_tree))
+        self.build_nfa(nfa, self.parse_tree)
         return nfa
 
-    def union_nfa(self, nfa: NFA, unioning_state: State = None) -> None:
-        """
-        union_nfa
-        Add a union from the last open group (or initial state) to existing NFA.
-
-        :param nfa: The existing NFA.
-        :param unioning_state: An optional state to union from (otherwise: last open group)
-        """
-
-        start_union = unioning_state if unioning_state else self.open_groups[-1]
-
-        self.union_in_progress.append((start_union, self.last_state))
-        logging.debug('Opening union: ' + str((start_union, self.last_state)))
-
-        if start_union in nfa.accepting_states:
-            nfa.accepting_states.remove(start_union)
-
-        # If my open group is at the initial state, make a new state
-        if start_union == nfa.initial_state:
-            self.last_state = nfa.replace_initial()
-        # Otherwise, connect a new epsilon path out of the
-        # open group state for the other part of the union
-        else:
-            self.last_state = nfa.add_epsilon_connector(start_union)
-
-    def close_union(self, nfa: NFA) -> None:
-        """
-        close_union
-        Close the last open union by connecting the two halves
-        (from self.union_in_progress and self.last_state) to a new state via epsilon
-        """
-
-        logging.debug('Closing union: ' + str(self.union_in_progress[-1]))
-
-        # connect last state of each branch
-        self.last_state = nfa.close_branch(self.last_state, self.union_in_progress[-1][1])
-        self.union_in_progress = self.union_in_progress[:-1]
-
-    def star_nfa(self, nfa: NFA) -> None:
-        """
-        star_nfa
-        Add a star from the last closed group to existing NFA.
-
-        :param nfa: The existing NFA.
-        """
-        # add star between last closed group and last state
-        self.last_state = nfa.add_star(self.last_closed_group, self.last_state)
-
-        # register this as a star
-        self.last_star.append(self.last_closed_group)
-
-        # null out the last closed group so it can't be operated on again
-        self.last_closed_group = None
-
-    def option_nfa(self, nfa: NFA) -> None:
-        """
-        option_nfa
-        Add an optional group of chars (last closed group) to an NFA
-
-        :param nfa: The existing NFA.
-        """
-
-        self.union_nfa(nfa, self.last_closed_group)
-        self.close_union(nfa)
+    @staticmethod
+    def count_states(tree: RegexNode) -> int:
+        """
+        count_states
+        Counts the states of the NFA built from a parse tree by build_nfa (without building it).
+
+        :param tree: The root of the parse tree.
+        :return: The number of states (including the initial state).
+        """
+
+        # Literals, character classes and unions add one state, stars and pluses add two.
+        states_added = {
+            RegexNodeType.LITERAL: 1, RegexNodeType.CHARACTER_CLASS: 1, RegexNodeType.UNION: 1,
+            RegexNodeType.STAR: 2, RegexNodeType.PLUS: 2
+        }
+
+        number_of_states = 1
+        nodes_to_visit = [tree]
+        while nodes_to_visit:
+            node = nodes_to_visit.pop()
+            number_of_states += states_added.get(node.node_type, 0)
+            nodes_to_visit.extend(node.children)
+
+        return number_of_states
+
+    @staticmethod
+    def build_nfa(nfa: NFA, tree: RegexNode) -> None:
+        """
+        build_nfa
+        Builds the states and transitions of a parse tree from the initial state of an NFA
+        (whose alphabet is built from the tree), and sorts them into its transition table.
+        A character class is a transition on each class of the alphabet it is made of.
+
+        Each node is built from a given start state to a new end state with no transitions out
+        of it, and never adds transitions into its start state (repetitions loop back to a state
+        of their own). So consecutive nodes can share a state, and so can the branches of a union.
+        The tree is walked with an explicit stack, so deep trees can't exhaust the call stack.
+
+        :param nfa: The NFA to build (with an initial state).
+        :param tree: The root of the parse tree.
+        """
+
+        # Each frame is [node, start state, number of children built, state of the node].
+        # The end state of the last node built is passed back to its parent in end_state.
+        stack = [[tree, nfa.initial_state, 0, None]]
+        end_state = None
+        while stack:
+            frame = stack[-1]
+            node, start_state, children_built, node_state = frame
+            node_type = node.node_type
+            frame[2] += 1
+
+            if node_type == RegexNodeType.LITERAL:
+                end_state = nfa.add_state()
+                nfa.add_to_transition_function((start_state, node.value), end_state)
+                stack.pop()
+
+            elif node_type == RegexNodeType.CHARACTER_CLASS:
+                end_state = nfa.add_state()
+                for symbol_class in nfa.alphabet.classes_of(node.value):
+                    nfa.add_class_transition(start_state, symbol_class, end_state)
+                stack.pop()
+
+            elif node_type == RegexNodeType.EMPTY:
+                end_state = start_state
+                stack.pop()
+
+            elif node_type == RegexNodeType.CONCATENATION:
+                # Each child starts where the previous one ended.
+                if children_built < len(node.children):
+                    child_start = start_state if children_built == 0 else end_state
+                    stack.append([node.children[children_built], child_start, 0, None])
+                else:
+                    stack.pop()
 
-    def plus_nfa(self, nfa: NFA) -> None:
-        """
-        plus_nfa
-        Add a plus operation on the last closed group of an existing nfa
+            elif node_type == RegexNodeType.UNION:
+                # Every branch starts at the start state and ends at a new state.
+                if children_built == 0:
+                    frame[3] = node_state = nfa.add_state()
+                else:
+                    nfa.add_to_transition_function((end_state, EPSILON), node_state)
+                if children_built < len(node.children):
+                    stack.append([node.children[children_built], start_state, 0, None])
+                else:
+                    end_state = node_state
+                    stack.pop()
 
-        :param nfa: The existing NFA.
-        """
-        # add plus between last closed group and last state
-        self.last_state = nfa.add_plus(self.last_closed_group, self.last_state)
+            elif node_type == RegexNodeType.OPTIONAL:
+                if children_built == 0:
+                    stack.append([node.children[0], start_state, 0, None])
+                else:
+                    nfa.add_to_transition_function((start_state, EPSILON), end_state)
+                    stack.pop()
+
+            # Star and plus: the child is built from a new loop state,
+            # and its end state loops back to it.
+            elif children_built == 0:
+                frame[3] = node_state = nfa.add_state()
+                nfa.add_to_transition_function((start_state, EPSILON), node_state)
+                stack.append([node.children[0], node_state, 0, None])
+            else:
+                nfa.add_to_transition_function((end_state, EPSILON), node_state)
+                repeat_end_state = nfa.add_state()
+                if node_type == RegexNodeType.STAR:
+                    nfa.add_to_transition_function((node_state, EPSILON), repeat_end_state)
+                else:
+                    nfa.add_to_transition_function((end_state, EPSILON), repeat_end_state)
+                end_state = repeat_end_state
+                stack.pop()
 
-        # register this as a star
-        self.last_star.append(self.last_closed_group)
+        nfa.accepting_states = 0
+        nfa.set_accepting(end_state, True)
 
-        # null out the last closed group so it can't be operated on again
-        self.last_closed_group = None
+        # Sort the transitions into the adjacency lists used to run the NFA.
+        nfa.build_transition_table()